@@ -7,10 +7,11 @@
 
 from dataclasses import dataclass, field
 
+from P4OO._Base import _SLOTS
 from P4OO._SpecObj import _P4OOSpecObj
 from P4OO._Set import _P4OOSet
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, **_SLOTS)
 class P4OOBranch(_P4OOSpecObj):
     """
     Perforce Branch Spec Object
@@ -8,11 +8,13 @@
 
 from dataclasses import dataclass, field
 
+from P4OO._Base import _SLOTS
 from P4OO.Exceptions import P4Fatal
+from P4OO._Hooks import _traced
 from P4OO._SpecObj import _P4OOSpecObj
 from P4OO._Set import _P4OOSet
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, **_SLOTS)
 class P4OOChange(_P4OOSpecObj):
     """
     Perforce Change Spec Object
@@ -39,9 +41,14 @@ class P4OOChange(_P4OOSpecObj):
     # Subclasses must define SPECOBJ_TYPE
     _SPECOBJ_TYPE = 'change'
 
-    def getChangesFromChangeNums(self, otherChange, client):
+    @_traced
+    def getChangesFromChangeNums(self, otherChange, client, parallelism=1):
         """ Fetch the list of changes from this change to another one.
 
+            One 'p4 changes' is run per line of the client's View, up to
+            parallelism of them at once.  Either way, changes are
+            aggregated in View order.
+
             ASSUMPTIONS:
             - self represents the lower of the two changes.  If the other
               direction is desired, then make the call against the other
@@ -55,20 +62,28 @@ class P4OOChange(_P4OOSpecObj):
         firstChange = int(self._getSpecID()) + 1
         lastChange = int(otherChange._getSpecID())
 
-        aggregatedChanges = P4OOChangeSet()
+        fileChangeRanges = []
         view = client._getSpecAttr('View')
         for viewLine in view:
             viewSpec = viewLine.split(" ", 2)
 
-            fileChangeRange = '%s@%d,%d' % (viewSpec[0], firstChange,
-                                            lastChange)
+            fileChangeRanges.append('%s@%d,%d' % (viewSpec[0], firstChange,
+                                                  lastChange))
 
-            changeSet = P4OOChangeSet(_p4Conn=self._getP4Connection())
-            viewChanges = changeSet.query(files=fileChangeRange,
-                                          longOutput=1)
+        def queryViewLine(p4Conn, fileChangeRange):
+            changeSet = P4OOChangeSet(_p4Conn=p4Conn)
+            return changeSet.query(files=fileChangeRange, longOutput=1)
 
+        p4Conn = self._getP4Connection()
+        aggregatedChanges = P4OOChangeSet()
+        for viewChanges in p4Conn.mapParallel(queryViewLine, fileChangeRanges,
+                                              parallelism=parallelism):
             aggregatedChanges |= viewChanges
 
+        # Changes may have come from a temporary parallel connection
+        for changeObj in aggregatedChanges:
+            changeObj._p4Conn = p4Conn
+
         return aggregatedChanges
 
 #    def reopenFiles(self):
@@ -128,6 +143,7 @@ class P4OOChange(_P4OOSpecObj):
         except P4Fatal:
             return True
 
+    @_traced
     def deleteWithVengeance(self):
         """
         Performs all operations necessary to delete this (pending) change.
@@ -14,6 +14,7 @@ class P4OOChangelist(P4OOChange):
 
     # Subclasses must define SPECOBJ_TYPE
     _SPECOBJ_TYPE = 'change'
+    __slots__ = ()
 
 
 class P4OOChangelistSet(P4OOChangeSet):
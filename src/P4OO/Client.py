@@ -10,12 +10,14 @@
 import re
 from dataclasses import dataclass, field
 
+from P4OO._Base import _SLOTS
 from P4OO.Exceptions import P4Warning, P4Fatal
+from P4OO._Hooks import _traced
 from P4OO._SpecObj import _P4OOSpecObj
 from P4OO._Set import _P4OOSet
 from P4OO.Change import P4OOChangeSet
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, **_SLOTS)
 class P4OOClient(_P4OOSpecObj):
     """
     Perforce Client Spec Object
@@ -144,6 +146,7 @@ class P4OOClient(_P4OOSpecObj):
 
         return p4Output
 
+    @_traced
     def reopenFiles(self):
         """
         Reopen all opened files in this client to be owned by the current user
@@ -166,6 +169,7 @@ class P4OOClient(_P4OOSpecObj):
         except P4Warning:
             return True
 
+    @_traced
     def revertOpenedFiles(self):
         """
         Revert all opened files in this client
@@ -188,6 +192,7 @@ class P4OOClient(_P4OOSpecObj):
         except P4Warning:
             return True
 
+    @_traced
     def deleteWithVengeance(self):
         """
         Performs all operations necessary to remove a client.
@@ -21,10 +21,10 @@ changed.
 """
 
 from dataclasses import dataclass, field
-from P4OO._Base import _P4OOBase
+from P4OO._Base import _P4OOBase, _SLOTS
 from P4OO._Set import _P4OOSet
 
-@dataclass
+@dataclass(unsafe_hash=True, **_SLOTS)
 class P4OOCounter(_P4OOBase):
     """
     Perforce Counter Object
@@ -45,6 +45,11 @@ class P4OOCounter(_P4OOBase):
     def __repr__(self):
         return '%s(%s)' % (self.__class__.__name__, self.id)
 
+    def _uniqueID(self):
+        """ Counters are identified by name, not by the Python object """
+
+        return self.id
+
     def getValue(self):
         """
         Retrieve the current value of the counter
@@ -71,6 +76,7 @@ class P4OOCounter(_P4OOBase):
         return p4ConnObj.setCounter(self.id, newValue)
 
 
+@dataclass
 class P4OOCounterSet(_P4OOSet):
     """ `P4OOSet` of `P4OOCounter` objects """
 
@@ -7,10 +7,10 @@
 
 from dataclasses import dataclass, field
 
-from P4OO._Base import _P4OOBase
+from P4OO._Base import _P4OOBase, _SLOTS
 from P4OO._Set import _P4OOSet
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, **_SLOTS)
 class P4OOFile(_P4OOBase):
     """
     Perforce File Object
@@ -35,8 +35,15 @@ class P4OOFile(_P4OOBase):
 #    # Subclasses must define SPECOBJ_TYPE
 #    _SPECOBJ_TYPE = 'file'
 
+    id: str = field(default=None, compare=True)
+
     def __repr__(self):
-        return '%s(%s)' % (self.__class__.__name__, self._getAttr('id'))
+        return '%s(%s)' % (self.__class__.__name__, self.id)
+
+    def _uniqueID(self):
+        """ Files are identified by their path, not by the Python object """
+
+        return self.id
 
 @dataclass
 class P4OOFileSet(_P4OOSet):
@@ -8,12 +8,14 @@
 
 from dataclasses import dataclass, field
 
+from P4OO._Base import _SLOTS
 from P4OO.Exceptions import P4Warning
 from P4OO.Change import P4OOChangeSet
+from P4OO._Hooks import _traced
 from P4OO._SpecObj import _P4OOSpecObj
 from P4OO._Set import _P4OOSet
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, **_SLOTS)
 class P4OOLabel(_P4OOSpecObj):
     """
     Perforce Label Spec Object
@@ -81,8 +83,10 @@ class P4OOLabel(_P4OOSpecObj):
         # We only expect one result, we only return one result.
         return p4Changes[0]
 
-    def getChangesFromLabels(self, otherLabel, client):
+    @_traced
+    def getChangesFromLabels(self, otherLabel, client, parallelism=1):
         """ Fetch the list of changes from this label to another one.
+            See P4OOChange.getChangesFromChangeNums for parallelism.
 
             Assumptions:
             - self represents the lower of the two labels.  If the other
@@ -96,10 +100,18 @@ class P4OOLabel(_P4OOSpecObj):
         firstChange = self.getLastChange()
         lastChange = otherLabel.getLastChange()
 
-        return firstChange.getChangesFromChangeNums(lastChange, client)
+        return firstChange.getChangesFromChangeNums(lastChange, client,
+                                                    parallelism=parallelism)
 
-    def getDiffsFromLabels(self, otherLabel, client, **diffOpts):
-        """ Fetch the list of diffs from this label to another one """
+    @_traced
+    def getDiffsFromLabels(self, otherLabel, client, parallelism=1,
+                           **diffOpts):
+        """ Fetch the list of diffs from this label to another one
+
+            One 'p4 diff2' is run per line of the client's View, up to
+            parallelism of them at once.  Either way, diffs are returned
+            in View order.
+        """
 
         if not isinstance(otherLabel, P4OOLabel):
             raise TypeError(otherLabel)
@@ -107,27 +119,30 @@ class P4OOLabel(_P4OOSpecObj):
         firstLabelName = self._getSpecID()
         otherLabelName = otherLabel._getSpecID()
 
-        diffText = []
+        labelPaths = []
         view = client._getSpecAttr('View')
         for viewLine in view:
             viewSpec = viewLine.split(" ", 2)
 
-            firstLabelPath = '%s@%s' % (viewSpec[0], firstLabelName)
-            otherLabelPath = '%s@%s' % (viewSpec[0], otherLabelName)
+            labelPaths.append(['%s@%s' % (viewSpec[0], firstLabelName),
+                               '%s@%s' % (viewSpec[0], otherLabelName)])
 
+        def diffViewLine(p4Conn, viewLabelPaths):
             try:
                 # ask for rawOutput so we get the actual diff content,
                 # not just the diff tags.
-                viewDiffs = self._runCommand('diff2',
-                                             rawOutput=True,
-                                             files=[firstLabelPath,
-                                                    otherLabelPath],
-                                             **diffOpts)
-                diffText.extend(viewDiffs)
+                return p4Conn.runCommand('diff2', rawOutput=True,
+                                         files=viewLabelPaths, **diffOpts)
 
             except P4Warning:
                 # This gets thrown if no files exist in view path
-                pass
+                return []
+
+        diffText = []
+        p4Conn = self._getP4Connection()
+        for viewDiffs in p4Conn.mapParallel(diffViewLine, labelPaths,
+                                            parallelism=parallelism):
+            diffText.extend(viewDiffs)
 
         return diffText
 
@@ -7,12 +7,14 @@
 
 from dataclasses import dataclass, field
 
+from P4OO._Base import _SLOTS
 from P4OO.Client import P4OOClientSet
 from P4OO.Change import P4OOChangeSet
+from P4OO._Hooks import _traced
 from P4OO._SpecObj import _P4OOSpecObj
 from P4OO._Set import _P4OOSet
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, **_SLOTS)
 class P4OOUser(_P4OOSpecObj):
     """
     Perforce User Spec Object
@@ -81,6 +83,7 @@ class P4OOUser(_P4OOSpecObj):
         changeSet = P4OOChangeSet(_p4Conn=self._getP4Connection())
         return changeSet.query(user=self, status=status, maxresults=maxresults)
 
+    @_traced
     def deleteWithVengeance(self):
         """
         Performs all operations necessary to remove a user.
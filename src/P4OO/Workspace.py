@@ -14,6 +14,7 @@ class P4OOWorkspace(P4OOClient):
 
     # Subclasses must define SPECOBJ_TYPE
     _SPECOBJ_TYPE = 'client'
+    __slots__ = ()
 
 
 class P4OOWorkspaceSet(P4OOClientSet):
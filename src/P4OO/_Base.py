@@ -13,15 +13,26 @@ Perforce _Base Class
 methods for all P4OO objects.
 """
 
-from P4 import P4
 from dataclasses import dataclass, field
 import logging
+import sys
 
 
-@dataclass(unsafe_hash=True)
+# Spec and file objects are created by the million, so where dataclasses
+# can give them __slots__ (Python 3.11+) they have no per-instance
+# __dict__.  They stay weak referenceable for hydration groups.
+_SLOTS = {'slots': True, 'weakref_slot': True} \
+    if sys.version_info >= (3, 11) else {}
+
+
+# P4Python is only imported once a connection needs it, so the P4 type
+# annotations below are strings.
+@dataclass(unsafe_hash=True, **_SLOTS)
 class _P4OOBase:
-    _p4Conn: P4 = field(default=None, compare=False, repr=False)
-    p4PythonObj: P4 = field(default=None, compare=False, repr=False)
+    _p4Conn: "P4" = field(default=None, compare=False, repr=False)
+    p4PythonObj: "P4" = field(default=None, compare=False, repr=False)
+    p4Pool: object = field(default=None, compare=False, repr=False)
+    p4SQLDbh: object = field(default=None, compare=False, repr=False)
 
     def _uniqueID(self):
         return id(self)
@@ -43,21 +54,45 @@ class _P4OOBase:
 
         return p4Conn.runCommand(cmdName, **kwargs)
 
+    async def callAsync(self, methodName, *args, **kwargs):
+        """ Await one of this object's blocking methods (e.g. "sync" or
+            "getLastChange"), run on its connection's executor.
+        """
+
+        p4Conn = self._getP4Connection()
+
+        return await p4Conn.callAsync(getattr(self, methodName),
+                                      *args, **kwargs)
+
     def _getP4Connection(self):
         from P4OO._P4Python import _P4OOP4Python
 
 #        print(self.p4PythonObj)
         if self._p4Conn is None:
-#        my $p4SQLDbh = $self->_getAttr( 'p4SQLDbh' );
-
-            if self.p4PythonObj is not None:
+            if self.p4SQLDbh is not None:
+                # Reads from the SQL mirror, writes through P4Python
+                from P4OO._P4ToDB import _P4OOP4ToDB
+                self._p4Conn = _P4OOP4ToDB(**{"p4SQLDbh": self.p4SQLDbh,
+                                              "p4PythonObj": self.p4PythonObj,
+                                              "p4Pool": self.p4Pool})
+            elif self.p4PythonObj is not None:
                 self._p4Conn = _P4OOP4Python(**{"p4PythonObj": self.p4PythonObj})
-#        elsif( defined( $p4SQLDbh ) )
-#        {
-#            require P4::OO::_Connection::P4toDB;
-#            $p4Conn = P4::OO::_Connection::P4toDB->new('p4SQLDbh' => $self->_getAttr('p4SQLDbh'));
-#        }
+            elif self.p4Pool is not None:
+                self._p4Conn = _P4OOP4Python(**{"p4Pool": self.p4Pool})
             else:
                 self._p4Conn = _P4OOP4Python()
 
         return self._p4Conn
+
+
+def _flattenArgs(args, dropEmpty=False):
+    """ args as P4Python will see them, with nested lists flattened and
+        None (and with dropEmpty, "") arguments left out
+    """
+    flatArgs = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            flatArgs.extend(_flattenArgs(arg, dropEmpty))
+        elif arg is not None and not (dropEmpty and arg == ""):
+            flatArgs.append(arg)
+    return flatArgs
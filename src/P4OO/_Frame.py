@@ -0,0 +1,460 @@
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._Frame.py
+#
+######################################################################
+
+"""
+Columnar views of P4OO sets, for analytics over large query results.
+
+A _P4OOFrame holds one column per attribute the set's objects have from
+their query output (plus "id"), in the set's order.  Integer columns
+and dates (as epoch seconds) are arrays, and string columns are
+categorical: an array of codes into a list of distinct values.
+Filtering, sorting, grouping and top-k work on whole columns at once,
+with NumPy when it is installed:
+
+    p4Changes = P4OOChangeSet(_p4Conn=p4Conn).query(status="submitted")
+    changeFrame = p4Changes.toFrame()
+
+    changeFrame.groupCount("user")          # {'alice': 81220, ...}
+    recent = changeFrame.filter(changeFrame.compare("date", ">=", cutoff))
+    recent.topK("id", 10).objects()         # the 10 newest changes
+    changeFrame.toPandas()                  # needs pandas
+
+Building a frame doesn't read any specs, and doesn't keep translated
+copies of the objects' query output.  Attributes an object doesn't have
+are None.
+"""
+
+import heapq
+import itertools
+import operator
+from array import array
+from collections import Counter
+from datetime import datetime
+
+from P4OO.Exceptions import P4OOFatal
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_COMPARE_OPS = {'==': operator.eq, '!=': operator.ne, '<': operator.lt,
+                '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+
+class _P4OOColumn():
+    """ Base of the column types.  Subclasses hold their values in
+        self.values, a list, array or NumPy array.
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def take(self, indices):
+        """ Return a column of the values at indices, in that order """
+        if _isNumpy(self.values):
+            return self._newColumn(self.values[indices])
+        return self._newColumn(_takeArray(self.values, indices))
+
+    def toList(self):
+        return list(self.values)
+
+    def compare(self, op, value):
+        return _compareValues(self.values, op, value)
+
+    def sortKeys(self):
+        return self.values
+
+    def _newColumn(self, values):
+        return self.__class__(values)
+
+
+class _P4OOIntColumn(_P4OOColumn):
+    """ int64 values """
+
+    def toPandas(self):
+        return numpy.asarray(self.values)
+
+
+class _P4OODateColumn(_P4OOIntColumn):
+    """ datetimes, held as int64 epoch seconds """
+
+    def toList(self):
+        return [datetime.fromtimestamp(value) for value in self.values]
+
+    def compare(self, op, value):
+        if isinstance(value, datetime):
+            value = int(value.timestamp())
+        return _compareValues(self.values, op, value)
+
+    def toPandas(self):
+        # pandas datetimes are UTC, not local time like ours
+        return numpy.asarray(self.values).astype("datetime64[s]")
+
+
+class _P4OOCategoryColumn(_P4OOColumn):
+    """ Strings as int32 codes into categories, -1 for None """
+
+    def __init__(self, values, categories):
+        _P4OOColumn.__init__(self, values)
+        self.categories = categories
+
+    def _newColumn(self, values):
+        return _P4OOCategoryColumn(values, self.categories)
+
+    def toList(self):
+        categories = self.categories + [None]
+        return [categories[code] for code in self.values]
+
+    def compare(self, op, value):
+        if op not in ('==', '!='):
+            raise P4OOFatal("Categorical columns only compare with == and !=")
+
+        code = self._code(value)
+        return _compareValues(self.values, op, code)
+
+    def isIn(self, values):
+        codes = {self._code(value) for value in values}
+        if _isNumpy(self.values):
+            return numpy.isin(self.values, list(codes))
+        return list(map(codes.__contains__, self.values))
+
+    def sortKeys(self):
+        # Codes are in order of first appearance, sort by their values
+        ranks = {code: rank for (rank, code) in enumerate(
+            sorted(range(len(self.categories)),
+                   key=self.categories.__getitem__))}
+        ranks[-1] = -1
+        if _isNumpy(self.values):
+            rankArray = numpy.empty(len(self.categories) + 1, dtype="int32")
+            for (code, rank) in ranks.items():
+                rankArray[code] = rank
+            return rankArray[self.values]
+        return [ranks[code] for code in self.values]
+
+    def counts(self):
+        """ Return {category: count}, most common first """
+
+        if _isNumpy(self.values):
+            codes = self.values[self.values >= 0]
+            codeCounts = enumerate(
+                numpy.bincount(codes, minlength=len(self.categories))
+                .tolist())
+        else:
+            codeCounter = Counter(self.values)
+            codeCounter.pop(-1, None)
+            codeCounts = codeCounter.items()
+
+        return {self.categories[code]: count for (code, count)
+                in sorted(codeCounts, key=operator.itemgetter(1),
+                          reverse=True)
+                if count}
+
+    def toPandas(self):
+        import pandas
+        return pandas.Categorical.from_codes(numpy.asarray(self.values),
+                                             self.categories)
+
+    def _code(self, value):
+        if value is None:
+            return -1
+        try:
+            return self.categories.index(value)
+        except ValueError:
+            # Matches nothing
+            return -2
+
+
+class _P4OOObjectColumn(_P4OOColumn):
+    """ Anything else (lists, mixed types, ints with None), as a list """
+
+    def take(self, indices):
+        return _P4OOObjectColumn([self.values[index] for index in indices])
+
+    def compare(self, op, value):
+        return list(map(_COMPARE_OPS[op], self.values,
+                        itertools.repeat(value)))
+
+    def toPandas(self):
+        return self.values
+
+
+class _P4OOFrame():
+    """ Columnar view of a P4OO set's objects.  Use _P4OOSet.toFrame()
+        rather than constructing these directly.
+
+        Args:
+            columns (dict): {name: _P4OOColumn}, all the same length
+            objects (list): The P4OO objects the rows came from
+    """
+
+    def __init__(self, columns, objects):
+        self.columns = columns
+        self._objects = objects
+
+    @classmethod
+    def fromObjects(cls, p4ooObjects, attrNames=None, useNumpy=None):
+        """ Return a frame of p4ooObjects' id and query output attributes
+            (or just attrNames).  useNumpy defaults to whether NumPy is
+            installed.
+        """
+
+        p4ooObjects = list(p4ooObjects)
+        if useNumpy is None:
+            useNumpy = numpy is not None
+        elif useNumpy and numpy is None:
+            raise P4OOFatal("NumPy is not installed")
+
+        specs = [_hydratedSpec(p4ooObject) for p4ooObject in p4ooObjects]
+        if attrNames is None:
+            attrNames = []
+            for spec in specs[:1]:
+                attrNames = [attrName for attrName in spec
+                             if attrName != "id"]
+        else:
+            attrNames = [attrName.lower() for attrName in attrNames]
+
+        columns = {'id': _buildColumn([p4ooObject.id for p4ooObject
+                                       in p4ooObjects], useNumpy)}
+        for attrName in attrNames:
+            columns[attrName] = _buildColumn(
+                [spec.get(attrName) for spec in specs], useNumpy)
+
+        return cls(columns, p4ooObjects)
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __getitem__(self, name):
+        """ Return the named column's values as a list """
+        return self._getColumn(name).toList()
+
+    @property
+    def columnNames(self):
+        return list(self.columns)
+
+    def objects(self):
+        """ Return the P4OO objects of our rows, in order """
+        return list(self._objects)
+
+    def compare(self, name, op, value):
+        """ Return a mask of the rows where (column op value) holds.  op is
+            one of ==, !=, <, <=, > and >=.  Date columns compare with
+            datetimes.
+        """
+
+        if op not in _COMPARE_OPS:
+            raise P4OOFatal("Unsupported comparison %r" % (op,))
+        return self._getColumn(name).compare(op, value)
+
+    def isIn(self, name, values):
+        """ Return a mask of the rows whose (string) column is in values """
+
+        column = self._getColumn(name)
+        if not isinstance(column, _P4OOCategoryColumn):
+            raise P4OOFatal("isIn needs a string column, %s isn't" % name)
+        return column.isIn(values)
+
+    def filter(self, mask):
+        """ Return a frame of the rows where mask (a sequence of booleans,
+            one per row, e.g. from compare or isIn) is true
+        """
+
+        if _isNumpy(mask):
+            return self.take(numpy.flatnonzero(mask))
+        return self.take(list(itertools.compress(range(len(self)), mask)))
+
+    def take(self, indices):
+        """ Return a frame of the rows at indices, in that order """
+
+        if self._usesNumpy() and not _isNumpy(indices):
+            indices = numpy.asarray(indices, dtype="int64")
+
+        objects = self._objects
+        return _P4OOFrame({name: column.take(indices)
+                           for (name, column) in self.columns.items()},
+                          [objects[index] for index in indices.tolist()]
+                          if _isNumpy(indices)
+                          else [objects[index] for index in indices])
+
+    def sortBy(self, name, descending=False):
+        """ Return a frame sorted by the named column, keeping the order of
+            equal rows
+        """
+
+        sortKeys = self._getColumn(name).sortKeys()
+        if _isNumpy(sortKeys):
+            if descending:
+                sortKeys = -sortKeys.astype("int64")
+            return self.take(numpy.argsort(sortKeys, kind="stable"))
+
+        if isinstance(self._getColumn(name), _P4OOObjectColumn):
+            # None sorts first
+            sortKeys = [(0, 0) if value is None else (1, value)
+                        for value in sortKeys]
+        return self.take(sorted(range(len(self)), key=sortKeys.__getitem__,
+                                reverse=descending))
+
+    def topK(self, name, k, largest=True):
+        """ Return a frame of the k rows with the largest (or smallest)
+            values of the named column, in that order
+        """
+
+        sortKeys = self._getColumn(name).sortKeys()
+        k = max(0, min(k, len(self)))
+        if k == 0:
+            return self.take([])
+        if _isNumpy(sortKeys):
+            sortKeys = sortKeys.astype("int64")
+            if largest:
+                sortKeys = -sortKeys
+            if k < len(self):
+                candidates = numpy.argpartition(sortKeys, k - 1)[:k]
+            else:
+                candidates = numpy.arange(len(self))
+            order = numpy.argsort(sortKeys[candidates], kind="stable")
+            return self.take(candidates[order])
+
+        selector = heapq.nlargest if largest else heapq.nsmallest
+        return self.take(selector(k, range(len(self)),
+                                  key=sortKeys.__getitem__))
+
+    def groupCount(self, name):
+        """ Return {value: rows}, most common first """
+
+        column = self._getColumn(name)
+        if isinstance(column, _P4OOCategoryColumn):
+            return column.counts()
+        return dict(Counter(column.toList()).most_common())
+
+    def groupBy(self, name, valueName, agg="sum"):
+        """ Return {value of name: agg of valueName's values} for an
+            integer or date valueName column.  agg is sum, min or max.
+        """
+
+        groupColumn = self._getColumn(name)
+        valueColumn = self._getColumn(valueName)
+        if not isinstance(groupColumn, _P4OOCategoryColumn) \
+          or not isinstance(valueColumn, _P4OOIntColumn):
+            raise P4OOFatal("groupBy needs a string column to group and an"
+                            " integer or date column to aggregate")
+        if agg not in ('sum', 'min', 'max'):
+            raise P4OOFatal("Unsupported aggregate %r" % (agg,))
+
+        codes = groupColumn.values
+        values = valueColumn.values
+        if _isNumpy(codes):
+            valid = codes >= 0
+            (codes, values) = (codes[valid], values[valid])
+            present = numpy.bincount(codes,
+                                     minlength=len(groupColumn.categories))
+            if agg == 'sum':
+                results = numpy.bincount(
+                    codes, weights=values,
+                    minlength=len(groupColumn.categories)).astype("int64")
+            else:
+                ufunc = numpy.minimum if agg == 'min' else numpy.maximum
+                info = numpy.iinfo("int64")
+                results = numpy.full(len(groupColumn.categories),
+                                     info.max if agg == 'min' else info.min,
+                                     dtype="int64")
+                ufunc.at(results, codes, values)
+            groups = {code: result for (code, (result, count))
+                      in enumerate(zip(results.tolist(), present.tolist()))
+                      if count}
+        else:
+            aggFunc = {'sum': operator.add, 'min': min, 'max': max}[agg]
+            groups = {}
+            for (code, value) in zip(codes, values):
+                if code >= 0:
+                    groups[code] = aggFunc(groups[code], value) \
+                        if code in groups else value
+
+        if isinstance(valueColumn, _P4OODateColumn) and agg != 'sum':
+            return {groupColumn.categories[code]: datetime.fromtimestamp(value)
+                    for (code, value) in groups.items()}
+        return {groupColumn.categories[code]: value
+                for (code, value) in groups.items()}
+
+    def toPandas(self):
+        """ Return a pandas DataFrame of our columns.  Integer columns are
+            shared with the frame when it uses NumPy, strings become
+            pandas categoricals, and dates become (UTC) datetime64s.
+        """
+
+        import pandas
+
+        if numpy is None:
+            raise P4OOFatal("NumPy is not installed")
+        return pandas.DataFrame({name: column.toPandas()
+                                 for (name, column) in self.columns.items()},
+                                copy=False)
+
+    def _getColumn(self, name):
+        column = self.columns.get(name.lower())
+        if column is None:
+            raise P4OOFatal("No column %r in frame" % (name,))
+        return column
+
+    def _usesNumpy(self):
+        return any(_isNumpy(column.values)
+                   for column in self.columns.values())
+
+
+def _hydratedSpec(p4ooObject):
+    """ Return the attributes p4ooObject has without a spec read.  Query
+        output is translated without being kept.
+    """
+
+    rawOutput = getattr(p4ooObject, '_rawOutput', None)
+    if rawOutput is not None:
+        (merge, p4OutHash) = rawOutput
+        return merge.translate(p4OutHash)
+    return getattr(p4ooObject, '_modifiedSpec', None) or {}
+
+
+def _buildColumn(values, useNumpy):
+    """ Return the most compact column type that holds values """
+
+    valueTypes = set(map(type, values))
+
+    if valueTypes == {int}:
+        column = _P4OOIntColumn(array('q', values))
+    elif valueTypes == {datetime}:
+        column = _P4OODateColumn(array('q', [int(value.timestamp())
+                                             for value in values]))
+    elif valueTypes and valueTypes <= {str, type(None)}:
+        # None is code -1, the rest get codes in order of appearance
+        codeOf = {None: -1}
+        codes = array('i', [codeOf.setdefault(value, len(codeOf) - 1)
+                            for value in values])
+        column = _P4OOCategoryColumn(codes, list(codeOf)[1:])
+    else:
+        return _P4OOObjectColumn(values)
+
+    if useNumpy:
+        column.values = numpy.frombuffer(column.values,
+                                         dtype=column.values.typecode)
+    return column
+
+
+def _isNumpy(values):
+    return numpy is not None and isinstance(values, numpy.ndarray)
+
+
+def _takeArray(values, indices):
+    return array(values.typecode, map(values.__getitem__, indices))
+
+
+def _compareValues(values, op, value):
+    if _isNumpy(values):
+        return _COMPARE_OPS[op](values, value)
+    return list(map(_COMPARE_OPS[op], values, itertools.repeat(value)))
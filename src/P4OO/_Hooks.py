@@ -0,0 +1,199 @@
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._Hooks.py
+#
+######################################################################
+
+"""
+Command hooks and span tracing for a P4OO connection.
+
+With a _P4OOHooks on a connection, every command it runs becomes a span,
+and callbacks registered for preCommand, postCommand and onError are
+called with the connection and that span.  Helpers that fan out into
+many commands (deleteWithVengeance, getChangesFromLabels, ...) open
+spans of their own, so their commands nest under them:
+
+    p4Hooks = _P4OOHooks()
+    p4Hooks.register('onError', lambda p4Conn, span, exc: alert(span))
+    p4Conn = _P4OOP4Python(p4PythonObj=p4Handle, hooks=p4Hooks)
+
+    P4OOUser(id="alice", _p4Conn=p4Conn).deleteWithVengeance()
+    rootSpan = p4Hooks.roots[-1]
+    print(rootSpan.format())        # the span tree, with timings
+    rootSpan.summary()              # {'revert': 3, 'change': 12, ...}
+
+Callers can open spans of their own with p4Hooks.span(name).  Nothing
+is formatted until a span is.  Connections without hooks skip all of
+this.
+"""
+
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+from collections import Counter, deque
+
+
+# The innermost open span in the current thread or task
+_currentSpan = contextvars.ContextVar("P4OO span", default=None)
+
+
+class _P4OOSpan():
+    """ One timed operation: a command, or a helper or caller span
+        containing others.
+
+        seconds is None until the span ends, and error is the exception
+        it ended with, if any.
+    """
+
+    def __init__(self, name, kind, parent=None, attrs=None):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.attrs = attrs or {}
+        self.children = []
+        self.startTime = time.monotonic()
+        self.seconds = None
+        self.error = None
+
+        if parent is not None:
+            parent.children.append(self)
+
+    def __repr__(self):
+        return "_P4OOSpan(%r, %r)" % (self.name, self.kind)
+
+    def end(self, error=None):
+        self.seconds = time.monotonic() - self.startTime
+        self.error = error
+
+    def walk(self):
+        """ Generate this span and all of its descendants, depth first """
+        yield self
+        for child in list(self.children):
+            yield from child.walk()
+
+    def summary(self):
+        """ Return {command name: count} for all commands under this span """
+        return dict(Counter(span.name for span in self.walk()
+                            if span.kind == "command"))
+
+    def format(self, indent=0):
+        """ Return the span tree as indented text, one span per line """
+
+        seconds = "running" if self.seconds is None \
+            else "%.3fs" % self.seconds
+        attrs = "".join(" %s=%s" % item for item in self.attrs.items())
+        error = "" if self.error is None \
+            else " ERROR %s" % type(self.error).__name__
+
+        lines = ["%s%s %s%s%s" % ("  " * indent, self.name, seconds, attrs,
+                                  error)]
+        for child in list(self.children):
+            lines.append(child.format(indent + 1))
+        return "\n".join(lines)
+
+
+class _P4OOHooks():
+    """ Thread-safe hook registry and span collector, shared by any
+        connections given the same instance
+
+        Args:
+            maxRoots (int): Finished top-level spans kept in roots
+    """
+
+    EVENTS = ('preCommand', 'postCommand', 'onError', 'spanStart',
+              'spanEnd')
+
+    def __init__(self, maxRoots=1000):
+        self._lock = threading.Lock()
+        self._callbacks = {event: () for event in self.EVENTS}
+        self.roots = deque(maxlen=maxRoots)
+
+    def register(self, event, callback):
+        """ Call callback on event.  Command events get
+            (p4Conn, span), plus the output for postCommand and the
+            exception for onError.  Span events get (span).
+        """
+
+        if event not in self._callbacks:
+            raise ValueError("Unknown hook event %r" % (event,))
+
+        with self._lock:
+            self._callbacks[event] += (callback,)
+
+    def unregister(self, event, callback):
+        with self._lock:
+            callbacks = list(self._callbacks[event])
+            callbacks.remove(callback)
+            self._callbacks[event] = tuple(callbacks)
+
+    @contextlib.contextmanager
+    def span(self, name, kind="span", **attrs):
+        """ Context manager timing the enclosed code as a span nested in
+            the current one.  Commands run inside it become its children.
+        """
+
+        span = _P4OOSpan(name, kind, parent=_currentSpan.get(), attrs=attrs)
+        self._fire('spanStart', span)
+        token = _currentSpan.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.end(error=exc)
+            raise
+        else:
+            span.end()
+        finally:
+            _currentSpan.reset(token)
+            self._finish(span)
+            self._fire('spanEnd', span)
+
+    def runCommand(self, p4Conn, p4SubCmd, args, runCmd):
+        """ Return runCmd(), run as a command span with hooks called
+            around it.
+        """
+
+        span = _P4OOSpan(p4SubCmd, "command", parent=_currentSpan.get(),
+                         attrs={'args': args})
+        self._fire('preCommand', p4Conn, span)
+        try:
+            p4Out = runCmd()
+        except Exception as exc:
+            span.end(error=exc)
+            self._finish(span)
+            self._fire('onError', p4Conn, span, exc)
+            raise
+
+        span.end()
+        self._finish(span)
+        self._fire('postCommand', p4Conn, span, p4Out)
+        return p4Out
+
+    def _finish(self, span):
+        if span.parent is None:
+            self.roots.append(span)
+
+    def _fire(self, event, *args):
+        for callback in self._callbacks[event]:
+            callback(*args)
+
+
+def _traced(method):
+    """ Decorator running a P4OO helper method in a span named after it,
+        when its object's connection has hooks.
+    """
+
+    spanName = method.__qualname__
+
+    @functools.wraps(method)
+    def tracedMethod(self, *args, **kwargs):
+        hooks = getattr(self._getP4Connection(), 'hooks', None)
+        if hooks is None:
+            return method(self, *args, **kwargs)
+
+        with hooks.span(spanName, kind="helper", id=self.id):
+            return method(self, *args, **kwargs)
+
+    return tracedMethod
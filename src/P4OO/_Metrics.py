@@ -0,0 +1,159 @@
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._Metrics.py
+#
+######################################################################
+
+"""
+Per-command metrics for a P4OO connection.
+
+With a _P4OOMetrics on a connection, every command it runs is counted by
+command name: calls, output records, errors, warnings, server time (in
+P4Python's run()) with a latency histogram, and time P4OO spent parsing
+the output into objects:
+
+    p4Conn = _P4OOP4Python(p4PythonObj=p4Handle, metrics=_P4OOMetrics())
+    P4OOChangeSet(_p4Conn=p4Conn).query(status="pending")
+    p4Conn.getMetrics("changes")['serverSeconds']
+    print(p4Conn.metrics.toPrometheus())
+
+Connections without one skip all of this.
+"""
+
+import math
+import threading
+
+
+class _P4OOCommandMetrics():
+    """ Counters for one command name """
+
+    def __init__(self, buckets):
+        self.calls = 0
+        self.records = 0
+        self.errors = 0
+        self.warnings = 0
+        self.serverSeconds = 0.0
+        self.parseSeconds = 0.0
+        self.bucketCounts = [0] * len(buckets)
+
+    def asDict(self, buckets):
+        return {'calls': self.calls,
+                'records': self.records,
+                'errors': self.errors,
+                'warnings': self.warnings,
+                'serverSeconds': self.serverSeconds,
+                'parseSeconds': self.parseSeconds,
+                'latencyHistogram': dict(zip(buckets, self.bucketCounts))}
+
+
+class _P4OOMetrics():
+    """ Thread-safe per-command metrics, shared by any connections given
+        the same instance
+
+        Args:
+            buckets (tuple): Upper bounds (seconds) of the server latency
+                histogram buckets, ending with math.inf
+    """
+
+    _DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                        1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or self._DEFAULT_BUCKETS)
+        if self.buckets[-1] != math.inf:
+            self.buckets += (math.inf,)
+
+        self._lock = threading.Lock()
+        self._commands = {}     # cmdName --> _P4OOCommandMetrics
+
+    def recordCommand(self, cmdName, seconds, records, errors, warnings):
+        """ Count one command run in P4Python taking seconds """
+
+        bucket = 0
+        while seconds > self.buckets[bucket]:
+            bucket += 1
+
+        with self._lock:
+            cmdMetrics = self._getCommand(cmdName)
+            cmdMetrics.calls += 1
+            cmdMetrics.records += records
+            cmdMetrics.errors += errors
+            cmdMetrics.warnings += warnings
+            cmdMetrics.serverSeconds += seconds
+            cmdMetrics.bucketCounts[bucket] += 1
+
+    def recordParse(self, cmdName, seconds):
+        """ Count seconds spent turning cmdName's output into P4OO objects """
+
+        with self._lock:
+            self._getCommand(cmdName).parseSeconds += seconds
+
+    def get(self, cmdName=None):
+        """ Return a snapshot of cmdName's metrics as a dict, or of all
+            commands' as {cmdName: dict}.  The latency histogram maps each
+            bucket's upper bound to the number of calls in that bucket.
+        """
+
+        with self._lock:
+            if cmdName is not None:
+                cmdMetrics = self._commands.get(cmdName)
+                if cmdMetrics is None:
+                    return None
+                return cmdMetrics.asDict(self.buckets)
+
+            return {cmdName: cmdMetrics.asDict(self.buckets)
+                    for (cmdName, cmdMetrics) in self._commands.items()}
+
+    def reset(self):
+        with self._lock:
+            self._commands = {}
+
+    def toPrometheus(self, prefix="p4oo"):
+        """ Return all metrics in the Prometheus text exposition format """
+
+        allMetrics = self.get()
+        lines = []
+
+        def counter(name, helpText, attr):
+            lines.append("# HELP %s_%s %s" % (prefix, name, helpText))
+            lines.append("# TYPE %s_%s counter" % (prefix, name))
+            for (cmdName, cmdMetrics) in sorted(allMetrics.items()):
+                lines.append('%s_%s{command="%s"} %s'
+                             % (prefix, name, cmdName, cmdMetrics[attr]))
+
+        counter("commands_total", "Commands run.", 'calls')
+        counter("output_records_total", "Output records returned.",
+                'records')
+        counter("errors_total", "Commands failing with errors.", 'errors')
+        counter("warnings_total", "Commands returning warnings.", 'warnings')
+        counter("parse_seconds_total",
+                "Seconds spent parsing output into P4OO objects.",
+                'parseSeconds')
+
+        name = prefix + "_server_seconds"
+        lines.append("# HELP %s Seconds spent running commands in P4Python."
+                     % name)
+        lines.append("# TYPE %s histogram" % name)
+        for (cmdName, cmdMetrics) in sorted(allMetrics.items()):
+            cumulative = 0
+            for (bound, count) in cmdMetrics['latencyHistogram'].items():
+                cumulative += count
+                lines.append('%s_bucket{command="%s",le="%s"} %d'
+                             % (name, cmdName,
+                                "+Inf" if bound == math.inf else bound,
+                                cumulative))
+            lines.append('%s_sum{command="%s"} %s'
+                         % (name, cmdName, cmdMetrics['serverSeconds']))
+            lines.append('%s_count{command="%s"} %d'
+                         % (name, cmdName, cmdMetrics['calls']))
+
+        return "\n".join(lines) + "\n"
+
+    def _getCommand(self, cmdName):
+        # Called with the lock held
+        cmdMetrics = self._commands.get(cmdName)
+        if cmdMetrics is None:
+            cmdMetrics = self._commands[cmdName] \
+                = _P4OOCommandMetrics(self.buckets)
+        return cmdMetrics
@@ -1,30 +1,46 @@
 """ OrderedSet
 
-Copied from http://code.activestate.com/recipes/576694/
-
+Originally copied from http://code.activestate.com/recipes/576694/
 Created by Raymond Hettinger
 Licensed under the MIT License
 
 Modified by David L. Armstrong to avoid use of 'next' keyword
 and add indexing support
+
+Reimplemented by David L. Armstrong on top of an insertion-ordered dict
+(rather than a linked list of nodes) for O(1) positional indexing, much
+lower per-element memory, and fast bulk set operations.
 """
 
 import collections.abc
 
-KEY, PREV, NEXT = range(3)
-
 
 class OrderedSet(collections.abc.MutableSet):
     """ Set that remembers original insertion order.
+
+        Members are the keys of a dict, which keeps insertion order for us.
+        A plain list of the members is built on demand for positional
+        access and kept up to date by add(); discard() just drops it.
     """
 
     def __init__(self, iterable=None):
-        self.end = end = []
-        end += [None, end, end]         # sentinel node for doubly linked list
-        self.map = {}                   # key --> [key, prev, next]
+        self.map = {}                   # key --> None, in insertion order
+        self._index = None              # list(self.map), built on demand
         if iterable is not None:
             self |= iterable
 
+    def _from_iterable(self, iterable):
+        """ Construct a new set of our own type from iterable.  Used by all
+            of the collections.abc.Set operators.
+        """
+        return self.__class__(iterable)
+
+    def _getIndex(self):
+        index = self._index
+        if index is None:
+            index = self._index = list(self.map)
+        return index
+
     def __len__(self):
         return len(self.map)
 
@@ -33,58 +49,105 @@ class OrderedSet(collections.abc.MutableSet):
 
     def add(self, key):
         if key not in self.map:
-            end = self.end
-            curr = end[PREV]
-            curr[NEXT] = end[PREV] = self.map[key] = [key, curr, end]
+            self.map[key] = None
+            if self._index is not None:
+                self._index.append(key)
 
     def discard(self, key):
         if key in self.map:
-            key, prevItem, nextItem = self.map.pop(key)
-            prevItem[NEXT] = nextItem
-            nextItem[PREV] = prevItem
+            del self.map[key]
+            self._index = None
+
+    def clear(self):
+        self.map.clear()
+        self._index = None
 
     # indexing support
     def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._from_iterable(self._getIndex()[key])
+
         if not isinstance(key, int):
             raise KeyError(key)
 
         if key >= len(self) or key < (len(self) * -1):
             raise KeyError(key)
 
-        counter = 0
-        if key >= 0:
-            item = self.end
-            while counter <= key:
-                item = item[NEXT]
-                counter += 1
-            return item[KEY]
-        item = self.end
-        while counter > key:   # > because 0 is the start, not 1
-            item = item[PREV]
-            counter -= 1
-        return item[KEY]
+        return self._getIndex()[key]
 
     def __iter__(self):
-        end = self.end
-        curr = end[NEXT]
-        while curr is not end:
-            yield curr[KEY]
-            curr = curr[NEXT]
+        return iter(self.map)
 
     def __reversed__(self):
-        end = self.end
-        curr = end[PREV]
-        while curr is not end:
-            yield curr[KEY]
-            curr = curr[PREV]
+        return reversed(self._getIndex())
 
     def pop(self, last=True):
         if not self:
             raise KeyError('set is empty')
-        key = next(reversed(self)) if last else next(iter(self))
-        self.discard(key)
+        if last:
+            key = self.map.popitem()[0]
+        else:
+            key = next(iter(self.map))
+            del self.map[key]
+        self._index = None
         return key
 
+    # Bulk operations work on the underlying dicts directly rather than
+    # adding or discarding one member at a time.
+    @staticmethod
+    def _asContainer(other):
+        if isinstance(other, (OrderedSet, collections.abc.Set,
+                              collections.abc.Mapping)):
+            return other
+        return set(other)
+
+    def __ior__(self, other):
+        newKeys = dict.fromkeys(key for key in other if key not in self.map)
+        if newKeys:
+            self.map.update(newKeys)
+            if self._index is not None:
+                self._index.extend(newKeys)
+        return self
+
+    def __iand__(self, other):
+        other = self._asContainer(other)
+        self.map = {key: None for key in self.map if key in other}
+        self._index = None
+        return self
+
+    def __isub__(self, other):
+        if other is self:
+            self.clear()
+            return self
+        for key in other:
+            self.map.pop(key, None)
+        self._index = None
+        return self
+
+    def __or__(self, other):
+        if not isinstance(other, collections.abc.Iterable):
+            return NotImplemented
+        result = self._from_iterable(())
+        result.map = dict(self.map)
+        result |= other
+        return result
+
+    def __and__(self, other):
+        if not isinstance(other, collections.abc.Iterable):
+            return NotImplemented
+        other = self._asContainer(other)
+        result = self._from_iterable(())
+        result.map = {key: None for key in self.map if key in other}
+        return result
+
+    def __sub__(self, other):
+        if not isinstance(other, collections.abc.Iterable):
+            return NotImplemented
+        other = self._asContainer(other)
+        result = self._from_iterable(())
+        result.map = {key: None for key in self.map if key not in other}
+        return result
+
     def __repr__(self):
         if not self:
             return '%s()' % (self.__class__.__name__,)
@@ -92,8 +155,10 @@ class OrderedSet(collections.abc.MutableSet):
 
     def __eq__(self, other):
         if isinstance(other, OrderedSet):
-            return len(self) == len(other) and list(self) == list(other)
+            return len(self) == len(other) \
+                and all(map(_identicalOrEqual, self.map, other.map))
         return set(self) == set(other)
 
-    def __del__(self):
-        self.clear()                    # remove circular references
+
+def _identicalOrEqual(a, b):
+    return a is b or a == b
@@ -6,23 +6,182 @@
 #
 ######################################################################
 
+import contextvars
+import functools
 import os
+import queue
 import re
+import sys
+import threading
+import time
+import weakref
 from dataclasses import dataclass, field
 
 # P4Python
-from P4 import P4, P4Exception, Spec
+from P4 import P4, P4Exception, Spec, OutputHandler
 
-from P4OO.Exceptions import P4OOFatal, P4Fatal, P4Warning
+from P4OO.Exceptions import P4OOError, P4OOFatal, P4Fatal, P4Warning
 from P4OO._Connection import _P4OOConnection
 from P4OO._SpecObj import _P4OOSpecObj
 from P4OO._P4PythonSchema import _P4OOP4PythonSchema
+from P4OO._Track import parseTrackOutput
+
+# asyncio and concurrent.futures take longer to import than the rest of
+# P4OO, and short-lived scripts like triggers rarely need them, so they
+# are imported where they are used.
+
+# Marks the end of a streamed command's output
+_STREAM_END = object()
+
+
+class _P4OOStreamHandler(OutputHandler):
+    """ P4Python OutputHandler that hands each output record to a consumer
+        through a bounded queue instead of collecting the whole result.
+
+        When the queue is full P4Python blocks, so memory stays bounded by
+        maxQueued.  Once cancelled, the running command is told to stop.
+    """
+
+    def __init__(self, maxQueued):
+        OutputHandler.__init__(self)
+        self.queue = queue.Queue(maxsize=maxQueued)
+        self.cancelled = threading.Event()
+        self.delivered = 0
+
+    def put(self, item):
+        while not self.cancelled.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                self.delivered += 1
+                return OutputHandler.HANDLED
+            except queue.Full:
+                pass
+
+        return OutputHandler.CANCEL
+
+    def outputStat(self, h):
+        return self.put(h)
+
+    def outputInfo(self, i):
+        return self.put(i)
+
+    def outputText(self, s):
+        return self.put(s)
+
+    def outputBinary(self, b):
+        return self.put(b)
+
+
+def _nextBatch(syncIter, batchSize):
+    """ Return a list of up to batchSize more items from syncIter """
+    batch = []
+    for item in syncIter:
+        batch.append(item)
+        if len(batch) >= batchSize:
+            break
+    return batch
+
+
+class _P4OOOutputMerge():
+    """ Merges records of one query's output into the spec objects created
+        from them, once they are used (see _P4OOSpecObj._materializeOutput)
+    """
+
+    def __init__(self, p4Conn, specCmdObj, outputCmdObj):
+        self.p4Conn = p4Conn
+        self.specCmdObj = specCmdObj
+        self.outputCmdObj = outputCmdObj
+
+    def __call__(self, specObj, p4OutHash):
+        return self.p4Conn._generateModifiedSpec(
+            self.specCmdObj, specObj, p4OutHash,
+            outputCmdObj=self.outputCmdObj)
+
+    def translate(self, p4OutHash):
+        """ Return the spec attributes p4OutHash provides, without merging
+            them into anything
+        """
+        return self.outputCmdObj.translateOutputToPython(p4OutHash,
+                                                         self.specCmdObj)
+
+
+def _closeAfter(batchFuture, close):
+    """ Wait for batchFuture (if any) to finish, then call close() (if any)
+    """
+    if batchFuture is not None:
+        import concurrent.futures
+        concurrent.futures.wait([batchFuture])
+    if close is not None:
+        close()
+
+
+def _releaseSlot(loop, asyncSlots, future):
+    """ Done callback handing back a slot from one of _P4OOP4PythonPool's
+        async semaphores, from whichever thread future finished on
+    """
+    try:
+        loop.call_soon_threadsafe(asyncSlots.release)
+    except RuntimeError:
+        # The loop is closed, and its semaphore with it
+        pass
+
 
 @dataclass
 class _P4OOP4Python(_P4OOConnection):
 
+    # Optional _P4OOSpecCache shared by readSpec for all of our objects
+    specCache: object = field(default=None, compare=False, repr=False)
+
+    # Optional _P4OOPersistentCache of immutable (submitted change) data
+    persistentCache: object = field(default=None, compare=False, repr=False)
+
+    # Optional _P4OOMetrics recording per-command counts and timings
+    metrics: object = field(default=None, compare=False, repr=False)
+
+    # Optional _P4OOTrackStats collecting server performance tracking
+    trackStats: object = field(default=None, compare=False, repr=False)
+
+    # Optional _P4OOHooks called around each command, and tracing spans
+    hooks: object = field(default=None, compare=False, repr=False)
+
+    # Optional _P4OOSlowLog of commands over its latency threshold
+    slowLog: object = field(default=None, compare=False, repr=False)
+
+    # Maximum number of output records buffered ahead of a stream consumer
+    _STREAM_QUEUE_SIZE = 1000
+
+    # Maximum number of objects read per hydrateSpecs batch command
+    _BATCH_READ_SIZE = 500
+
+    # Number of streamed records handed to the event loop per executor call
+    _ASYNC_BATCH_SIZE = 256
+
+    # Spec and spec query output fields with few distinct values.  Records
+    # keep one shared copy of each value from _internTable rather than a
+    # string of their own.
+    _INTERN_FIELDS = frozenset((
+        'user', 'client', 'status', 'changeType', 'Owner', 'Host', 'Options',
+        'SubmitOptions', 'LineEnd', 'Type', 'Status', 'User', 'Client',
+        'Stream', 'Parent', 'Revision'))
+
+    # Maximum number of distinct values in _internTable
+    _INTERN_TABLE_SIZE = 65536
+
+    # Commands changing the files, shelf, jobs or status of changes
+    _CHANGE_WRITING_COMMANDS = frozenset((
+        'add', 'edit', 'delete', 'copy', 'integ', 'integrate', 'merge',
+        'move', 'rename', 'reopen', 'revert', 'shelve', 'unshelve',
+        'submit', 'populate', 'undo', 'fix', 'lock', 'unlock'))
+
+    # P4 settings copied to the connections of a _forkPool
+    _FORK_SETTINGS = ('port', 'user', 'client', 'password', 'charset',
+                      'host', 'prog', 'ticket_file')
+
     def __post_init__(self):
         self._ownP4PythonObj = None
+        self._streamThread = None
+        self._executor = None
+        self._internTable = {}
     
     def readCounter(self, counterName):
         """ Read the named counter from Perforce and return the value. """
@@ -57,6 +216,17 @@ class _P4OOP4Python(_P4OOConnection):
 
         specObj._p4SpecObj = None
         specObj._modifiedSpec = None
+        specObj._hydratedAttrs = None
+        specObj._hydrationGroup = None
+        specObj._rawOutput = None
+
+        if specObj.id is not None:
+            if self.specCache is not None:
+                self.specCache.invalidate(specObj._SPECOBJ_TYPE, specObj.id)
+            if self.persistentCache is not None:
+                self.persistentCache.invalidateSpec(specObj._SPECOBJ_TYPE,
+                                                    specObj.id)
+
         self.readSpec(specObj)
 
     def readSpec(self, specObj):
@@ -89,18 +259,164 @@ class _P4OOP4Python(_P4OOConnection):
                     raise P4OOFatal("Cannot identify %s object" %
                                     (specType,))
 
-            specCmd = specCmdObj.getSpecCmd()
-            p4Output = self._execCmd(specCmd, "-o", specID)
+            specCache = self.specCache
+            if specCache is not None and specID is not None:
+                p4SpecObj = specCache.get(specType, specID)
+
+            persistentCache = self.persistentCache
+            if p4SpecObj is None and persistentCache is not None \
+              and specID is not None:
+                p4SpecObj = persistentCache.getSpec(specType, specID)
+
+                if p4SpecObj is not None and specCache is not None:
+                    specCache.put(specType, specID, p4SpecObj)
+
+            if p4SpecObj is None:
+                specCmd = specCmdObj.getSpecCmd()
+                p4Output = self._execCmd(specCmd, "-o", specID)
+
+                # Since we muck with the Spec replacing date fields with
+                # datetime objects, we just flatten the objects.
+                p4SpecObj = p4Output[0]
+
+                if specID is not None:
+                    if specCache is not None:
+                        specCache.put(specType, specID, p4SpecObj)
+                    if persistentCache is not None:
+                        persistentCache.putSpec(specType, specID, p4SpecObj)
 
-            # Since we muck with the Spec replacing date fields with
-            # datetime objects, we just flatten the objects.
-            p4SpecObj = p4Output[0]
             specObj._p4SpecObj = p4SpecObj
 
-        p4Spec = dict(p4SpecObj)
-        return self._generateModifiedSpec(specCmdObj, specObj, p4Spec)
+        metrics = self.metrics
+        if metrics is None:
+            return self._generateModifiedSpec(
+                specCmdObj, specObj, self._internRecord(dict(p4SpecObj)))
+
+        startTime = time.perf_counter()
+        modifiedSpec = self._generateModifiedSpec(
+            specCmdObj, specObj, self._internRecord(dict(p4SpecObj)))
+        metrics.recordParse(specCmdObj.getSpecCmd(),
+                            time.perf_counter() - startTime)
+        return modifiedSpec
+
+    def hydrateSpecs(self, specObjs, attrName=None):
+        """ Fill in query attributes for many spec objects at once using
+            the spec type's batchRead command (e.g. 'describe' for changes,
+            'users' for users), instead of one spec read per object.
+
+            Only objects that haven't been fully read, and are missing
+            attrName (if given), are considered.  Each object takes part in
+            at most one batch; anything the batch can't provide is left to
+            the usual per-object readSpec.
+
+            Returns the number of objects hydrated.
+        """
+
+        # Make sure we've read in the config file
+        self._initialize()
+
+        specObjs = list(specObjs)
+        if not specObjs:
+            return 0
+
+        specCmdObj = self._p4PythonSchema.getSpecCmd(
+            specType=specObjs[0]._SPECOBJ_TYPE)
+        batchRead = specCmdObj.getBatchRead()
+        if batchRead is None:
+            return 0
+
+        batchCmdObj = self._p4PythonSchema.getCmd(batchRead['command'])
+        if attrName is not None \
+          and attrName not in self._getBatchAttrs(specCmdObj, batchCmdObj):
+            # Batching won't help with this one
+            return 0
+
+        # What each object's own query output provides counts too
+        for specObj in specObjs:
+            specObj._materializeOutput()
+
+        specObjs = [specObj for specObj in specObjs
+                    if specObj._p4SpecObj is None and specObj.id is not None
+                    and (attrName is None or specObj._hydratedAttrs is None
+                         or attrName not in specObj._hydratedAttrs)]
+
+        # Whatever happens, nobody gets batched twice
+        for specObj in specObjs:
+            specObj._hydrationGroup = None
+
+        idAttr = batchCmdObj.getOutputIdAttr()
+        hydrated = 0
+        for start in range(0, len(specObjs), self._BATCH_READ_SIZE):
+            batch = {str(specObj.id): specObj for specObj
+                     in specObjs[start:start + self._BATCH_READ_SIZE]}
+
+            query = dict(batchRead.get('filters', {}))
+            query[batchRead['idFilter']] = list(batch)
+            (execArgs, p4Config) = batchCmdObj.validateQuery(query)
+
+            try:
+                p4Out = self._execCachedCmd(batchCmdObj.command, execArgs,
+                                            p4Config)
+            except P4OOError:
+                # Some of these don't exist (yet?), leave them to readSpec
+                continue
+
+            for p4OutHash in p4Out:
+                specObj = batch.get(str(p4OutHash.get(idAttr)))
+                if specObj is not None:
+                    self._internRecord(p4OutHash)
+                    self._generateModifiedSpec(specCmdObj, specObj,
+                                               p4OutHash,
+                                               outputCmdObj=batchCmdObj)
+                    hydrated += 1
+
+        return hydrated
+
+    def _internRecord(self, p4OutHash, internFields=None):
+        """ Replace p4OutHash's values of internFields (default
+            _INTERN_FIELDS) with the copies in our intern table, adding new
+            values while it has room.  Returns p4OutHash.
+        """
+
+        internTable = self._internTable
+        if internFields is None:
+            internFields = self._INTERN_FIELDS
+        for (fieldName, value) in p4OutHash.items():
+            if fieldName not in internFields or value.__class__ is not str:
+                continue
+
+            internedValue = internTable.get(value)
+            if internedValue is not None:
+                p4OutHash[fieldName] = internedValue
+            elif len(internTable) < self._INTERN_TABLE_SIZE:
+                internTable[value] = value
+
+        return p4OutHash
+
+    def _getBatchAttrs(self, specCmdObj, batchCmdObj):
+        """ Return the set of spec attributes batchCmdObj's output provides
+        """
+
+        idAttrs = {specCmdObj.getPyIdAttribute()}
+
+        # Without an output mapping, we can't tell which spec attributes
+        # the command reports beyond the ID
+        outputTranslator = batchCmdObj.getOutputTranslator()
+        if outputTranslator is None:
+            return idAttrs
+
+        (specAttrs, dateAttrs) = outputTranslator
+        return {specAttr[0] for specAttr in specAttrs + dateAttrs} | idAttrs
+
+    def _generateModifiedSpec(self, specCmdObj, specObj, specDict,
+                              outputCmdObj=None):
+        """ Merge a P4Python spec dict (or, with outputCmdObj, one record of
+            that command's query output) into specObj._modifiedSpec.
+
+            Attributes that came from query output are recorded in
+            specObj._hydratedAttrs so they can be read without a spec read.
+        """
 
-    def _generateModifiedSpec(self, specCmdObj, specObj, specDict):
         # Perforce will return an "empty" spec when a specified object isn't
         # found so it can be handily created.
         # We don't want that behavior here, so we throw an exception instead.
@@ -114,6 +430,10 @@ class _P4OOP4Python(_P4OOConnection):
 #            raise P4OOFatal(specType + ": " + str(specID) + " does not exist")
 #            return None
 
+        # Whatever query output specObj came from goes in first
+        if specObj._rawOutput is not None:
+            specObj._materializeOutput()
+
         specID = specObj.id
 
         # Here we take the spec from P4 and make it something useful
@@ -122,7 +442,11 @@ class _P4OOP4Python(_P4OOConnection):
             modifiedSpec = {}
 
         # merge specDict from P4Python and modifiedSpec
-        pythonSpecDict = specCmdObj.translateP4SpecToPython(specDict)
+        if outputCmdObj is None:
+            pythonSpecDict = specCmdObj.translateP4SpecToPython(specDict)
+        else:
+            pythonSpecDict = outputCmdObj.translateOutputToPython(specDict,
+                                                                  specCmdObj)
 
         for specAttr in pythonSpecDict:
             # ignore attributes already set by caller
@@ -131,11 +455,23 @@ class _P4OOP4Python(_P4OOConnection):
 
         specObj._modifiedSpec = modifiedSpec
 
+        idAttr = specCmdObj.getPyIdAttribute()
+
         # We'll set the object's specID if it was not defined..if we can.
         if specID is None:
-            idAttr = specCmdObj.getPyIdAttribute()
             specObj.id = modifiedSpec[idAttr]
 
+        if outputCmdObj is not None:
+            # The id is known either way, whatever the output called it
+            if idAttr not in modifiedSpec:
+                modifiedSpec[idAttr] = specObj.id
+
+            hydratedAttrs = specObj._hydratedAttrs
+            if hydratedAttrs is None:
+                hydratedAttrs = specObj._hydratedAttrs = set()
+            hydratedAttrs.update(pythonSpecDict)
+            hydratedAttrs.add(idAttr)
+
         return modifiedSpec
 
     def saveSpec(self, specObj, force=False):
@@ -287,6 +623,11 @@ class _P4OOP4Python(_P4OOConnection):
         if not m or m.group(1) != '':
             raise P4OOFatal(p4Output)
 
+        if self.specCache is not None:
+            self.specCache.invalidate(specType, specID)
+        if self.persistentCache is not None:
+            self.persistentCache.invalidateSpec(specType, specID)
+
         return True
 
     def runCommand(self, cmdName, rawOutput=False, **kwargs):
@@ -309,7 +650,14 @@ class _P4OOP4Python(_P4OOConnection):
             p4Config['tagged'] = 0
 
 #        print("p4Config: ", p4Config )
-        p4Out = self._execCmd(cmdName, execArgs, **p4Config)
+        try:
+            p4Out = self._execCachedCmd(cmdName, execArgs, p4Config)
+        finally:
+            # Working out which changes a command touched isn't worth it,
+            # and a failed one may still have touched some
+            if self.specCache is not None \
+              and cmdName in self._CHANGE_WRITING_COMMANDS:
+                self.specCache.invalidateType('change')
 
 # TODO... subcommands?
 #                'counter' => { 'specCmd'      => 'counter',
@@ -333,88 +681,398 @@ class _P4OOP4Python(_P4OOConnection):
         if rawOutput or cmdObj.getOutputType() is None:
             return p4Out
 
-        return self._parseOutput(cmdName, p4Out)
+        metrics = self.metrics
+        if metrics is None:
+            return self._parseOutput(cmdName, p4Out)
+
+        startTime = time.perf_counter()
+        setObj = self._parseOutput(cmdName, p4Out)
+        metrics.recordParse(cmdName, time.perf_counter() - startTime)
+        return setObj
+
+    def iterCommand(self, cmdName, rawOutput=False, **kwargs):
+        """ Streaming form of runCommand.  Returns a generator yielding
+            P4OO objects (or raw output records) as P4Python delivers them,
+            rather than a fully built Set.
+
+            Output is buffered at most _STREAM_QUEUE_SIZE records ahead of
+            the consumer.  Closing the generator early (e.g. breaking out
+            of a for loop) cancels the command on the server.
+
+            The connection is busy until the generator is exhausted or
+            closed, so use a different connection for any other commands
+            issued while iterating.  Connections drawing from a p4Pool are
+            never busy.
+        """
+        query = dict(kwargs)
+
+        # Make sure we've read in the config file
+        self._initialize()
+
+        cmdObj = self._p4PythonSchema.getCmd(cmdName=cmdName)
+
+        (execArgs, p4Config) = cmdObj.validateQuery(query)
+
+        if rawOutput:
+            # We also turn off tagged output when raw is requested!
+            p4Config['tagged'] = 0
+
+        p4Stream = self._execCmdStream(cmdName, execArgs, **p4Config)
+
+        if rawOutput or cmdObj.getOutputType() is None:
+            return p4Stream
+
+        return self._iterParseOutput(cmdName, p4Stream)
+
+    def getMetrics(self, cmdName=None):
+        """ Return this connection's metrics (see _P4OOMetrics.get), or
+            None if it isn't keeping any.
+        """
+
+        if self.metrics is None:
+            return None
+        return self.metrics.get(cmdName)
+
+    def getLastTrack(self):
+        """ Return the _P4OOTrackRecord of the last command the calling
+            thread ran with server performance tracking, or None.
+        """
+
+        if self.trackStats is None:
+            return None
+        return self.trackStats.lastRecord()
+
+    def mapParallel(self, func, items, parallelism=1):
+        """ Return [func(p4Conn, item) for item in items], running up to
+            parallelism calls at once.  Results are always in items order,
+            and the first exception (in items order) is raised.
+
+            p4Conn is a connection that's safe to use from func's thread:
+            this one if it draws from a p4Pool, otherwise one drawing from a
+            temporary pool of connections configured like our P4 object.
+            Objects func returns may refer to that temporary connection,
+            so re-home them (set _p4Conn) if they'll be used afterwards.
+        """
+
+        items = list(items)
+        if parallelism is None or parallelism <= 1 or len(items) <= 1:
+            return [func(self, item) for item in items]
+
+        import concurrent.futures
+
+        workers = min(parallelism, len(items))
+
+        forkedPool = None
+        p4Conn = self
+        if not self._isPooled():
+            forkedPool = self._forkPool(workers)
+            p4Conn = _P4OOP4Python(p4Pool=forkedPool,
+                                   specCache=self.specCache,
+                                   persistentCache=self.persistentCache,
+                                   metrics=self.metrics,
+                                   trackStats=self.trackStats,
+                                   hooks=self.hooks,
+                                   slowLog=self.slowLog)
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix="P4OO parallel") as executor:
+                # Each call runs in the caller's context, so it nests in
+                # any span the caller has open
+                futures = [executor.submit(contextvars.copy_context().run,
+                                           func, p4Conn, item)
+                           for item in items]
+                return [future.result() for future in futures]
+        finally:
+            if forkedPool is not None:
+                forkedPool.close()
+
+    def _forkPool(self, maxSize):
+        """ Return a new _P4OOP4PythonPool of P4 objects connecting the way
+            our own P4 object does.
+        """
+        from P4OO._P4PythonPool import _P4OOP4PythonPool
+
+        p4PythonObj = self._connect()
+
+        # Stand-in P4 objects (see _P4Transport) know how to copy themselves
+        if hasattr(p4PythonObj, 'fork'):
+            return _P4OOP4PythonPool(maxSize=maxSize,
+                                     p4Factory=p4PythonObj.fork)
+
+        p4Settings = {setting: getattr(p4PythonObj, setting)
+                      for setting in self._FORK_SETTINGS
+                      if getattr(p4PythonObj, setting, None)}
+        if self.trackStats is not None:
+            p4Settings['track'] = 1
+
+        def p4Factory():
+            forkedP4PythonObj = P4()
+            for (setting, value) in p4Settings.items():
+                setattr(forkedP4PythonObj, setting, value)
+            return forkedP4PythonObj
+
+        return _P4OOP4PythonPool(maxSize=maxSize, p4Factory=p4Factory)
+
+    ######################################################################
+    # asyncio API
+    #
+    # Each of these runs its blocking counterpart on an executor: the
+    # p4Pool's (one worker per pooled connection) or, for a connection
+    # with a single P4 object, a one-worker executor of its own so its
+    # commands never overlap.  Pooled calls first await one of the pool's
+    # async slots (see _P4OOP4PythonPool.getAsyncSlots), so no worker is
+    # ever stuck waiting for a connection.  Cancelling a call that hasn't
+    # started yet means it never runs.  A command that's already running
+    # finishes in the background, except for streamed commands, which are
+    # stopped.
+    #
+    async def callAsync(self, func, *args, **kwargs):
+        """ Await func(*args, **kwargs) run on this connection's executor.
+        """
+
+        import asyncio
+
+        # In the caller's context, so commands nest in its spans
+        loop = asyncio.get_running_loop()
+        runFunc = functools.partial(contextvars.copy_context().run, func,
+                                    *args, **kwargs)
+
+        if not self._isPooled():
+            return await loop.run_in_executor(self._getExecutor(), runFunc)
+
+        # The slot is held until func is done, even if we're cancelled
+        asyncSlots = self.p4Pool.getAsyncSlots()
+        await asyncSlots.acquire()
+        try:
+            future = self._getExecutor().submit(runFunc)
+        except BaseException:
+            asyncSlots.release()
+            raise
+        future.add_done_callback(
+            functools.partial(_releaseSlot, loop, asyncSlots))
+        return await asyncio.wrap_future(future)
+
+    async def runCommandAsync(self, cmdName, rawOutput=False, **kwargs):
+        """ Awaitable form of runCommand """
+        return await self.callAsync(self.runCommand, cmdName,
+                                    rawOutput=rawOutput, **kwargs)
+
+    async def readSpecAsync(self, specObj):
+        """ Awaitable form of readSpec """
+        return await self.callAsync(self.readSpec, specObj)
+
+    async def saveSpecAsync(self, specObj, force=False):
+        """ Awaitable form of saveSpec """
+        return await self.callAsync(self.saveSpec, specObj, force=force)
+
+    async def deleteSpecAsync(self, specObj, force=False):
+        """ Awaitable form of deleteSpec """
+        return await self.callAsync(self.deleteSpec, specObj, force=force)
+
+    def iterCommandAsync(self, cmdName, rawOutput=False, **kwargs):
+        """ Async iterator form of iterCommand.  Closing it early (e.g.
+            breaking out of an async for loop, or cancelling the task
+            running it) cancels the command on the server.
+        """
+
+        return self.iterAsync(self.iterCommand(cmdName, rawOutput=rawOutput,
+                                               **kwargs))
+
+    async def iterAsync(self, syncIter):
+        """ Async iterator over a blocking iterator (such as one from
+            iterCommand), advanced in batches on this connection's executor.
+            Drawing from a p4Pool, it holds one of the pool's async slots
+            and is advanced on a thread of its own instead, so a stream
+            holding a connection never waits behind pool workers.
+        """
+
+        import asyncio
+        import concurrent.futures
+
+        loop = asyncio.get_running_loop()
+        asyncSlots = None
+        if self._isPooled():
+            asyncSlots = self.p4Pool.getAsyncSlots()
+            await asyncSlots.acquire()
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="P4OO async stream")
+        else:
+            executor = self._getExecutor()
+
+        nextBatch = functools.partial(_nextBatch, iter(syncIter),
+                                      self._ASYNC_BATCH_SIZE)
+        # Batches run one at a time, all in the caller's context
+        nextBatch = functools.partial(contextvars.copy_context().run,
+                                      nextBatch)
+
+        batchFuture = None
+        try:
+            while True:
+                batchFuture = executor.submit(nextBatch)
+                batch = await asyncio.wrap_future(batchFuture)
+                if not batch:
+                    break
+                for item in batch:
+                    yield item
+        finally:
+            # A cancelled batch may still be running, and the iterator
+            # can't be closed until it's done.
+            closeFuture = executor.submit(_closeAfter, batchFuture,
+                                          getattr(syncIter, 'close', None))
+            if asyncSlots is not None:
+                executor.shutdown(wait=False)
+                closeFuture.add_done_callback(
+                    functools.partial(_releaseSlot, loop, asyncSlots))
+            await asyncio.shield(asyncio.wrap_future(closeFuture))
+
+    def _getExecutor(self):
+        if self._isPooled():
+            return self.p4Pool.getExecutor()
+
+        if self._executor is None:
+            import concurrent.futures
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="P4OO connection")
+        return self._executor
 
     def _parseOutput(self, cmdName, p4Out):
 
+        # Wrap it with a bow
+        setObj = self._getOutputClasses(cmdName)[1]()
+
+        setObj._p4Conn = self
+        setObj.addObjects(list(self._iterParseOutput(cmdName, p4Out)))
+        return setObj
+
+    def _getOutputClasses(self, cmdName):
+        """ Return the (specClass, setClass) P4OO classes for cmdName's
+            output.
+        """
+
         # Make sure we've read in the config file
         self._initialize()
         cmdObj = self._p4PythonSchema.getCmd(cmdName=cmdName)
 
         p4ooType = cmdObj.getOutputType()
         setType = p4ooType + "Set"
-        idAttr = cmdObj.getOutputIdAttr()
-#        singularID = _P4Python._P4PYTHON_COMMAND_TRANSLATION[cmdName]['output']['singularID']
 
         # Make sure the caller is properly equipped to use any objects
         # we construct here.
-#        specModule = __import__("P4OO." + p4ooType, globals(), locals(),
-#                                ["P4OO" + p4ooType, "P4OO" + setType], -1)
         specModule = __import__("P4OO." + p4ooType, globals(), locals(),
                                 ["P4OO" + p4ooType, "P4OO" + setType], 0)
-#        setModule = __import__("P4OO." + setType, globals(), locals(),
-#                               ["P4OO" + setType], -1)
         specClass = getattr(specModule, "P4OO" + p4ooType)
         setClass = getattr(specModule, "P4OO" + setType)
 
-        objectList = []
+        return (specClass, setClass)
+
+    def _iterParseOutput(self, cmdName, p4Out):
+        """ Generate P4OO objects from each record of cmdName's output """
+
+        # Make sure we've read in the config file
+        self._initialize()
+        cmdObj = self._p4PythonSchema.getCmd(cmdName=cmdName)
+
+        p4ooType = cmdObj.getOutputType()
+        idAttr = cmdObj.getOutputIdAttr()
+        specClass = self._getOutputClasses(cmdName)[0]
+
+        specCmdObj = None
+        hydrationGroup = None
+        if issubclass(specClass, _P4OOSpecObj):
+            specCmdObj = self._p4PythonSchema.getSpecCmd(
+                specType=specClass._SPECOBJ_TYPE)
+
+            # Records are only translated once something reads them (see
+            # _P4OOSpecObj._materializeOutput), so queries feeding IDs to
+            # other queries never pay for it
+            merge = _P4OOOutputMerge(self, specCmdObj, cmdObj)
+
+            # Objects from the same output can fill in missing attributes
+            # together (see hydrateSpecs)
+            if specCmdObj.getBatchRead() is not None:
+                hydrationGroup = weakref.WeakValueDictionary()
+
+        # Every record has its own ID, so there's no point interning it
+        internRecord = self._internRecord
+        internFields = self._INTERN_FIELDS.difference((idAttr,))
 
         # Don't really care about the content of the output, just the specIDs.
         for p4OutHash in p4Out:
             if idAttr not in p4OutHash:
                 raise P4OOFatal("Unexpected output from Perforce.")
 
-            # Copy the idAttr output value to the id attribute
-            #  if they aren't one and the same already
-#            if singularID is not idAttr:
-#                p4OutHash[singularID] = p4OutHash[idAttr]
-
-            # HACK - Instead of eval'ing this through the type's
-            # constructor, we'll just use the base class and bless
-#            # Construct the new spec dictionary, copying our own _p4Conn attribute
-#            specAttrs = { 'p4Spec':  p4OutHash,
-#                          'id':      p4OutHash[idAttr],
-#                          '_p4Conn': self,
-#                        }
-#            specObj = eval( singularType + "(specAttrs)" )
-
             specObj = specClass()
 
 # TODO - figure out P4.Spec objects
-#            specObj._setAttr('p4Spec', Spec(p4OutHash))
 # TODO - need to fix this special case for Change - need better construction logic
             if p4ooType == 'Change':
                 specObj.id = int(p4OutHash[idAttr])
             else:
                 specObj.id = p4OutHash[idAttr]
 
-# TODO - This is a little awkward...
-            if isinstance(specObj, _P4OOSpecObj):
-                specCmdObj = self._p4PythonSchema.getSpecCmd(
-                    specType=specObj._SPECOBJ_TYPE)
-                self._generateModifiedSpec(specCmdObj, specObj, p4OutHash)
-#            specObj._setAttr('modifiedSpec', p4OutHash)
-#            self._logDebug( "id: ", p4OutHash[idAttr])
+            if specCmdObj is not None:
+                internRecord(p4OutHash, internFields)
+                specObj._rawOutput = (merge, p4OutHash)
+
+            if hydrationGroup is not None:
+                hydrationGroup[specObj.id] = specObj
+                specObj._hydrationGroup = hydrationGroup
 
             # Make sure each of these objects can reuse this connection too
             specObj._p4Conn = self
-            objectList.append(specObj)
-
-        # Wrap it with a bow
-        setObj = setClass()
-
-        setObj._p4Conn = self
-        setObj.addObjects(objectList)
-        return setObj
+            yield specObj
 
     ######################################################################
     # Internal Methods
     #
     def _execCmd(self, p4SubCmd, *args, **p4Config):
 
+        if self._isPooled():
+            # Every command gets a P4 object of its own from the pool, so
+            # there is nothing to be busy with
+            p4Pool = self.p4Pool
+            p4PythonObj = p4Pool.checkout()
+            try:
+                return self._runP4(p4PythonObj, p4SubCmd, args, p4Config)
+            finally:
+                p4Pool.checkin(p4PythonObj)
+
+        # A streaming command owns the connection until it's done
+        streamThread = self._streamThread
+        if streamThread is not None \
+          and streamThread is not threading.current_thread():
+            raise P4OOFatal("Connection is busy streaming output, cannot run "
+                            + p4SubCmd)
+
         # We want this pretty much right from the start
         p4PythonObj = self._connect()
 
+        return self._runP4(p4PythonObj, p4SubCmd, args, p4Config)
+
+    def _runP4(self, p4PythonObj, p4SubCmd, args, p4Config):
+        """ Run one command on p4PythonObj with p4Config settings applied,
+            raising P4Fatal/P4Warning for errors/warnings.
+        """
+
+        hooks = self.hooks
+        slowLog = self.slowLog
+        if hooks is None and slowLog is None:
+            return self._runP4Command(p4PythonObj, p4SubCmd, args, p4Config)
+
+        runCmd = functools.partial(self._runP4Command, p4PythonObj, p4SubCmd,
+                                   args, p4Config)
+        if slowLog is not None:
+            runCmd = functools.partial(slowLog.runCommand, self, p4SubCmd,
+                                       args, p4Config, runCmd)
+        if hooks is None:
+            return runCmd()
+
+        return hooks.runCommand(self, p4SubCmd, args, runCmd)
+
+    def _runP4Command(self, p4PythonObj, p4SubCmd, args, p4Config):
+
         # copy the input tuple to a mutable list first.
         listArgs = list(args)
 
@@ -440,21 +1098,29 @@ class _P4OOP4Python(_P4OOConnection):
         # override p4Python settings for this command as applicable
         origConfig = {}
         for (var, value) in p4Config.items():
-            origConfig[var] = p4PythonObj.__getattribute__(var)
+            origConfig[var] = getattr(p4PythonObj, var)
             p4PythonObj.__setattr__(var, value)
-            self._logDebug("overriding p4Config['%s'] = %s with %s"
-                           % (var, str(origConfig[var]), str(value)))
+            self._logDebug("overriding p4Config", var, origConfig[var],
+                           value)
 
 # TODO ping server before each command?
         self._logDebug("Executing:", p4SubCmd, listArgs)
-        p4Out = p4PythonObj.run(p4SubCmd, listArgs)
+        metrics = self.metrics
+        if metrics is None:
+            p4Out = p4PythonObj.run(p4SubCmd, listArgs)
+        else:
+            p4Out = self._runMeasured(metrics, p4PythonObj, p4SubCmd,
+                                      listArgs, p4Config)
         self._logDebug("p4Out: ", p4Out)
 
+        trackStats = self.trackStats
+        if trackStats is not None:
+            self._recordTrack(trackStats, p4PythonObj, p4SubCmd)
+
         # restore p4Python settings changed for this command only
         for var in p4Config:
             p4PythonObj.__setattr__(var, origConfig[var])
-            self._logDebug("resetting p4Config['%s'] = %s"
-                           % (var, str(origConfig[var])))
+            self._logDebug("resetting p4Config", var, origConfig[var])
 
 # TODO Should do something to detect disconnects, etc.
 
@@ -473,11 +1139,128 @@ class _P4OOP4Python(_P4OOConnection):
 
         return p4Out
 
+    @staticmethod
+    def _runMeasured(metrics, p4PythonObj, p4SubCmd, listArgs, p4Config):
+        """ p4PythonObj.run(), recorded in metrics """
+
+        startTime = time.perf_counter()
+        p4Out = []
+        try:
+            p4Out = p4PythonObj.run(p4SubCmd, listArgs)
+            return p4Out
+        finally:
+            # Streamed output went to the handler instead
+            records = len(p4Out) \
+                + getattr(p4Config.get('handler'), 'delivered', 0)
+            metrics.recordCommand(p4SubCmd, time.perf_counter() - startTime,
+                                  records, int(bool(p4PythonObj.errors)),
+                                  int(bool(p4PythonObj.warnings)))
+
+    def _recordTrack(self, trackStats, p4PythonObj, p4SubCmd):
+        """ Parse the last command's tracking output into trackStats """
+
+        trackOutput = getattr(p4PythonObj, 'track_output', None)
+        if not trackOutput:
+            return
+
+        self._initialize()
+        specType = None
+        try:
+            cmdObj = self._p4PythonSchema.getCmd(p4SubCmd)
+            if cmdObj.isSpecCommand():
+                specType = cmdObj.getSpecCmd()
+            elif cmdObj.getOutputType() is not None:
+                specType = cmdObj.getOutputType().lower()
+        except P4OOFatal:
+            # Not a command we model, it's still tracked by name
+            pass
+
+        trackStats.record(parseTrackOutput(trackOutput, cmdName=p4SubCmd,
+                                           specType=specType))
+
+    def _execCachedCmd(self, p4SubCmd, args, p4Config):
+        """ _execCmd, by way of the persistentCache if we have one """
+
+        if self.persistentCache is not None:
+            return self.persistentCache.execCmd(self, p4SubCmd, [args],
+                                                p4Config)
+
+        return self._execCmd(p4SubCmd, args, **p4Config)
+
+    def _execCmdStream(self, p4SubCmd, *args, **p4Config):
+        """ Generator form of _execCmd.  The command runs in a helper
+            thread with a _P4OOStreamHandler attached, and each output
+            record is yielded as soon as P4Python delivers it.
+
+            Errors and warnings are raised, just like _execCmd, once the
+            output has been consumed.
+        """
+
+        # The helper thread runs in our caller's context, with the callers
+        # noted while they're still on the stack for the slow log
+        streamContext = contextvars.copy_context()
+        if self.slowLog is not None:
+            self.slowLog.noteCallers(streamContext, sys._getframe(1))
+
+        return self._iterCmdStream(streamContext, p4SubCmd, args, p4Config)
+
+    def _iterCmdStream(self, streamContext, p4SubCmd, args, p4Config):
+        """ The generator _execCmdStream returns """
+
+        isPooled = self._isPooled()
+        if not isPooled and self._streamThread is not None:
+            raise P4OOFatal("Connection is busy streaming output, cannot run "
+                            + p4SubCmd)
+
+        handler = _P4OOStreamHandler(maxQueued=self._STREAM_QUEUE_SIZE)
+        result = {}
+
+        def runStream():
+            try:
+                self._execCmd(p4SubCmd, *args, handler=handler, **p4Config)
+            except Exception as exc:  # pylint: disable=broad-except
+                result['exc'] = exc
+            finally:
+                handler.put(_STREAM_END)
+
+        streamThread = threading.Thread(target=streamContext.run,
+                                        args=(runStream,), daemon=True,
+                                        name="P4OO stream: " + p4SubCmd)
+        if not isPooled:
+            self._streamThread = streamThread
+        streamThread.start()
+
+        try:
+            while True:
+                item = handler.queue.get()
+                if item is _STREAM_END:
+                    break
+                yield item
+        finally:
+            # Consumer is done, one way or another.  Make sure the command
+            # stops and the connection is released.
+            handler.cancelled.set()
+            streamThread.join()
+            if not isPooled:
+                self._streamThread = None
+
+        if 'exc' in result:
+            raise result['exc']
+
+    def _isPooled(self):
+        """ Commands draw P4 objects from p4Pool, unless the caller gave us
+            a P4 object of their own.
+        """
+        return self.p4Pool is not None and self.p4PythonObj is None
+
     def _connect(self):
         p4PythonObj = self.p4PythonObj
 
         if p4PythonObj is None:
             p4PythonObj = P4()
+            if self.trackStats is not None:
+                # Has to be set before connecting
+                p4PythonObj.track = 1
             try:
                 p4PythonObj.connect()
                 p4PythonObj.exception_level = 0
@@ -501,12 +1284,19 @@ class _P4OOP4Python(_P4OOConnection):
 
         self._ownP4PythonObj = None
         self.p4PythonObj = None
+
+        executor = getattr(self, '_executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+            self._executor = None
         return True
 
     def _initialize(self):
         configFile = os.path.dirname(__file__) + "/p4Config.yml"
 
-        self._p4PythonSchema = _P4OOP4PythonSchema(configFile=configFile)
+        # Parsed once per process and shared across all connections
+        self._p4PythonSchema = _P4OOP4PythonSchema.getCachedSchema(
+            configFile=configFile)
         return True
 
     def __del__(self):
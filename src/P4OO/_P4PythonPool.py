@@ -0,0 +1,268 @@
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._P4PythonPool.py
+#
+######################################################################
+
+"""
+Thread-safe pool of connected P4Python objects.
+
+A single P4Python connection can only run one command at a time, and
+_P4OOP4Python adjusts settings on it (input, client, tagged, ...) around
+each command.  A _P4OOP4PythonPool hands each command its own connected
+P4 object instead, so P4OO objects sharing one pool can be used from
+many threads at once:
+
+    p4Pool = _P4OOP4PythonPool(maxSize=8, port="p4-server:1666",
+                               user="perforce_user")
+    changeSet = P4OOChangeSet(p4Pool=p4Pool).query(status="pending")
+"""
+
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+# P4Python
+from P4 import P4, P4Exception
+
+from P4OO.Exceptions import P4OOFatal, P4Fatal
+
+
+class _P4OOP4PythonPool():
+    """ Bounded pool of connected P4Python objects with checkout/checkin,
+        health checks and idle eviction.
+
+        Args:
+            maxSize (int): Maximum number of P4 objects, checked out or idle
+            maxIdle (float): Seconds an idle P4 object is kept before it is
+                disconnected and dropped
+            pingAfter (float): Idle seconds after which a P4 object is
+                checked with `p4 info -s` before being handed out again
+            p4Factory (callable): Returns a new, unconnected P4 object.
+                Defaults to P4() configured with p4Settings
+            p4Settings: P4 attributes (port, user, client, ...) applied to
+                each new P4 object from the default factory
+    """
+
+    # P4 settings restored at checkin, so nothing one checkout changes
+    # leaks into the next
+    _ISOLATED_SETTINGS = ('client', 'user', 'tagged', 'exception_level',
+                          'handler', 'maxresults', 'maxscanrows',
+                          'maxlocktime')
+
+    def __init__(self, maxSize=4, maxIdle=300, pingAfter=60, p4Factory=None,
+                 **p4Settings):
+        self.maxSize = maxSize
+        self.maxIdle = maxIdle
+        self.pingAfter = pingAfter
+        self.p4Factory = p4Factory
+        self.p4Settings = p4Settings
+
+        self._lock = threading.Condition()
+        self._idle = []         # [(p4PythonObj, lastUsed, settings)], LIFO
+        self._checkedOut = {}   # id(p4PythonObj) --> settings
+        self._reserved = 0      # checkouts still checking or connecting
+        self._closed = False
+        self._executor = None
+        self._asyncSlots = weakref.WeakKeyDictionary()  # loop --> Semaphore
+
+    def checkout(self, timeout=None):
+        """ Return a connected P4 object for the exclusive use of the
+            caller until it is handed back with checkin().
+
+            Blocks for up to timeout seconds (forever if None) when maxSize
+            P4 objects are already checked out.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise P4OOFatal("Connection pool is closed")
+
+                self._evictIdle()
+
+                # Our slot stays reserved while we check or connect a P4
+                # object outside the lock
+                if self._idle:
+                    (p4PythonObj, lastUsed, settings) = self._idle.pop()
+                    self._reserved += 1
+                    break
+
+                if len(self._checkedOut) + self._reserved < self.maxSize:
+                    p4PythonObj = lastUsed = settings = None
+                    self._reserved += 1
+                    break
+
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise P4OOFatal("Timed out waiting for a pooled "
+                                        "connection")
+                self._lock.wait(remaining)
+
+        if p4PythonObj is not None \
+          and self._isHealthy(p4PythonObj, lastUsed):
+            with self._lock:
+                self._reserved -= 1
+                self._checkedOut[id(p4PythonObj)] = settings
+            return p4PythonObj
+
+        # Either a new slot, or we're replacing a dead connection
+        if p4PythonObj is not None:
+            self._dispose(p4PythonObj)
+
+        try:
+            p4PythonObj = self._newConnection()
+        except BaseException:
+            with self._lock:
+                self._reserved -= 1
+                self._lock.notify()
+            raise
+
+        with self._lock:
+            self._reserved -= 1
+            self._checkedOut[id(p4PythonObj)] = {
+                setting: getattr(p4PythonObj, setting)
+                for setting in self._ISOLATED_SETTINGS}
+        return p4PythonObj
+
+    def checkin(self, p4PythonObj):
+        """ Hand a P4 object from checkout() back to the pool, resetting
+            any settings changed while it was checked out.
+        """
+
+        with self._lock:
+            settings = self._checkedOut.pop(id(p4PythonObj))
+
+            for (setting, value) in settings.items():
+                if getattr(p4PythonObj, setting) != value:
+                    setattr(p4PythonObj, setting, value)
+
+            if self._closed:
+                self._dispose(p4PythonObj)
+            else:
+                self._idle.append((p4PythonObj, time.monotonic(), settings))
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """ Context manager form of checkout()/checkin() """
+
+        p4PythonObj = self.checkout(timeout=timeout)
+        try:
+            yield p4PythonObj
+        finally:
+            self.checkin(p4PythonObj)
+
+    def getExecutor(self):
+        """ Return the thread pool the async API runs this pool's commands
+            on.  It has one worker per pooled connection, so waiting
+            callers queue there rather than holding threads.
+        """
+
+        with self._lock:
+            if self._closed:
+                raise P4OOFatal("Connection pool is closed")
+
+            if self._executor is None:
+                # Imported here, it's slow to import and rarely needed
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.maxSize, thread_name_prefix="P4OO pool")
+            return self._executor
+
+    def getAsyncSlots(self):
+        """ Return the asyncio.Semaphore, for the running event loop, the
+            async API acquires before it takes one of our P4 objects.  It
+            has one slot per pooled connection, so the executor's workers
+            don't wait in checkout() while callers are awaiting.
+        """
+
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._closed:
+                raise P4OOFatal("Connection pool is closed")
+
+            asyncSlots = self._asyncSlots.get(loop)
+            if asyncSlots is None:
+                asyncSlots = asyncio.Semaphore(self.maxSize)
+                self._asyncSlots[loop] = asyncSlots
+            return asyncSlots
+
+    def close(self):
+        """ Disconnect idle P4 objects now, and the rest as they are
+            checked back in.
+        """
+
+        with self._lock:
+            self._closed = True
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            for (p4PythonObj, lastUsed, settings) in self._idle:
+                self._dispose(p4PythonObj)
+            self._idle = []
+            self._lock.notify_all()
+
+    def stats(self):
+        """ Return a dict of current pool usage """
+
+        with self._lock:
+            return {'idle': len(self._idle),
+                    'checkedOut': len(self._checkedOut) + self._reserved,
+                    'maxSize': self.maxSize}
+
+    ######################################################################
+    # Internal Methods
+    #
+    def _newConnection(self):
+        if self.p4Factory is not None:
+            p4PythonObj = self.p4Factory()
+        else:
+            p4PythonObj = P4()
+            for (setting, value) in self.p4Settings.items():
+                setattr(p4PythonObj, setting, value)
+
+        try:
+            if not p4PythonObj.connected():
+                p4PythonObj.connect()
+            p4PythonObj.exception_level = 0
+        except P4Exception as exc:
+            raise P4Fatal("P4 Connection Failed") from exc
+
+        return p4PythonObj
+
+    def _isHealthy(self, p4PythonObj, lastUsed):
+        try:
+            if not p4PythonObj.connected():
+                return False
+
+            if time.monotonic() - lastUsed > self.pingAfter:
+                p4PythonObj.run("info", "-s")
+                if p4PythonObj.errors:
+                    return False
+        except P4Exception:
+            return False
+
+        return True
+
+    def _evictIdle(self):
+        # Called with the lock held.  _idle is oldest first.
+        cutoff = time.monotonic() - self.maxIdle
+        while self._idle and self._idle[0][1] < cutoff:
+            self._dispose(self._idle.pop(0)[0])
+
+    @staticmethod
+    def _dispose(p4PythonObj):
+        try:
+            if p4PythonObj.connected():
+                p4PythonObj.disconnect()
+        except P4Exception:
+            pass
@@ -9,21 +9,117 @@
 Provide a set of objects that allow for interaction and translation
 between P4Python output and our internally maintained Python-friendly
 versions of Spec objects and Command Output.
+
+Parsing p4Config.yml with PyYAML dominates the startup of short-lived
+scripts like triggers, so it can be compiled ahead of time into a
+marshal artifact next to it, which is loaded instead (without importing
+yaml) for as long as it matches the YAML file:
+
+    python -m P4OO._P4PythonSchema [p4Config.yml]
 """
 
+import marshal
 import os
 import re
+import sys
+import threading
+import zlib
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 
-import yaml
 from P4OO._SpecObj import _P4OOSpecObj
 from P4OO.Exceptions import P4OOFatal
 
 
+# Process-wide cache of compiled schemas shared by all connections.
+# { configFile: (mtime_ns, _P4OOP4PythonSchema) }
+_SCHEMA_CACHE = {}
+_SCHEMA_CACHE_LOCK = threading.Lock()
+
+# Compiled artifacts are (_ARTIFACT_VERSION, YAML size, YAML crc32, data),
+# written with a marshal format every supported Python can read
+_ARTIFACT_VERSION = 1
+_MARSHAL_VERSION = 4
+
+
+def _artifactFile(configFile):
+    return os.path.splitext(configFile)[0] + ".marshal"
+
+
+def compileSchema(configFile=None, artifactFile=None):
+    """ Compile configFile (default: our p4Config.yml) into a marshal
+        artifact (default: alongside it), and return the artifact's path.
+    """
+
+    import yaml
+
+    if configFile is None:
+        configFile = os.path.dirname(__file__) + "/p4Config.yml"
+    if artifactFile is None:
+        artifactFile = _artifactFile(configFile)
+
+    with open(configFile, 'rb') as stream:
+        source = stream.read()
+    data = yaml.load(source, Loader=yaml.Loader)
+
+    with open(artifactFile, 'wb') as stream:
+        marshal.dump((_ARTIFACT_VERSION, len(source), zlib.crc32(source),
+                      data), stream, _MARSHAL_VERSION)
+    return artifactFile
+
+
+def _loadCompiled(configFile, source):
+    """ Return the config data from configFile's compiled artifact, or
+        None if there isn't one compiled from this source.
+    """
+
+    try:
+        with open(_artifactFile(configFile), 'rb') as stream:
+            (version, size, crc, data) = marshal.load(stream)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    if version != _ARTIFACT_VERSION or size != len(source) \
+      or crc != zlib.crc32(source):
+        return None
+    return data
+
+
+def _freezeConfig(data, memo=None):
+    """ Recursively convert parsed YAML into read-only equivalents
+        (MappingProxyType for dicts, tuples for lists) so a cached schema
+        can be shared safely between connections.
+
+        YAML aliases (e.g. changelist: *change) stay aliased.
+    """
+
+    if memo is None:
+        memo = {}
+
+    if id(data) in memo:
+        return memo[id(data)]
+
+    if isinstance(data, dict):
+        frozen = MappingProxyType({key: _freezeConfig(value, memo)
+                                   for (key, value) in data.items()})
+    elif isinstance(data, list):
+        frozen = tuple(_freezeConfig(value, memo) for value in data)
+    else:
+        return data
+
+    memo[id(data)] = frozen
+    return frozen
+
+
 class _P4OOP4PythonSchema():
     """ Class to abstract the contents of our p4Config.yml file,
         separate from the execution of the p4 commands done in
         P4OO._P4Python._P4OOP4Python
+
+        Constructing a schema always parses the config file.  Connections
+        should use getCachedSchema() instead, which parses each config
+        file once per process and shares the (read-only) result.
     """
 
     def __init__(self, configFile=None):
@@ -33,17 +129,57 @@ class _P4OOP4PythonSchema():
 
         self.schemaCommands = self.readSchema(self.configFile)
 
+    @classmethod
+    def getCachedSchema(cls, configFile=None):
+        """ Return the process-wide shared schema for configFile, parsing
+            it only if it hasn't been seen yet or its mtime has changed.
+        """
+
+        if configFile is None:
+            configFile = os.path.dirname(__file__) + "/p4Config.yml"
+
+        mtime = os.stat(configFile).st_mtime_ns
+
+        cached = _SCHEMA_CACHE.get(configFile)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with _SCHEMA_CACHE_LOCK:
+            # Another thread may have beaten us to it
+            cached = _SCHEMA_CACHE.get(configFile)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+            schema = cls(configFile=configFile)
+            _SCHEMA_CACHE[configFile] = (mtime, schema)
+
+        return schema
+
+    @staticmethod
+    def clearSchemaCache():
+        """ Forget all cached schemas.  Mostly useful for testing. """
+
+        with _SCHEMA_CACHE_LOCK:
+            _SCHEMA_CACHE.clear()
+
     def readSchema(self, configFile):
-        """ Read in our YAML p4Config.yml file and return a dict of
-            supported commands as _P4OOP4PythonCommand objects
+        """ Read in our YAML p4Config.yml file (or its up to date
+            compiled artifact) and return a dict of supported commands as
+            _P4OOP4PythonCommand objects
         """
 
-        with open(configFile, 'r', encoding="utf-8") as stream:
-            data = yaml.load(stream, Loader=yaml.Loader)
+        with open(configFile, 'rb') as stream:
+            source = stream.read()
 
+        data = _loadCompiled(configFile, source)
+        if data is None:
+            import yaml
+            data = yaml.load(source, Loader=yaml.Loader)
+
+        commands = _freezeConfig(data["COMMANDS"])
         return {command: _P4OOP4PythonCommand(command=command,
                                               commandDict=commandDict)
-                for (command, commandDict) in data["COMMANDS"].items()}
+                for (command, commandDict) in commands.items()}
 
     def getCmd(self, cmdName):
         """ Return the schema definition for a given command
@@ -67,12 +203,87 @@ class _P4OOP4PythonSchema():
         raise P4OOFatal("Unsupported Spec type %s" % specType)
 
 
+# P4 date fields that are all digits are epoch seconds, otherwise they
+# are formatted as '%Y/%m/%d %H:%M:%S'
+_EPOCH_RE = re.compile(r'^\d+$')
+_P4DATE_RE = re.compile(r'^(\d{4})/(\d\d)/(\d\d) (\d\d):(\d\d):(\d\d)$')
+
+
+@lru_cache(maxsize=8192)
+def _parseP4Date(p4Date):
+    """ Convert a P4 date string to a datetime.
+
+        Records from the same query tend to share second-resolution
+        timestamps, so results are memoized.  datetimes are immutable,
+        so sharing them between specs is safe.
+    """
+
+    if _EPOCH_RE.match(p4Date):
+        # some query commands return epoch seconds output
+        # (e.g. clients)
+        return datetime.fromtimestamp(float(p4Date))
+
+    # spec commands return formatted date strings
+    # local to the server, not the client
+    m = _P4DATE_RE.match(p4Date)
+    if m:
+        return datetime(*map(int, m.groups()))
+
+    # Let strptime sort out (or complain about) anything unusual
+    return datetime.strptime(p4Date, '%Y/%m/%d %H:%M:%S')
+
+
+def _compileTranslator(specAttrsDict, dateAttrsDict):
+    """ Compile specAttrs/dateAttrs config mappings into the tuples used
+        by _translate()
+    """
+
+    specAttrs = tuple(
+        (specAttr, p4SpecAttr,
+         int if p4SpecAttr.lower() == "change" else None)
+        for (specAttr, p4SpecAttr) in specAttrsDict.items())
+
+    dateAttrs = tuple(dateAttrsDict.items())
+
+    return (specAttrs, dateAttrs)
+
+
+def _translate(translator, p4OutputSpec):
+    """ Apply a compiled translator to one P4Python dict """
+
+    (specAttrs, dateAttrs) = translator
+
+    pythonSpec = {}
+
+    # Selectively copy p4OutputSpec attrs to mutable spec
+    for (specAttr, p4SpecAttr, converter) in specAttrs:
+        if p4SpecAttr in p4OutputSpec:
+            if converter is None:
+                pythonSpec[specAttr] = p4OutputSpec[p4SpecAttr]
+            else:
+                pythonSpec[specAttr] = converter(p4OutputSpec[p4SpecAttr])
+
+    # Reformat date strings in Perforce objects to be more useful
+    # datetime objects.
+    # Date attrs cannot be modified, so don't need to be selectively copied
+    for (dateAttr, p4DateAttr) in dateAttrs:
+        if p4DateAttr in p4OutputSpec:
+            pythonSpec[dateAttr] = _parseP4Date(p4OutputSpec[p4DateAttr])
+
+    return pythonSpec
+
+
 class _P4OOP4PythonCommand():
 
     def __init__(self, command=None, commandDict=None):
         self.command = command
         self.commandDict = commandDict
 
+        # Compiled lazily by getQueryPlan() and getSpecTranslator()
+        self._queryPlan = None
+        self._specTranslator = None
+        self._outputTranslator = None
+
     def isSpecCommand(self):
         if 'specCmd' in self.commandDict:
             return True
@@ -123,6 +334,54 @@ class _P4OOP4PythonCommand():
 
         return self.commandDict['specAttrs'][pyIdAttr]
 
+    def getSpecTranslator(self):
+        """ Return the compiled (specAttrs, dateAttrs) translation tables
+            for this spec command, building them on first use.
+
+            specAttrs is a tuple of (pyAttr, p4Attr, converter) and
+            dateAttrs a tuple of (pyAttr, p4Attr), both in schema order.
+        """
+
+        specTranslator = self._specTranslator
+        if specTranslator is not None:
+            return specTranslator
+
+        if not self.isSpecCommand():
+            raise P4OOFatal("Unsupported Spec type %s" % self.command)
+
+        specTranslator = self._specTranslator = _compileTranslator(
+            self.commandDict.get('specAttrs', {}),
+            self.commandDict.get('dateAttrs', {}))
+        return specTranslator
+
+    def getOutputTranslator(self):
+        """ Return compiled translation tables for this query command's
+            output, or None if its output uses the same attribute names
+            as the spec itself (see translateOutputToPython).
+        """
+
+        outputTranslator = self._outputTranslator
+        if outputTranslator is not None:
+            return outputTranslator or None
+
+        outputDict = self.commandDict.get('output', {})
+        if 'specAttrs' in outputDict or 'dateAttrs' in outputDict:
+            outputTranslator = _compileTranslator(
+                outputDict.get('specAttrs', {}),
+                outputDict.get('dateAttrs', {}))
+        else:
+            outputTranslator = ()
+
+        self._outputTranslator = outputTranslator
+        return outputTranslator or None
+
+    def getBatchRead(self):
+        """ Return the batchRead config for this spec command, describing
+            a query that can read spec attributes for many objects at once.
+        """
+
+        return self.commandDict.get('batchRead')
+
     def translateP4SpecToPython(self, p4OutputSpec):
         """ Translate a P4Python provided dictionary into something more
             Python-friendly.
@@ -135,41 +394,23 @@ class _P4OOP4PythonCommand():
             consistent names, and we'll do any necessary type conversion.
         """
 
-        if not self.isSpecCommand():
-            raise P4OOFatal("Unsupported Spec type %s" % self.command)
+        return _translate(self.getSpecTranslator(), p4OutputSpec)
 
-        pythonSpec = {}
+    def translateOutputToPython(self, p4Output, specCmdObj):
+        """ Translate one record of this query command's output into spec
+            attributes for specCmdObj's spec type.
 
-        # Selectively copy p4OutputSpec attrs to mutable spec
-        if 'specAttrs' in self.commandDict:
-            for specAttr in self.commandDict['specAttrs']:
-                p4SpecAttr = self.commandDict['specAttrs'][specAttr]
-                if p4SpecAttr in p4OutputSpec:
-                    if p4SpecAttr == "Change":
-                        pythonSpec[specAttr] = int(p4OutputSpec[p4SpecAttr])
-                    else:
-                        pythonSpec[specAttr] = p4OutputSpec[p4SpecAttr]
-
-        # Reformat date strings in Perforce objects to be more useful
-        # datetime objects.
-        # Date attrs cannot be modified, so don't need to be selectively copied
-        if 'dateAttrs' in self.commandDict:
-            for dateAttr in self.commandDict['dateAttrs']:
-                p4DateAttr = self.commandDict['dateAttrs'][dateAttr]
-
-                if p4DateAttr in p4OutputSpec:
-                    if re.match(r'^\d+$', p4OutputSpec[p4DateAttr]):
-                        # some query commands return epoch seconds output
-                        # (e.g. clients)
-                        pythonSpec[dateAttr] = datetime.fromtimestamp(
-                            float(p4OutputSpec[p4DateAttr]))
-                    else:
-                        # spec commands return formatted date strings
-                        # local to the server, not the client
-                        pythonSpec[dateAttr] = datetime.strptime(
-                            p4OutputSpec[p4DateAttr], '%Y/%m/%d %H:%M:%S')
+            Query output often names attributes differently than the spec
+            does (e.g. 'changes' reports 'user' and 'time' where 'change -o'
+            has 'User' and 'Date'), so an output.specAttrs/dateAttrs
+            mapping in the config takes precedence over the spec's own.
+        """
 
-        return pythonSpec
+        outputTranslator = self.getOutputTranslator()
+        if outputTranslator is None:
+            return specCmdObj.translateP4SpecToPython(p4Output)
+
+        return _translate(outputTranslator, p4Output)
 
     def translatePySpecToP4(self, pythonSpec, p4SpecDict):
         """ Copy any modified non-date attributes to the Perforce-generated
@@ -179,10 +420,10 @@ class _P4OOP4PythonCommand():
         if p4SpecDict is None:
             p4SpecDict = {}
 
-        if pythonSpec is not None and 'specAttrs' in self.commandDict:
+        if pythonSpec is not None:
+            (specAttrs, dateAttrs) = self.getSpecTranslator()
 
-            for (specAttr, p4SpecAttr) \
-              in self.commandDict['specAttrs'].items():
+            for (specAttr, p4SpecAttr, converter) in specAttrs:
                 if specAttr in pythonSpec:
                     if pythonSpec[specAttr] is None:
                         if p4SpecAttr in p4SpecDict:
@@ -204,6 +445,36 @@ class _P4OOP4PythonCommand():
 
         return None
 
+    def getQueryPlan(self):
+        """ Return the compiled { filterKey: _P4OOP4PythonOption } plan
+            for this command, building it on first use.
+
+            configOptions take precedence over queryOptions of the same
+            name, matching the lookup order validateQuery always had.
+        """
+
+        queryPlan = self._queryPlan
+        if queryPlan is not None:
+            return queryPlan
+
+        allowedFilters = self.getAllowedFilters()
+        if allowedFilters is None:
+            raise P4OOFatal("Querying not supported for Command "
+                            + self.command)
+
+        queryPlan = {}
+        for (filterKey, optionConfig) in allowedFilters.items():
+            queryPlan[filterKey] = _P4OOP4PythonOption(optionConfig,
+                                                       isConfigOpt=False)
+
+        for (filterKey, optionConfig) in (self.getAllowedConfigs()
+                                          or {}).items():
+            queryPlan[filterKey] = _P4OOP4PythonOption(optionConfig,
+                                                       isConfigOpt=True)
+
+        self._queryPlan = queryPlan
+        return queryPlan
+
     def validateQuery(self, queryDict):
         """ Take a dict of name=[list] args and separate out p4 config
             arguments from command arguments.
@@ -214,13 +485,12 @@ class _P4OOP4PythonCommand():
             and commandline arguments.
         """
 
-        allowedFilters = self.getAllowedFilters()
-        if allowedFilters is None:
-            raise P4OOFatal("Querying not supported for Command "
-                            + self.command)
-
-        allowedConfigs = self.getAllowedConfigs() or {}
+        queryPlan = self.getQueryPlan()
 
+        # Options with a multiplicity go at the front of the commandline,
+        # each one ahead of those before it.  Collect them separately and
+        # stitch them together at the end rather than inserting at 0.
+        frontArgs = []
         execArgs = []
         p4Config = {}
 
@@ -230,71 +500,50 @@ class _P4OOP4PythonCommand():
             if queryValue is None:
                 continue
 
-
-            lcFilterKey = origFilterKey.lower()
-
             # Separate global configuration options from query options
-            optionConfig = None
-            isConfigOpt = False
-            if lcFilterKey in allowedConfigs:
-                optionConfig = allowedConfigs[lcFilterKey]
-                isConfigOpt = True
-            elif lcFilterKey in allowedFilters:
-                optionConfig = allowedFilters[lcFilterKey]
-                isConfigOpt = False
-            else:
+            option = queryPlan.get(origFilterKey.lower())
+            if option is None:
                 raise P4OOFatal("Invalid Filter key: " + origFilterKey)
 
-            optionArgs = []
             if isinstance(queryValue, (_P4OOSpecObj, int, str)):
-                optionArgs.append(queryValue)
+                optionArgs = (queryValue,)
             else:
-                optionArgs.extend(queryValue)
+                optionArgs = queryValue
 
             # Check option argument types, and replace option args with
             # IDs for P4::OO objects passed in.
             # Take the opportunity to expand any Set objects we find.
-            cmdOptionArgs = self.getOptionArgs(optionConfig=optionConfig,
-                                               optionArgs=optionArgs,
-                                               origFilterKey=origFilterKey)
+            cmdOptionArgs = option.buildArgs(optionArgs, origFilterKey)
 
-#            print("optionConfig: ", optionConfig)
-            # defined cmdline options go at the front
-            if 'multiplicity' in optionConfig:
-
-                if len(cmdOptionArgs) != optionConfig['multiplicity']:
-                    raise P4OOFatal("Filter key: %s accepts %d arguments. %d provided.\n"
-                                    % (origFilterKey,
-                                       optionConfig['multiplicity'],
-                                       len(cmdOptionArgs)))
-
-                if isConfigOpt:
-                    p4Config[optionConfig['option']] = cmdOptionArgs[0]
-                    continue
-
-                if optionConfig['multiplicity'] == 0:
-                    execArgs.insert(0, optionConfig['option'])
-                    continue
-
-                if optionConfig['multiplicity'] == 1:
-                    if 'bundledArgs' in optionConfig and optionConfig['bundledArgs'] is not None:
-                        # join the option and its args into one string  ala "-j8"
-                        bundledArg = optionConfig['option'] + "".join(cmdOptionArgs)
-                        execArgs.insert(0, bundledArg)
-                        continue
+            multiplicity = option.multiplicity
+            if multiplicity is None:
+                if option.option is not None:
 # TODO - ignoring p4Config here because it won't be needed... I think
+                    execArgs.append(option.option)
 
-                # "unshift" one at a time in reverse order
-                for arg in reversed(cmdOptionArgs):
-                    execArgs.insert(0, arg)
-                execArgs.insert(0, optionConfig['option'])
+                execArgs.extend(cmdOptionArgs)
                 continue
 
-            if 'option' in optionConfig:
+            # defined cmdline options go at the front
+            if len(cmdOptionArgs) != multiplicity:
+                raise P4OOFatal("Filter key: %s accepts %d arguments. %d provided.\n"
+                                % (origFilterKey, multiplicity,
+                                   len(cmdOptionArgs)))
+
+            if option.isConfigOpt:
+                p4Config[option.option] = cmdOptionArgs[0]
+            elif multiplicity == 0:
+                frontArgs.append([option.option])
+            elif multiplicity == 1 and option.bundledArgs:
+                # join the option and its args into one string  ala "-j8"
+                frontArgs.append([option.option + "".join(cmdOptionArgs)])
 # TODO - ignoring p4Config here because it won't be needed... I think
-                execArgs.append(optionConfig['option'])
+            else:
+                frontArgs.append([option.option] + cmdOptionArgs)
 
-            execArgs.extend(cmdOptionArgs)
+        if frontArgs:
+            frontArgs.reverse()
+            execArgs = [arg for args in frontArgs for arg in args] + execArgs
 
         return (execArgs, p4Config)
 
@@ -304,92 +553,153 @@ class _P4OOP4PythonCommand():
             valid types for the option according to the schema config.
         """
 
-        cmdOptionArgs = []
         if optionConfig is None:
-            return cmdOptionArgs
+            return []
 
-#        'queryOptions': { 'user': { 'type': [ 'string',
-#                                              'P4OO.User.User',
-#                                            ],
-#                                    'option': '-u',
-#                                    'multiplicity': 1,
-#                                  }
+        option = _P4OOP4PythonOption(optionConfig)
+        return option.buildArgs(optionArgs, origFilterKey)
 
-        for optionArg in optionArgs:
-            matchedType = False
 
-            if 'type' not in optionConfig:
-                matchedType = True
-                continue
+    def getP4ooTypeOptionArgs(self, checkType, optionArg):
+        """ If an option type that might be a P4OO type, do the following:
+             - resolve the appropriate P4OO class (see _resolveP4ooType)
+             - validate that the type matches the expected type
+             - return the enumeration of the optionArg's objects
+        """
+
+        (checkClass, argKind) = _resolveP4ooType(checkType)
+
+        if isinstance(optionArg, checkClass):
+            return _expandOptionArg(argKind, optionArg)
+
+        return None
+
+
+# Argument kinds for compiled type checks
+_ARG_PLAIN, _ARG_SPEC, _ARG_SET = range(3)
 
-            for checkType in optionConfig['type']:
+# { checkType: (p4ooClass, argKind) } for P4OO types named in the schema,
+# shared by every command so each P4OO module is imported only once.
+_P4OO_TYPE_CACHE = {}
 
+
+def _resolveP4ooType(checkType):
+    """ Map a P4OO schema type name (e.g. "User" or "FileSet") to the
+        class to check against and how to expand matching arguments.
+    """
+
+    resolved = _P4OO_TYPE_CACHE.get(checkType)
+    if resolved is not None:
+        return resolved
+
+    # First, break down setType/SpecType from the checkType to perform the import
+    m = re.match(r'^(.+)Set$', checkType)
+    if m:
+        specType = m.group(1)
+        setType = checkType
+    else:
+        specType = checkType
+        setType = checkType + "Set"
+
+    # Second, import specType and SetType
+    specModule = __import__("P4OO." + specType,
+                            globals(), locals(),
+                            ["P4OO" + specType, "P4OO" + setType], 0)
+
+    specClass = getattr(specModule, "P4OO" + specType)
+    setClass = getattr(specModule, "P4OO" + setType)
+
+    if checkType == setType:
+        # Special Set expansion...this gets weird, eh?
+        resolved = (setClass, _ARG_SET)
+    else:
+        resolved = (specClass, _ARG_SPEC)
+
+    _P4OO_TYPE_CACHE[checkType] = resolved
+    return resolved
+
+
+def _expandOptionArg(argKind, optionArg):
+    """ Convert a type-checked argument to its commandline form(s) """
+
+    if argKind == _ARG_SET:
+        return optionArg.listObjectIDs()
+
+    if argKind == _ARG_SPEC:
+        # Wrap it in a list just to return something consistent
+        return [optionArg._uniqueID()]
+
+    return [optionArg]
+
+
+class _P4OOP4PythonOption():
+    """ Compiled form of a single queryOptions/configOptions entry, e.g.
+
+            user: { type: [ string, User ], option: -u, multiplicity: 1 }
+
+        The type list is resolved lazily into (class, argKind) checks so
+        P4OO modules aren't imported until an option is actually used.
+    """
+
+    def __init__(self, optionConfig, isConfigOpt=False):
+        self.optionConfig = optionConfig
+        self.isConfigOpt = isConfigOpt
+        self.option = optionConfig.get('option')
+        self.multiplicity = optionConfig.get('multiplicity')
+        self.bundledArgs = optionConfig.get('bundledArgs') is not None
+        self.types = optionConfig.get('type')
+        self._typeChecks = None
+
+    def getTypeChecks(self):
+        """ Return a tuple of (class, argKind) pairs in schema order """
+
+        typeChecks = self._typeChecks
+        if typeChecks is None:
+            checks = []
+            for checkType in self.types:
                 if checkType == "string":
-                    if isinstance(optionArg, str):
-                        cmdOptionArgs.append(optionArg)
-                        matchedType = True
-                        break
-                    continue
+                    checks.append((str, _ARG_PLAIN))
+                elif checkType == "integer":
+                    checks.append((int, _ARG_PLAIN))
+                else:
+                    # Must be a P4OO type!
+                    checks.append(_resolveP4ooType(checkType))
+
+            typeChecks = self._typeChecks = tuple(checks)
 
-                if checkType == "integer":
-                    if isinstance(optionArg, int):
+        return typeChecks
+
+    def buildArgs(self, optionArgs, origFilterKey):
+        """ For this option, verify all passed in arguments match valid
+            types according to the schema config, and return them in
+            commandline form.
+        """
+
+        cmdOptionArgs = []
+
+        # Untyped options (flags) don't take arguments
+        if self.types is None:
+            return cmdOptionArgs
+
+        typeChecks = self.getTypeChecks()
+        for optionArg in optionArgs:
+            for (checkClass, argKind) in typeChecks:
+                if isinstance(optionArg, checkClass):
+                    if argKind == _ARG_PLAIN:
                         cmdOptionArgs.append(optionArg)
-                        matchedType = True
-                        break
-                    continue
-
-                # Must be a P4OO type!  To check P4OO types, we need to import.
-                p4ooOptionArgs = self.getP4ooTypeOptionArgs(checkType, optionArg)
-                if p4ooOptionArgs is not None:
-                    cmdOptionArgs.extend(p4ooOptionArgs)
-                    matchedType = True
+                    else:
+                        cmdOptionArgs.extend(_expandOptionArg(argKind,
+                                                              optionArg))
                     break
-
-            if not matchedType:
+            else:
                 # Looped through all types, didn't find a match
                 raise P4OOFatal("Got %r, but filter key '%s'"
                                   % (optionArg, origFilterKey)
                                 + " accepts arguments of only these types: "
-                                + ", ".join(optionConfig['type']))
+                                + ", ".join(self.types))
 
         return cmdOptionArgs
 
 
-    def getP4ooTypeOptionArgs(self, checkType, optionArg):
-        """ If an option type that might be a P4OO type, do the following:
-             - dynamically import the appropriate P4OO module
-             - validate that the type matches the expected type
-             - return the enumeration of the optionArg's objects
-        """
-
-        # First, break down setType/SpecType from the checkType to perform the import
-        m = re.match(r'^(.+)Set$', checkType)
-        if m:
-            specType = m.group(1)
-            setType = checkType
-        else:
-            specType = checkType
-            setType = checkType + "Set"
-
-        # Second, import specType and SetType
-# TODO need to look into this issue
-#        specModule = __import__("P4OO." + specType,
-#                                globals(), locals(),
-#                                ["P4OO" + specType, "P4OO" + setType], -1)
-        specModule = __import__("P4OO." + specType,
-                                globals(), locals(),
-                                ["P4OO" + specType, "P4OO" + setType], 0)
-
-        specClass = getattr(specModule, "P4OO" + specType)
-        setClass = getattr(specModule, "P4OO" + setType)
-
-        # Third, do the actual type check and append optionArgs as appropriate
-        if checkType == setType and isinstance(optionArg, setClass):
-            # Special Set expansion...this gets weird, eh?
-            return optionArg.listObjectIDs()
-
-        if checkType == specType and isinstance(optionArg, specClass):
-            # Wrap it in a list just to return something consistent
-            return [ optionArg._uniqueID() ]
-
-        return None
+if __name__ == '__main__':
+    print("wrote " + compileSchema(*sys.argv[1:2]))
@@ -1 +1,629 @@
-""" This page intentionally left blank. """
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._P4ToDB.py
+#
+######################################################################
+
+"""
+P4OO connection reading from a SQL mirror of Perforce metadata
+
+Modeled after Perforce's P4toDB, which replicates the server's db.*
+tables into a SQL database.  _P4OOP4ToDB answers readSpec and runCommand
+for changes, clients, labels, users, groups and counters from such a
+mirror with indexed lookups, so read-heavy tools never touch the server:
+
+    p4SQLDbh = sqlite3.connect("p4mirror.db")
+    p4Changes = P4OOChangeSet(p4SQLDbh=p4SQLDbh,
+                              p4PythonObj=p4Handle).query(user="alice")
+
+Writes (saveSpec, deleteSpec, setCounter) and anything the mirror can't
+answer go through a _P4OOP4Python connection built from the same
+p4PythonObj/p4Pool instead.
+
+The mirror schema (see createSchema) follows P4toDB's tables:
+
+  change   - one row per changelist.  status is 0 (pending),
+             1 (submitted) or 2 (shelved).  description may be truncated,
+             the full text is in desc if it's there.
+  "desc"   - full change descriptions by descKey.
+  domain   - clients, labels, branches and depots, by type 'c', 'l', 'b'
+             and 'd'.  host and root are the client's Host and Root.
+  view     - client and label View lines, in seq order.  mapflag is 0
+             (include), 1 (exclude, '-') or 2 (overlay, '+').
+  user     - one row per user.  type is 'standard', 'operator' or
+             'service'.
+  "group"  - one row per group membership.  type is 0 (subgroup),
+             1 (user) or 2 (owner), with the group's limits repeated.
+  counters - name and value.
+  label    - the file revisions tagged by each label.
+  have     - the file revisions synced to each client.
+
+Dates are stored as seconds since the epoch.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+
+from P4OO.Exceptions import P4OOFatal
+from P4OO._Connection import _P4OOConnection
+from P4OO._P4Python import _P4OOP4Python
+from P4OO._SpecObj import _P4OOSpecObj
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS change ("
+    " change INTEGER PRIMARY KEY, descKey INTEGER, client TEXT,"
+    " user TEXT, date INTEGER, status INTEGER, type TEXT,"
+    " description TEXT, root TEXT)",
+    "CREATE INDEX IF NOT EXISTS change_user ON change (user, change)",
+    "CREATE INDEX IF NOT EXISTS change_client ON change (client, change)",
+    "CREATE INDEX IF NOT EXISTS change_status ON change (status, change)",
+
+    "CREATE TABLE IF NOT EXISTS \"desc\" ("
+    " descKey INTEGER PRIMARY KEY, description TEXT)",
+
+    "CREATE TABLE IF NOT EXISTS domain ("
+    " name TEXT PRIMARY KEY, type TEXT NOT NULL, host TEXT, root TEXT,"
+    " owner TEXT, updateDate INTEGER, accessDate INTEGER, options TEXT,"
+    " submitOptions TEXT, lineEnd TEXT, revision TEXT, description TEXT)",
+    "CREATE INDEX IF NOT EXISTS domain_type ON domain (type, name)",
+    "CREATE INDEX IF NOT EXISTS domain_owner ON domain (type, owner, name)",
+
+    "CREATE TABLE IF NOT EXISTS view ("
+    " name TEXT NOT NULL, seq INTEGER NOT NULL, mapFlag INTEGER,"
+    " viewFile TEXT, depotFile TEXT, PRIMARY KEY (name, seq))",
+
+    "CREATE TABLE IF NOT EXISTS user ("
+    " user TEXT PRIMARY KEY, email TEXT, jobView TEXT, updateDate INTEGER,"
+    " accessDate INTEGER, fullName TEXT, type TEXT)",
+
+    "CREATE TABLE IF NOT EXISTS \"group\" ("
+    " user TEXT NOT NULL, \"group\" TEXT NOT NULL, type INTEGER NOT NULL,"
+    " maxResults TEXT, maxScanRows TEXT, maxLockTime TEXT,"
+    " maxOpenFiles TEXT, timeout TEXT, passwordTimeout TEXT,"
+    " PRIMARY KEY (\"group\", type, user))",
+    "CREATE INDEX IF NOT EXISTS group_user ON \"group\" (user, type)",
+
+    "CREATE TABLE IF NOT EXISTS counters ("
+    " name TEXT PRIMARY KEY, value TEXT)",
+
+    "CREATE TABLE IF NOT EXISTS label ("
+    " name TEXT NOT NULL, depotFile TEXT NOT NULL, haveRev INTEGER,"
+    " PRIMARY KEY (name, depotFile))",
+
+    "CREATE TABLE IF NOT EXISTS have ("
+    " clientFile TEXT PRIMARY KEY, depotFile TEXT, haveRev INTEGER,"
+    " type INTEGER, time INTEGER)",
+)
+
+_CHANGE_STATUS = ('pending', 'submitted', 'shelved')
+_CHANGE_DESC = "COALESCE(\"desc\".description, change.description)"
+_GROUP_SUBGROUP, _GROUP_USER, _GROUP_OWNER = (0, 1, 2)
+_MAP_PREFIX = ('', '-', '+')
+
+# //...@M, //...@=M, //...@N,@M or just @N,@M: limited by change number only
+_CHANGE_RANGE_RE = re.compile(r'^(?://\.\.\.)?@(=?)(\d+)(?:,@?(\d+))?$')
+
+
+def _p4Date(epoch):
+    """ Format epoch seconds the way P4Python reports spec dates """
+    if epoch is None:
+        return None
+    return time.strftime("%Y/%m/%d %H:%M:%S", time.localtime(epoch))
+
+
+def _epochStr(epoch):
+    """ Format epoch seconds the way P4Python reports query output times """
+    if epoch is None:
+        return None
+    return str(epoch)
+
+
+def _dropNone(record):
+    """ P4Python leaves out attributes that aren't set """
+    return {key: value for (key, value) in record.items() if value is not None}
+
+
+def _globFromWildcard(p4Wildcard):
+    """ Translate a Perforce '*'/'...' name pattern into SQLite GLOB """
+    escaped = re.sub(r'([\[\]?])', r'[\1]', p4Wildcard)
+    return escaped.replace("...", "*")
+
+
+@dataclass
+class _P4OOP4ToDB(_P4OOConnection):
+    """ _P4OOConnection reading specs and query output from p4SQLDbh """
+
+    p4SQLDbh: object = field(default=None, compare=False, repr=False)
+
+    def __post_init__(self):
+        self._p4PythonSchema = None
+        self._p4PythonConn = None
+
+    @staticmethod
+    def createSchema(p4SQLDbh):
+        """ Create any missing mirror tables and indexes in p4SQLDbh """
+
+        with p4SQLDbh:
+            for statement in _SCHEMA:
+                p4SQLDbh.execute(statement)
+
+    def readCounter(self, counterName):
+        """ Read the named counter from the mirror and return the value. """
+
+        row = self._fetchAll("SELECT value FROM counters WHERE name = ?",
+                             (counterName,))
+        # Perforce reports unset counters as 0
+        value = row[0][0] if row else "0"
+        try:
+            return int(value)
+        except ValueError:
+            return value
+
+    def setCounter(self, counterName, newValue):
+        return self._getP4PythonConn().setCounter(counterName, newValue)
+
+    def refreshSpec(self, specObj):
+        """ Clear the cached objects and modifiedSpec and re-read spec
+            from the mirror.
+
+            Any changes made via _setSpecAttr will be lost!
+        """
+
+        specObj._p4SpecObj = None
+        specObj._modifiedSpec = None
+        specObj._hydratedAttrs = None
+        specObj._hydrationGroup = None
+        specObj._rawOutput = None
+        self.readSpec(specObj)
+
+    def readSpec(self, specObj):
+        """ Load specObj's spec from the mirror, doing the same data
+            conversions as _P4OOP4Python.readSpec.  Spec types the mirror
+            doesn't hold are read from Perforce.
+        """
+
+        specType = specObj._SPECOBJ_TYPE
+        specID = specObj.id
+
+        p4SpecReader = getattr(self, "_read_" + specType + "_spec", None)
+        if p4SpecReader is None:
+            return self._getP4PythonConn().readSpec(specObj)
+
+        self._initialize()
+        specCmdObj = self._p4PythonSchema.getSpecCmd(specType=specType)
+
+        p4SpecObj = specObj._p4SpecObj
+        if p4SpecObj is None:
+            if specID is None:
+                modifiedSpec = specObj._modifiedSpec
+                idAttr = specCmdObj.getPyIdAttribute()
+                if modifiedSpec is not None and idAttr in modifiedSpec:
+                    specID = specObj.id = modifiedSpec[idAttr]
+                else:
+                    raise P4OOFatal("Cannot identify %s object" %
+                                    (specType,))
+
+            p4SpecObj = p4SpecReader(specID)
+            if p4SpecObj is None:
+                raise P4OOFatal("%s %s not found in mirror" %
+                                (specType, specID))
+            specObj._p4SpecObj = p4SpecObj
+
+        return self._getP4PythonConn()._generateModifiedSpec(
+            specCmdObj, specObj, dict(p4SpecObj))
+
+    def saveSpec(self, specObj, force=False):
+        """ Save through Perforce, then re-read from there, since the
+            mirror won't have caught up yet.
+        """
+
+        # The mirror doesn't have every spec field, so start from the
+        # server's spec rather than ours
+        specObj._p4SpecObj = None
+        return self._getP4PythonConn().saveSpec(specObj, force=force)
+
+    def deleteSpec(self, specObj, force=False):
+        return self._getP4PythonConn().deleteSpec(specObj, force=force)
+
+    def runCommand(self, cmdName, rawOutput=False, **kwargs):
+        """ Answer cmdName from the mirror where possible, otherwise run it
+            through _P4OOP4Python.
+        """
+
+        query = dict(kwargs)
+
+        # Make sure we've read in the config file
+        self._initialize()
+
+        queryRunner = getattr(self, "_query_" + cmdName, None)
+        if queryRunner is None or rawOutput:
+            return self._getP4PythonConn().runCommand(
+                cmdName, rawOutput=rawOutput, **kwargs)
+
+        cmdObj = self._p4PythonSchema.getCmd(cmdName=cmdName)
+
+        # Same validation (and P4OO object conversion) as P4Python gets
+        (execArgs, p4Config) = cmdObj.validateQuery(query)
+        (options, args) = self._splitArgs(execArgs)
+
+        p4Out = None
+        if not p4Config:
+            p4Out = queryRunner(options, args)
+
+        if p4Out is None:
+            # Not something the mirror can answer
+            return self._getP4PythonConn().runCommand(cmdName, **kwargs)
+
+        return self._parseOutput(cmdName, p4Out)
+
+    ######################################################################
+    # Spec readers, returning P4Python-style spec dicts
+    #
+    def _read_change_spec(self, specID):
+        rows = self._fetchAll("SELECT change, date, client, user, status,"
+                              " type, " + _CHANGE_DESC + " FROM change"
+                              " LEFT JOIN \"desc\" USING (descKey)"
+                              " WHERE change = ?", (int(specID),))
+        if not rows:
+            return None
+
+        (change, date, client, user, status, changeType, desc) = rows[0]
+        return {'Change': str(change), 'Date': _p4Date(date),
+                'Client': client, 'User': user,
+                'Status': _CHANGE_STATUS[status or 0],
+                'Type': changeType or 'public', 'Description': desc}
+
+    _read_changelist_spec = _read_change_spec
+
+    def _read_client_spec(self, specID):
+        rows = self._fetchAll("SELECT name, updateDate, accessDate, owner,"
+                              " host, description, root, options,"
+                              " submitOptions, lineEnd FROM domain"
+                              " WHERE name = ? AND type = 'c'", (specID,))
+        if not rows:
+            return None
+
+        (name, update, access, owner, host, desc, root, options,
+         submitOptions, lineEnd) = rows[0]
+        return {'Client': name, 'Update': _p4Date(update),
+                'Access': _p4Date(access), 'Owner': owner, 'Host': host,
+                'Description': desc, 'Root': root, 'Options': options,
+                'SubmitOptions': submitOptions, 'LineEnd': lineEnd,
+                'View': self._readView(name, clientView=True)}
+
+    _read_workspace_spec = _read_client_spec
+
+    def _read_label_spec(self, specID):
+        rows = self._fetchAll("SELECT name, updateDate, accessDate, owner,"
+                              " description, options, revision FROM domain"
+                              " WHERE name = ? AND type = 'l'", (specID,))
+        if not rows:
+            return None
+
+        (name, update, access, owner, desc, options, revision) = rows[0]
+        p4Spec = {'Label': name, 'Update': _p4Date(update),
+                  'Access': _p4Date(access), 'Owner': owner,
+                  'Description': desc, 'Options': options,
+                  'View': self._readView(name, clientView=False)}
+        if revision:
+            p4Spec['Revision'] = revision
+        return p4Spec
+
+    def _read_user_spec(self, specID):
+        rows = self._fetchAll("SELECT user, email, updateDate, accessDate,"
+                              " fullName, jobView FROM user"
+                              " WHERE user = ?", (specID,))
+        if not rows:
+            return None
+
+        (user, email, update, access, fullName, jobView) = rows[0]
+        p4Spec = {'User': user, 'Email': email, 'Update': _p4Date(update),
+                  'Access': _p4Date(access), 'FullName': fullName}
+        if jobView:
+            p4Spec['JobView'] = jobView
+        return p4Spec
+
+    def _read_group_spec(self, specID):
+        rows = self._fetchAll("SELECT user, type, maxResults, maxScanRows,"
+                              " maxLockTime, maxOpenFiles, timeout,"
+                              " passwordTimeout FROM \"group\""
+                              " WHERE \"group\" = ? ORDER BY type, user",
+                              (specID,))
+        if not rows:
+            return None
+
+        p4Spec = {'Group': specID}
+        for (attr, value) in zip(('MaxResults', 'MaxScanRows',
+                                  'MaxLockTime', 'MaxOpenFiles', 'Timeout',
+                                  'PasswordTimeout'), rows[0][2:]):
+            p4Spec[attr] = value or 'unset'
+
+        for (specAttr, memberType) in (('Subgroups', _GROUP_SUBGROUP),
+                                       ('Users', _GROUP_USER),
+                                       ('Owners', _GROUP_OWNER)):
+            members = [row[0] for row in rows if row[1] == memberType]
+            if members:
+                p4Spec[specAttr] = members
+        return p4Spec
+
+    def _readView(self, name, clientView):
+        view = []
+        for (mapFlag, viewFile, depotFile) in self._fetchAll(
+                "SELECT mapFlag, viewFile, depotFile FROM view"
+                " WHERE name = ? ORDER BY seq", (name,)):
+            viewLine = _MAP_PREFIX[mapFlag or 0] + depotFile
+            if clientView:
+                viewLine += " " + viewFile
+            view.append(viewLine)
+        return view
+
+    ######################################################################
+    # Query runners, returning P4Python-style tagged output or None if the
+    # mirror can't answer the query
+    #
+    def _query_changes(self, options, args):
+        where = []
+        params = []
+
+        for (option, column) in (('-u', 'user'), ('-c', 'client')):
+            if option in options:
+                where.append(column + " = ?")
+                params.append(options.pop(option))
+
+        if '-s' in options:
+            status = options.pop('-s')
+            if status not in _CHANGE_STATUS:
+                return None
+            where.append("status = ?")
+            params.append(_CHANGE_STATUS.index(status))
+
+        # Only whole-depot change number ranges can be answered without
+        # the file revision tables.  Like p4, we return the changes in any
+        # of them.
+        rangeClauses = []
+        for fileArg in args:
+            match = _CHANGE_RANGE_RE.match(fileArg)
+            if match is None:
+                return None
+            (exact, firstChange, lastChange) = match.groups()
+            if lastChange is None:
+                # @M is everything through M, @=M is just M
+                lastChange = firstChange
+                firstChange = firstChange if exact else None
+            if firstChange is None:
+                rangeClauses.append("change <= ?")
+            else:
+                rangeClauses.append("(change >= ? AND change <= ?)")
+                params.append(int(firstChange))
+            params.append(int(lastChange))
+        if rangeClauses:
+            where.append("(" + " OR ".join(rangeClauses) + ")")
+
+        longOutput = options.pop('-l', False)
+        maxResults = options.pop('-m', None)
+        if options:
+            return None
+
+        rows = self._select("change, date, client, user, status, type, "
+                            + _CHANGE_DESC + " FROM change"
+                            " LEFT JOIN \"desc\" USING (descKey)", where, params,
+                            "change DESC", maxResults)
+
+        p4Out = []
+        for (change, date, client, user, status, changeType, desc) in rows:
+            if not longOutput and desc is not None:
+                # Like p4, truncate to the start of the first line
+                desc = desc[:31].split("\n")[0] + "\n"
+            p4Out.append(_dropNone({'change': str(change),
+                                    'time': _epochStr(date),
+                                    'user': user, 'client': client,
+                                    'status': _CHANGE_STATUS[status or 0],
+                                    'changeType': changeType or 'public',
+                                    'desc': desc}))
+        return p4Out
+
+    _query_changelists = _query_changes
+
+    def _query_clients(self, options, args):
+        return self._queryDomain('c', 'client', options, args)
+
+    _query_workspaces = _query_clients
+
+    def _query_labels(self, options, args):
+        return self._queryDomain('l', 'label', options, args)
+
+    def _queryDomain(self, domainType, idAttr, options, args):
+        if args:
+            return None
+
+        where = ["type = ?"]
+        params = [domainType]
+
+        if '-u' in options:
+            where.append("owner = ?")
+            params.append(options.pop('-u'))
+        if '-e' in options:
+            where.append("name GLOB ?")
+            params.append(_globFromWildcard(options.pop('-e')))
+
+        maxResults = options.pop('-m', None)
+        if options:
+            return None
+
+        rows = self._select("name, updateDate, accessDate, owner, host,"
+                            " root, options, description FROM domain",
+                            where, params, "name", maxResults)
+
+        p4Out = []
+        for (name, update, access, owner, host, root, domainOptions,
+             desc) in rows:
+            record = {idAttr: name, 'Update': _epochStr(update),
+                      'Access': _epochStr(access), 'Owner': owner,
+                      'Options': domainOptions, 'Description': desc}
+            if domainType == 'c':
+                record.update({'Host': host, 'Root': root})
+            p4Out.append(_dropNone(record))
+        return p4Out
+
+    def _query_users(self, options, args):
+        where = []
+        params = []
+
+        if not options.pop('-a', False):
+            where.append("(type IS NULL OR type = 'standard')")
+        options.pop('-l', None)
+
+        if args:
+            where.append("(" + " OR ".join(["user GLOB ?"] * len(args))
+                         + ")")
+            params.extend(_globFromWildcard(arg) for arg in args)
+
+        maxResults = options.pop('-m', None)
+        if options:
+            return None
+
+        rows = self._select("user, email, updateDate, accessDate, fullName,"
+                            " type FROM user", where, params, "user",
+                            maxResults)
+
+        return [_dropNone({'User': user, 'Email': email,
+                           'Update': _epochStr(update),
+                           'Access': _epochStr(access), 'FullName': fullName,
+                           'Type': userType or 'standard'})
+                for (user, email, update, access, fullName, userType)
+                in rows]
+
+    def _query_groups(self, options, args):
+        where = []
+        params = []
+
+        if '-u' in options:
+            where.append("user = ? AND type = ?")
+            params.extend([options.pop('-u'), _GROUP_USER])
+        if '-o' in options:
+            where.append("user = ? AND type = ?")
+            params.extend([options.pop('-o'), _GROUP_OWNER])
+        if '-g' in options:
+            where.append("user = ? AND type = ?")
+            params.extend([options.pop('-g'), _GROUP_SUBGROUP])
+
+        maxResults = options.pop('-m', None)
+        if options or args:
+            # -i (indirect membership) needs a recursive walk, leave it to
+            # the server
+            return None
+
+        rows = self._select("\"group\", user, type, maxResults, maxScanRows,"
+                            " maxLockTime, maxOpenFiles, timeout,"
+                            " passwordTimeout FROM \"group\"", where, params,
+                            "\"group\", type, user", maxResults)
+
+        return [{'group': group, 'user': user,
+                 'isSubGroup': str(int(memberType == _GROUP_SUBGROUP)),
+                 'isUser': str(int(memberType == _GROUP_USER)),
+                 'isOwner': str(int(memberType == _GROUP_OWNER)),
+                 'maxResults': maxResults or 'unset',
+                 'maxScanRows': maxScanRows or 'unset',
+                 'maxLockTime': maxLockTime or 'unset',
+                 'maxOpenFiles': maxOpenFiles or 'unset',
+                 'timeout': timeout or 'unset',
+                 'passTimeout': passwordTimeout or 'unset'}
+                for (group, user, memberType, maxResults, maxScanRows,
+                     maxLockTime, maxOpenFiles, timeout, passwordTimeout)
+                in rows]
+
+    def _query_counters(self, options, args):
+        where = []
+        params = []
+
+        if '-e' in options:
+            where.append("name GLOB ?")
+            params.append(_globFromWildcard(options.pop('-e')))
+
+        maxResults = options.pop('-m', None)
+        if options or args:
+            return None
+
+        rows = self._select("name, value FROM counters", where, params,
+                            "name", maxResults)
+        return [{'counter': name, 'value': value} for (name, value) in rows]
+
+    ######################################################################
+    # Internal Methods
+    #
+    def _select(self, columnsAndTable, where, params, orderBy, maxResults):
+        sql = "SELECT " + columnsAndTable
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + orderBy
+        if maxResults is not None:
+            sql += " LIMIT ?"
+            params = list(params) + [int(maxResults)]
+
+        return self._fetchAll(sql, params)
+
+    def _fetchAll(self, sql, params):
+        if self.p4SQLDbh is None:
+            raise P4OOFatal("No p4SQLDbh to read from")
+
+        return self.p4SQLDbh.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _splitArgs(execArgs):
+        """ Split validateQuery's flattened arguments into an
+            {option: value} dict (True for flags) and the remaining args.
+        """
+
+        # Options taking a value, across the commands we answer
+        valueOptions = ('-c', '-e', '-g', '-m', '-o', '-s', '-u')
+
+        flatArgs = []
+        for arg in execArgs:
+            if isinstance(arg, (list, tuple)):
+                flatArgs.extend(arg)
+            elif arg is not None:
+                flatArgs.append(arg)
+
+        options = {}
+        args = []
+        argIter = iter(flatArgs)
+        for arg in argIter:
+            if isinstance(arg, str) and arg.startswith("-"):
+                if arg in valueOptions:
+                    options[arg] = next(argIter, None)
+                else:
+                    options[arg] = True
+            else:
+                args.append(str(arg))
+
+        return (options, args)
+
+    def _parseOutput(self, cmdName, p4Out):
+        p4PythonConn = self._getP4PythonConn()
+        setObj = p4PythonConn._getOutputClasses(cmdName)[1]()
+        setObj._p4Conn = self
+
+        specObjs = list(p4PythonConn._iterParseOutput(cmdName, p4Out))
+        for specObj in specObjs:
+            # Missing attributes are read from the mirror, one at a time is
+            # cheap enough here
+            specObj._p4Conn = self
+            if isinstance(specObj, _P4OOSpecObj):
+                specObj._hydrationGroup = None
+
+        setObj.addObjects(specObjs)
+        return setObj
+
+    def _getP4PythonConn(self):
+        if self._p4PythonConn is None:
+            self._p4PythonConn = _P4OOP4Python(p4PythonObj=self.p4PythonObj,
+                                               p4Pool=self.p4Pool)
+        return self._p4PythonConn
+
+    def _initialize(self):
+        p4PythonConn = self._getP4PythonConn()
+        p4PythonConn._initialize()
+        self._p4PythonSchema = p4PythonConn._p4PythonSchema
+        return True
@@ -0,0 +1,350 @@
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._P4ToDBIngest.py
+#
+######################################################################
+
+"""
+Checkpoint and journal ingestion into the _P4ToDB SQL mirror
+
+Loads a Perforce checkpoint, then applies rotated journals as they come,
+keeping a local SQLite mirror that _P4OOP4ToDB can answer queries from:
+
+    p4SQLDbh = sqlite3.connect("p4mirror.db")
+    ingester = _P4OOJournalIngester(p4SQLDbh)
+    ingester.loadCheckpoint("/p4/checkpoints/checkpoint.1234.gz")
+    ingester.applyJournal("/p4/checkpoints/journal.1234.gz")
+
+Files are read as a stream, one record at a time, and written in batched
+transactions, so memory use doesn't depend on the size of the file.
+Each call returns throughput statistics, which are also logged.
+
+Only the tables the mirror holds are kept: db.change, db.desc,
+db.domain, db.view, db.user, db.group, db.label, db.have and
+db.counters.  Their leading fields have been stable across server
+versions, and trailing fields the mirror doesn't use are ignored.
+"""
+
+import gzip
+import logging
+import os
+import re
+import time
+
+from P4OO.Exceptions import P4OOFatal
+from P4OO._P4ToDB import _P4OOP4ToDB, \
+    _GROUP_SUBGROUP, _GROUP_USER, _GROUP_OWNER
+
+# A journal field: @string@ (with @@ for a literal @) or a bare number
+_FIELD_RE = re.compile(r'@((?:[^@]|@@)*)@|(-?\d+)')
+
+# db.domain options flags, in the order p4 reports them
+_CLIENT_OPTIONS = ((0x01, "allwrite", "noallwrite"),
+                   (0x02, "clobber", "noclobber"),
+                   (0x04, "compress", "nocompress"),
+                   (0x08, "locked", "unlocked"),
+                   (0x10, "modtime", "nomodtime"),
+                   (0x20, "rmdir", "normdir"))
+_LABEL_OPTIONS = ((0x08, "locked", "unlocked"),)
+
+# db.group membership types --> mirror types
+_GROUP_TYPES = {0: _GROUP_USER, 1: _GROUP_SUBGROUP, 2: _GROUP_OWNER}
+
+# db.user types
+_USER_TYPES = {0: 'standard', 1: 'operator', 2: 'service'}
+
+
+def _options(flags, optionBits):
+    return " ".join(setName if flags & bit else unsetName
+                    for (bit, setName, unsetName) in optionBits)
+
+
+def _limit(value):
+    """ Group limits: 0 is unset, -1 is unlimited """
+    if value in (0, None):
+        return None
+    if value == -1:
+        return "unlimited"
+    return str(value)
+
+
+def _field(fields, index, default=None):
+    return fields[index] if len(fields) > index else default
+
+
+def _changeRow(fields):
+    # change descKey client user date status access description root
+    return (fields[0], fields[1], fields[2], fields[3], fields[4], fields[5],
+            "restricted" if _field(fields, 6, 0) else "public",
+            fields[7], _field(fields, 8))
+
+
+def _domainRow(fields):
+    # name type extra mount mount2 mount3 owner updateDate accessDate
+    # options description ...
+    domainType = fields[1]
+    if isinstance(domainType, int):
+        domainType = chr(domainType)
+    flags = fields[9] if isinstance(fields[9], int) else 0
+
+    options = None
+    if domainType == 'c':
+        options = _options(flags, _CLIENT_OPTIONS)
+    elif domainType == 'l':
+        options = _options(flags, _LABEL_OPTIONS)
+
+    # Labels keep their Revision in 'extra'
+    revision = fields[2] if domainType == 'l' and fields[2] else None
+    host = fields[2] if domainType == 'c' else None
+
+    return (fields[0], domainType, host, fields[3] or None, fields[6],
+            fields[7], fields[8], options, revision, fields[10])
+
+
+def _userRow(fields):
+    # user email jobview updateDate accessDate fullName password strength
+    # ticket endDate type ...
+    return (fields[0], fields[1], fields[2] or None, fields[3], fields[4],
+            fields[5], _USER_TYPES.get(_field(fields, 10, 0), 'standard'))
+
+
+def _groupRow(fields):
+    # user group type maxResults maxScanRows maxLockTime timeout
+    # passwordTimeout maxOpenFiles ...
+    return (fields[0], fields[1], _GROUP_TYPES.get(fields[2], _GROUP_USER),
+            _limit(fields[3]), _limit(fields[4]), _limit(fields[5]),
+            _limit(_field(fields, 8)), _limit(fields[6]),
+            _limit(_field(fields, 7)))
+
+
+# journal table --> (mirror table, columns, key columns, row builder)
+_TABLES = {
+    'db.change': ('change', ('change', 'descKey', 'client', 'user', 'date',
+                             'status', 'type', 'description', 'root'),
+                  ('change',), _changeRow),
+    'db.desc': ('"desc"', ('descKey', 'description'), ('descKey',),
+                lambda fields: (fields[0], fields[1])),
+    'db.domain': ('domain', ('name', 'type', 'host', 'root', 'owner',
+                             'updateDate', 'accessDate', 'options',
+                             'revision', 'description'),
+                  ('name',), _domainRow),
+    'db.view': ('view', ('name', 'seq', 'mapFlag', 'viewFile', 'depotFile'),
+                ('name', 'seq'), lambda fields: tuple(fields[:5])),
+    'db.user': ('user', ('user', 'email', 'jobView', 'updateDate',
+                         'accessDate', 'fullName', 'type'),
+                ('user',), _userRow),
+    'db.group': ('"group"', ('user', '"group"', 'type', 'maxResults',
+                             'maxScanRows', 'maxLockTime', 'maxOpenFiles',
+                             'timeout', 'passwordTimeout'),
+                 ('"group"', 'type', 'user'), _groupRow),
+    'db.label': ('label', ('name', 'depotFile', 'haveRev'),
+                 ('name', 'depotFile'), lambda fields: tuple(fields[:3])),
+    'db.have': ('have', ('clientFile', 'depotFile', 'haveRev', 'type',
+                         'time'),
+                ('clientFile',),
+                lambda fields: (fields[0], fields[1], fields[2],
+                                _field(fields, 3), _field(fields, 4))),
+    'db.counters': ('counters', ('name', 'value'), ('name',),
+                    lambda fields: (fields[0], str(fields[1]))),
+}
+
+# Journal operations: put, replace, delete.  Others (ex, mx, vv, ...) are
+# markers we don't need.
+_PUT_OPS = ('pv', 'rv')
+_DELETE_OPS = ('dv',)
+
+_INGEST_LOG_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS ingestLog ("
+    " file TEXT PRIMARY KEY, kind TEXT, records INTEGER, bytes INTEGER,"
+    " finished REAL)")
+
+
+class _P4OOJournalIngester():
+    """ Streams checkpoint/journal records into a _P4OOP4ToDB mirror
+
+        Args:
+            p4SQLDbh: sqlite3 connection holding the mirror
+            batchSize (int): Records written per transaction
+    """
+
+    def __init__(self, p4SQLDbh, batchSize=10000):
+        self.p4SQLDbh = p4SQLDbh
+        self.batchSize = batchSize
+
+        _P4OOP4ToDB.createSchema(p4SQLDbh)
+        with p4SQLDbh:
+            p4SQLDbh.execute(_INGEST_LOG_SCHEMA)
+
+        self._statements = {}
+        for (journalTable, (table, columns, keys, rowBuilder)) \
+          in _TABLES.items():
+            self._statements[journalTable] = (
+                "INSERT OR REPLACE INTO %s (%s) VALUES (%s)"
+                % (table, ", ".join(columns), ", ".join("?" * len(columns))),
+                "DELETE FROM %s WHERE %s"
+                % (table, " AND ".join(key + " = ?" for key in keys)),
+                [columns.index(key) for key in keys],
+                rowBuilder)
+
+    def loadCheckpoint(self, checkpointFile):
+        """ Replace the mirror's contents with checkpointFile's """
+
+        with self.p4SQLDbh:
+            for (table, columns, keys, rowBuilder) in _TABLES.values():
+                self.p4SQLDbh.execute("DELETE FROM " + table)
+            self.p4SQLDbh.execute("DELETE FROM ingestLog")
+
+        return self._ingest(checkpointFile, "checkpoint")
+
+    def applyJournal(self, journalFile):
+        """ Apply a rotated journal on top of what's loaded.  A journal
+            that's already been applied is skipped.
+        """
+
+        row = self.p4SQLDbh.execute(
+            "SELECT records FROM ingestLog WHERE file = ?",
+            (os.path.basename(journalFile),)).fetchone()
+        if row is not None:
+            logging.info("%s already applied, skipping", journalFile)
+            return None
+
+        return self._ingest(journalFile, "journal")
+
+    def appliedFiles(self):
+        """ Return [(file, kind, records)] ingested so far, in order """
+
+        return self.p4SQLDbh.execute(
+            "SELECT file, kind, records FROM ingestLog"
+            " ORDER BY finished").fetchall()
+
+    ######################################################################
+    # Internal Methods
+    #
+    def _ingest(self, journalFile, kind):
+        startTime = time.monotonic()
+        stats = {'file': journalFile, 'records': 0, 'applied': 0,
+                 'bytes': 0}
+
+        p4SQLDbh = self.p4SQLDbh
+        pending = 0
+        # runs of same-statement rows, so executemany does the work
+        (batchStatement, batchRows) = (None, [])
+
+        with _openJournal(journalFile) as journal:
+            p4SQLDbh.execute("BEGIN")
+            try:
+                for (record, recordBytes) in _readRecords(journal):
+                    stats['records'] += 1
+                    stats['bytes'] += recordBytes
+
+                    (statement, row) = self._recordStatement(record)
+                    if statement is None:
+                        continue
+
+                    if statement is not batchStatement:
+                        if batchRows:
+                            p4SQLDbh.executemany(batchStatement, batchRows)
+                        (batchStatement, batchRows) = (statement, [])
+                    batchRows.append(row)
+                    stats['applied'] += 1
+
+                    pending += 1
+                    if pending >= self.batchSize:
+                        p4SQLDbh.executemany(batchStatement, batchRows)
+                        batchRows = []
+                        p4SQLDbh.execute("COMMIT")
+                        p4SQLDbh.execute("BEGIN")
+                        pending = 0
+
+                if batchRows:
+                    p4SQLDbh.executemany(batchStatement, batchRows)
+
+                p4SQLDbh.execute(
+                    "INSERT OR REPLACE INTO ingestLog VALUES (?, ?, ?, ?, ?)",
+                    (os.path.basename(journalFile), kind, stats['records'],
+                     stats['bytes'], time.time()))
+                p4SQLDbh.execute("COMMIT")
+            except BaseException:
+                p4SQLDbh.execute("ROLLBACK")
+                raise
+
+        seconds = time.monotonic() - startTime
+        stats['seconds'] = seconds
+        stats['recordsPerSecond'] = stats['records'] / seconds \
+            if seconds else 0.0
+        stats['megabytesPerSecond'] = stats['bytes'] / 1e6 / seconds \
+            if seconds else 0.0
+
+        logging.info("Ingested %s %s: %d records (%d applied) in %.1fs,"
+                     " %.0f records/s, %.1f MB/s", kind, journalFile,
+                     stats['records'], stats['applied'], seconds,
+                     stats['recordsPerSecond'], stats['megabytesPerSecond'])
+        return stats
+
+    def _recordStatement(self, record):
+        """ Return (SQL statement, parameters) for one journal record, or
+            (None, None) if it's not something the mirror keeps.
+        """
+
+        if len(record) < 3:
+            return (None, None)
+
+        (operation, tableVersion, journalTable) = record[:3]
+        statements = self._statements.get(journalTable)
+        if statements is None:
+            return (None, None)
+
+        (insertStatement, deleteStatement, keyIndexes, rowBuilder) \
+            = statements
+        try:
+            row = rowBuilder(record[3:])
+        except IndexError as exc:
+            raise P4OOFatal("Unexpected %s record: %r"
+                            % (journalTable, record)) from exc
+
+        if operation in _PUT_OPS:
+            return (insertStatement, row)
+        if operation in _DELETE_OPS:
+            return (deleteStatement, [row[index] for index in keyIndexes])
+        return (None, None)
+
+
+def _openJournal(journalFile):
+    if journalFile.endswith(".gz"):
+        return gzip.open(journalFile, "rt", encoding="utf-8",
+                         errors="surrogateescape", newline="\n")
+    return open(journalFile, "rt", encoding="utf-8",
+                errors="surrogateescape", newline="\n")
+
+
+def _readRecords(journal):
+    """ Generate (fields, size) for each journal record.
+
+        A record is usually one line, but strings may contain newlines.
+        Every '@' in a record is part of a string's delimiters or an '@@'
+        escape, so a record is complete once it has an even number of them.
+    """
+
+    recordLines = []
+    atCount = 0
+    for line in journal:
+        recordLines.append(line)
+        atCount += line.count("@")
+        if atCount % 2:
+            continue
+
+        record = "".join(recordLines)
+        recordLines = []
+        atCount = 0
+
+        fields = []
+        for (string, number) in _FIELD_RE.findall(record):
+            if number:
+                fields.append(int(number))
+            else:
+                fields.append(string.replace("@@", "@"))
+        yield (fields, len(record))
+
+    if recordLines:
+        raise P4OOFatal("Truncated journal record at end of file")
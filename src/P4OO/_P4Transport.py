@@ -0,0 +1,552 @@
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._P4Transport.py
+#
+######################################################################
+
+"""
+Stand-in P4Python objects for testing and benchmarking without a server.
+
+_P4OOP4Python runs every command through a P4 object's run(), errors and
+warnings, so anything behaving like a P4 object can be injected in its
+place, either as p4PythonObj or from a pool's p4Factory:
+
+  _P4OORecordingP4 - wraps a real P4 object, recording each command's
+                     output, errors and warnings to a fixture file
+  _P4OOReplayP4    - replays a fixture file, deterministically and
+                     without a server
+  _P4OOSimulatedP4 - a synthetic server with configurable per-command
+                     latency and output size
+
+    p4PythonObj = _P4OORecordingP4(P4.P4(port=p4Port).connect(), "run.jsonl")
+    ...
+    p4Pool = _P4OOP4PythonPool(maxSize=8, p4Factory=_P4OOSimulatedP4(
+        latency=0.02, commandOutputSize={'changes': 10000}).fork)
+
+Fixture files hold one JSON object per command.
+"""
+
+import base64
+import json
+import threading
+import time
+
+# P4Python
+from P4 import P4Exception, Spec, OutputHandler
+
+from P4OO.Exceptions import P4OOFatal
+from P4OO._Base import _flattenArgs
+
+
+def _encode(value):
+    """ Make P4Python output and input JSON-safe, keeping Specs and bytes
+        distinguishable so _decode can restore them.
+    """
+    if isinstance(value, Spec):
+        return {'__spec__': {key: _encode(item)
+                             for (key, item) in value.items()},
+                'fields': value.permitted_fields()}
+    if isinstance(value, dict):
+        return {key: _encode(item) for (key, item) in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode("ascii")}
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if '__spec__' in value:
+            p4Spec = Spec(value['fields'])
+            # skip Spec.__setitem__ validation, these fields came from a Spec
+            dict.update(p4Spec, _decode(value['__spec__']))
+            return p4Spec
+        if '__bytes__' in value:
+            return base64.b64decode(value['__bytes__'])
+        return {key: _decode(item) for (key, item) in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _commandKey(p4SubCmd, args, p4Input, tagged):
+    """ Identify a command by everything that affects its output """
+    return json.dumps([p4SubCmd, [str(arg) for arg in args],
+                       _encode(p4Input), bool(tagged)], sort_keys=True)
+
+
+def _deliver(handler, p4Out):
+    """ Feed p4Out through a P4Python OutputHandler the way P4Python does,
+        returning the records the handler didn't consume.
+    """
+    reported = []
+    for record in p4Out:
+        if isinstance(record, dict):
+            action = handler.outputStat(record)
+        elif isinstance(record, bytes):
+            action = handler.outputBinary(record)
+        else:
+            action = handler.outputInfo(record)
+
+        if action == OutputHandler.CANCEL:
+            break
+        if action != OutputHandler.HANDLED:
+            reported.append(record)
+    return reported
+
+
+class _P4OOFixtureFile():
+    """ Thread-safe JSON-lines fixture file of recorded commands """
+
+    def __init__(self, fixtureFile):
+        self.fixtureFile = fixtureFile
+        self._lock = threading.Lock()
+
+    def append(self, entry):
+        line = json.dumps(entry, sort_keys=True) + "\n"
+        with self._lock, open(self.fixtureFile, "a",
+                              encoding="utf-8") as fixture:
+            fixture.write(line)
+
+    def load(self):
+        """ Return {command key: [entries, in recorded order]} """
+
+        entries = {}
+        with open(self.fixtureFile, encoding="utf-8") as fixture:
+            for line in fixture:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries.setdefault(entry['key'], []).append(entry)
+        return entries
+
+
+class _P4OOStandInP4():
+    """ The P4 attributes _P4OOP4Python and _P4OOP4PythonPool rely on, for
+        P4 objects that don't talk to a server.  Subclasses implement
+        _execute().
+    """
+
+    def __init__(self, **p4Settings):
+        self.port = "standin:1666"
+        self.user = "p4oo"
+        self.client = "p4oo_client"
+        self.password = ""
+        self.charset = "none"
+        self.host = ""
+        self.prog = "P4OO.py"
+        self.ticket_file = ""
+        self.tagged = 1
+        self.track = 0
+        self.track_output = []
+        self.exception_level = 2
+        self.handler = None
+        self.maxresults = 0
+        self.maxscanrows = 0
+        self.maxlocktime = 0
+        self.input = None
+        self.errors = []
+        self.warnings = []
+        self.messages = []
+        self._connected = False
+
+        for (setting, value) in p4Settings.items():
+            setattr(self, setting, value)
+
+    def connect(self):
+        self._connected = True
+        return self
+
+    def connected(self):
+        return self._connected
+
+    def disconnect(self):
+        self._connected = False
+
+    def run(self, p4SubCmd, *args):
+        flatArgs = _flattenArgs(args)
+        p4Input = self.input
+        self.input = None
+
+        (p4Out, errors, warnings) = self._execute(p4SubCmd, flatArgs, p4Input)
+        self.errors = list(errors)
+        self.warnings = list(warnings)
+
+        if self.handler is not None:
+            p4Out = _deliver(self.handler, p4Out)
+
+        if self.errors and self.exception_level >= 1 \
+          or self.warnings and self.exception_level >= 2:
+            raise P4Exception("\n".join(self.errors + self.warnings))
+
+        return p4Out
+
+    def _execute(self, p4SubCmd, args, p4Input):
+        """ Return (output records, errors, warnings) for one command """
+        raise NotImplementedError
+
+
+class _P4OORecordingP4():
+    """ Wraps a P4 object, appending every command it runs (output, errors,
+        warnings and elapsed time) to a fixture file for _P4OOReplayP4.
+
+        Everything but run() is passed through to the wrapped P4 object.
+
+        Args:
+            p4PythonObj: The P4 object doing the real work
+            fixtureFile (str or _P4OOFixtureFile): Where commands are
+                recorded, appended to if it exists
+    """
+
+    def __init__(self, p4PythonObj, fixtureFile):
+        if not isinstance(fixtureFile, _P4OOFixtureFile):
+            fixtureFile = _P4OOFixtureFile(fixtureFile)
+
+        object.__setattr__(self, 'p4PythonObj', p4PythonObj)
+        object.__setattr__(self, 'fixtureFile', fixtureFile)
+
+    def __getattr__(self, name):
+        return getattr(self.p4PythonObj, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.p4PythonObj, name, value)
+
+    def run(self, p4SubCmd, *args):
+        p4PythonObj = self.p4PythonObj
+        flatArgs = _flattenArgs(args)
+        key = _commandKey(p4SubCmd, flatArgs, p4PythonObj.input,
+                          p4PythonObj.tagged)
+
+        # Output consumed by a handler never reaches our return value, so
+        # listen in on the way through
+        handler = p4PythonObj.handler
+        captured = []
+        if handler is not None:
+            p4PythonObj.handler = _P4OORecordingHandler(handler, captured)
+
+        startTime = time.monotonic()
+        p4Out = []
+        try:
+            p4Out = p4PythonObj.run(p4SubCmd, flatArgs)
+        finally:
+            seconds = time.monotonic() - startTime
+            if handler is not None:
+                p4PythonObj.handler = handler
+
+            # The handler saw everything it didn't reject, and whatever it
+            # didn't consume is in p4Out as well
+            if handler is None or not captured:
+                captured = list(p4Out)
+
+            self.fixtureFile.append({
+                'key': key,
+                'output': _encode(captured),
+                'errors': list(p4PythonObj.errors),
+                'warnings': list(p4PythonObj.warnings),
+                'track': list(getattr(p4PythonObj, 'track_output', None)
+                              or []),
+                'seconds': seconds})
+
+        return p4Out
+
+    def fork(self):
+        """ Return a recording P4 object for a connection of its own,
+            appending to the same fixture file.
+        """
+        p4PythonObj = self.p4PythonObj
+        forkedP4PythonObj = type(p4PythonObj)()
+        for setting in ('port', 'user', 'client', 'password', 'charset',
+                        'host', 'prog', 'ticket_file'):
+            value = getattr(p4PythonObj, setting, None)
+            if value:
+                setattr(forkedP4PythonObj, setting, value)
+        return _P4OORecordingP4(forkedP4PythonObj, self.fixtureFile)
+
+
+class _P4OORecordingHandler(OutputHandler):
+    """ Passes output through to a caller's OutputHandler, keeping a copy
+        of everything it's handed.
+    """
+
+    def __init__(self, handler, captured):
+        OutputHandler.__init__(self)
+        self.handler = handler
+        self.captured = captured
+
+    def outputStat(self, h):
+        self.captured.append(h)
+        return self.handler.outputStat(h)
+
+    def outputInfo(self, i):
+        self.captured.append(i)
+        return self.handler.outputInfo(i)
+
+    def outputText(self, s):
+        self.captured.append(s)
+        return self.handler.outputText(s)
+
+    def outputBinary(self, b):
+        self.captured.append(b)
+        return self.handler.outputBinary(b)
+
+
+class _P4OOReplayP4(_P4OOStandInP4):
+    """ Replays commands recorded by _P4OORecordingP4.
+
+        A command is matched on its name, arguments, input and tagged
+        setting.  Commands recorded more than once replay their recordings
+        in order, repeating the last one after that.
+
+        Args:
+            fixtureFile (str): Fixture file from _P4OORecordingP4
+            latencyScale (float): Fraction of each command's recorded time
+                to sleep before replaying it, 0 to replay immediately
+            p4Settings: P4 attributes (port, user, client, ...)
+    """
+
+    def __init__(self, fixtureFile, latencyScale=0.0, _entries=None,
+                 **p4Settings):
+        _P4OOStandInP4.__init__(self, **p4Settings)
+        self.fixtureFile = fixtureFile
+        self.latencyScale = latencyScale
+
+        if _entries is None:
+            _entries = _P4OOReplayEntries(
+                _P4OOFixtureFile(fixtureFile).load())
+        self._entries = _entries
+
+    def _execute(self, p4SubCmd, args, p4Input):
+        key = _commandKey(p4SubCmd, args, p4Input, self.tagged)
+        entry = self._entries.next(key)
+        if entry is None:
+            raise P4OOFatal("No recorded output for: p4 %s %s"
+                            % (p4SubCmd, " ".join(str(arg) for arg in args)))
+
+        if self.latencyScale:
+            time.sleep(entry['seconds'] * self.latencyScale)
+
+        self.track_output = entry.get('track', []) if self.track else []
+
+        return (_decode(entry['output']), entry['errors'], entry['warnings'])
+
+    def fork(self):
+        """ Return a replaying P4 object for a connection of its own,
+            sharing this one's recordings.
+        """
+        return _P4OOReplayP4(self.fixtureFile, latencyScale=self.latencyScale,
+                             _entries=self._entries, port=self.port,
+                             user=self.user, client=self.client,
+                             track=self.track)
+
+
+class _P4OOReplayEntries():
+    """ Recorded entries shared by a _P4OOReplayP4 and its forks """
+
+    def __init__(self, entries):
+        self._entries = entries
+        self._lock = threading.Lock()
+        self._replayed = {}     # command key --> entries replayed
+
+    def next(self, key):
+        entries = self._entries.get(key)
+        if not entries:
+            return None
+
+        with self._lock:
+            replayed = self._replayed.get(key, 0)
+            self._replayed[key] = replayed + 1
+        return entries[min(replayed, len(entries) - 1)]
+
+
+class _P4OOSimulatedP4(_P4OOStandInP4):
+    """ A synthetic Perforce server for measuring P4OO itself.
+
+        Every command waits for its latency (sleeping, like a real network
+        round trip, so other threads keep running) and then returns
+        generated output: a minimal spec for "<spec> -o", a saved message
+        for "<spec> -i", a deleted message for "-d", a single record for
+        counter and info, and outputSize records for anything else,
+        limited by -m.
+
+        Args:
+            latency (float): Seconds each command takes before any output
+            recordLatency (float): Additional seconds per output record
+            outputSize (int): Records returned by list commands
+            commandLatency (dict): Per-command overrides of latency
+            commandOutputSize (dict): Per-command overrides of outputSize
+            connectLatency (float): Seconds connect() takes
+            recordFactory (callable): recordFactory(p4SubCmd, args, index)
+                returns output record number index, replacing the default
+                generated records
+            p4Settings: P4 attributes (port, user, client, ...)
+    """
+
+    # List commands --> the field their generated records are keyed by
+    _ID_FIELDS = {'changes': 'change', 'describe': 'change',
+                  'clients': 'client', 'labels': 'label',
+                  'branches': 'branch', 'users': 'User', 'groups': 'group',
+                  'counters': 'counter', 'files': 'depotFile',
+                  'fstat': 'depotFile', 'opened': 'depotFile',
+                  'have': 'depotFile'}
+
+    def __init__(self, latency=0.0, recordLatency=0.0, outputSize=10,
+                 commandLatency=None, commandOutputSize=None,
+                 connectLatency=0.0, recordFactory=None, _commandCounts=None,
+                 **p4Settings):
+        _P4OOStandInP4.__init__(self, **p4Settings)
+        self.latency = latency
+        self.recordLatency = recordLatency
+        self.outputSize = outputSize
+        self.commandLatency = commandLatency or {}
+        self.commandOutputSize = commandOutputSize or {}
+        self.connectLatency = connectLatency
+        self.recordFactory = recordFactory
+
+        if _commandCounts is None:
+            _commandCounts = _P4OOCommandCounts()
+        self._commandCounts = _commandCounts
+
+    def connect(self):
+        if self.connectLatency:
+            time.sleep(self.connectLatency)
+        return _P4OOStandInP4.connect(self)
+
+    def fork(self):
+        """ Return a simulated P4 object for a connection of its own, with
+            the same settings and shared command counts.
+        """
+        return _P4OOSimulatedP4(
+            latency=self.latency, recordLatency=self.recordLatency,
+            outputSize=self.outputSize, commandLatency=self.commandLatency,
+            commandOutputSize=self.commandOutputSize,
+            connectLatency=self.connectLatency,
+            recordFactory=self.recordFactory,
+            _commandCounts=self._commandCounts, port=self.port,
+            user=self.user, client=self.client, track=self.track)
+
+    def commandCounts(self):
+        """ Return {command: times run} across this object and its forks """
+        return self._commandCounts.get()
+
+    def _execute(self, p4SubCmd, args, p4Input):
+        self._commandCounts.add(p4SubCmd)
+
+        latency = self.commandLatency.get(p4SubCmd, self.latency)
+        if latency:
+            time.sleep(latency)
+
+        if "-o" in args:
+            p4Out = [self._generateSpec(p4SubCmd, args)]
+        elif "-i" in args:
+            p4Out = ["%s %s saved." % (p4SubCmd.capitalize(),
+                                       self._specID(p4SubCmd, p4Input))]
+        elif "-d" in args:
+            p4Out = ["%s %s deleted." % (p4SubCmd.capitalize(), args[-1])]
+        elif p4SubCmd == "counter":
+            p4Out = [{'counter': args[0],
+                      'value': str(args[1]) if len(args) > 1 else "0"}]
+        elif p4SubCmd == "info":
+            p4Out = [{'userName': self.user, 'clientName': self.client,
+                      'serverAddress': self.port}]
+        else:
+            p4Out = self._generateRecords(p4SubCmd, args)
+
+        if self.recordLatency:
+            time.sleep(self.recordLatency * len(p4Out))
+
+        if self.track:
+            self.track_output = self._generateTrack(
+                p4SubCmd, latency + self.recordLatency * len(p4Out),
+                len(p4Out))
+
+        return (p4Out, [], [])
+
+    @staticmethod
+    def _generateTrack(p4SubCmd, seconds, records):
+        """ Tracking output as p4d reports it, for one table read """
+        table = "db." + p4SubCmd.rstrip("s")
+        return ["lapse %.3fs" % seconds,
+                "rpc msgs/size in+out 2+%d/0mb+0mb" % (records + 1),
+                table,
+                "pages in+out+cached %d+0+2" % (records // 10 + 1),
+                "locks read/write 1/0 rows get+pos+scan put+del"
+                " 0+1+%d 0+0" % records,
+                "total lock wait+held read/write 0ms+%dms/0ms+0ms"
+                % (seconds * 1000)]
+
+    def _generateSpec(self, p4SubCmd, args):
+        optionIndex = args.index("-o")
+        specID = args[optionIndex + 1] if len(args) > optionIndex + 1 \
+            else "new"
+
+        idField = p4SubCmd.capitalize()
+        specFields = {idField: str(specID), 'Owner': self.user,
+                      'Description': "Simulated %s %s\n" % (p4SubCmd, specID)}
+
+        # Changes are pending in our client, so their helpers can run
+        if p4SubCmd == "change":
+            specFields.update(Client=self.client or "simulated",
+                              Status="pending")
+
+        p4Spec = Spec({fieldName.lower(): fieldName
+                       for fieldName in specFields})
+        dict.update(p4Spec, specFields)
+        return p4Spec
+
+    def _generateRecords(self, p4SubCmd, args):
+        outputSize = self.commandOutputSize.get(p4SubCmd, self.outputSize)
+        if "-m" in args:
+            maxIndex = args.index("-m") + 1
+            if maxIndex < len(args):
+                outputSize = min(outputSize, int(args[maxIndex]))
+
+        recordFactory = self.recordFactory or self._defaultRecord
+        return [recordFactory(p4SubCmd, args, index)
+                for index in range(outputSize)]
+
+    def _defaultRecord(self, p4SubCmd, args, index):
+        idField = self._ID_FIELDS.get(p4SubCmd)
+
+        if idField == 'change':
+            return {'change': str(self.outputSize - index), 'user': self.user,
+                    'client': self.client, 'status': "submitted",
+                    'time': str(1700000000 + index),
+                    'desc': "Simulated change\n"}
+        if idField == 'depotFile':
+            return {'depotFile': "//depot/simulated/file%d.c" % index,
+                    'rev': "1", 'change': "1", 'action': "add",
+                    'type': "text"}
+        if idField is None:
+            return {p4SubCmd: str(index)}
+
+        record = {idField: "%s%d" % (idField.lower(), index),
+                  'Owner': self.user,
+                  'Description': "Simulated %s\n" % p4SubCmd}
+        if p4SubCmd == 'counters':
+            record = {'counter': "counter%d" % index, 'value': str(index)}
+        return record
+
+    @staticmethod
+    def _specID(p4SubCmd, p4Input):
+        if isinstance(p4Input, dict):
+            return p4Input.get(p4SubCmd.capitalize(), "new")
+        return "new"
+
+
+class _P4OOCommandCounts():
+    """ Thread-safe command counters shared by a _P4OOSimulatedP4 and its
+        forks
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def add(self, p4SubCmd):
+        with self._lock:
+            self._counts[p4SubCmd] = self._counts.get(p4SubCmd, 0) + 1
+
+    def get(self):
+        with self._lock:
+            return dict(self._counts)
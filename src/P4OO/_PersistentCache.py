@@ -0,0 +1,271 @@
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._PersistentCache.py
+#
+######################################################################
+
+"""
+Persistent on-disk cache of immutable Perforce data.
+
+Submitted changelists don't change: their specs, their describe output
+(including the file list), and `p4 changes` results over a range of
+changes that are all in the past.  A _P4OOPersistentCache keeps those in
+a local SQLite file, so repeated runs only ask the server for what's new:
+
+    p4Conn = _P4OOP4Python(p4PythonObj=p4Handle,
+                           persistentCache=_P4OOPersistentCache("p4oo.db"))
+    p4Changes = P4OOChangeSet(_p4Conn=p4Conn).query(
+                    files="//depot/...@1,@2000000", status="submitted")
+
+Pending and shelved changes are cached too, but only for pendingTTL
+seconds.  Anything else goes straight to the server.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# P4Python
+from P4 import Spec
+
+from P4OO._Base import _flattenArgs
+
+
+class _P4OOPersistentCache():
+    """ SQLite-backed cache of submitted change data
+
+        Args:
+            dbFile (str): SQLite database file, created if necessary
+            pendingTTL (float): Seconds data about pending or shelved
+                changes is kept
+            counterTTL (float): Seconds the server's change counter is
+                trusted for deciding if a change range is closed
+    """
+
+    # Spec types whose submitted specs are immutable
+    _IMMUTABLE_SPECS = ('change',)
+
+    # Last revision specifier of a file argument ending in a change number:
+    # //depot/...@100, //depot/...@=100, //depot/...@1,@100
+    _CLOSED_RANGE_RE = re.compile(r'@=?(?:[^@,]*,@?)?(\d+)$')
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS specs ("
+        " specType TEXT NOT NULL, specID TEXT NOT NULL, expires REAL,"
+        " spec TEXT NOT NULL, PRIMARY KEY (specType, specID))",
+        "CREATE TABLE IF NOT EXISTS describes ("
+        " options TEXT NOT NULL, change INTEGER NOT NULL, expires REAL,"
+        " record TEXT NOT NULL, PRIMARY KEY (options, change))",
+        "CREATE TABLE IF NOT EXISTS queries ("
+        " queryKey TEXT PRIMARY KEY, expires REAL, records TEXT NOT NULL)",
+    )
+
+    def __init__(self, dbFile, pendingTTL=60, counterTTL=60):
+        self.dbFile = dbFile
+        self.pendingTTL = pendingTTL
+        self.counterTTL = counterTTL
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(dbFile, check_same_thread=False)
+        with self._db:
+            for statement in self._SCHEMA:
+                self._db.execute(statement)
+
+        self._lastChange = None
+        self._lastChangeExpires = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self):
+        """ Return a dict of the cache's hit/miss counters """
+
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    ######################################################################
+    # Specs
+    #
+    def getSpec(self, specType, specID):
+        """ Return the cached spec, or None """
+
+        if specType not in self._IMMUTABLE_SPECS:
+            return None
+
+        row = self._fetchOne("SELECT spec FROM specs WHERE specType = ?"
+                             " AND specID = ? AND (expires IS NULL"
+                             " OR expires > ?)",
+                             (specType, str(specID), time.time()))
+        if row is None:
+            return None
+
+        p4Spec = Spec()
+        # skip Spec.__setitem__ validation, these fields came from a Spec
+        dict.update(p4Spec, json.loads(row[0]))
+        return p4Spec
+
+    def putSpec(self, specType, specID, p4Spec):
+        if specType not in self._IMMUTABLE_SPECS or 'Status' not in p4Spec:
+            return
+
+        self._store("INSERT OR REPLACE INTO specs VALUES (?, ?, ?, ?)",
+                    (specType, str(specID),
+                     self._expires([{'status': p4Spec['Status']}]),
+                     json.dumps(dict(p4Spec))))
+
+    def invalidateSpec(self, specType, specID):
+        self._store("DELETE FROM specs WHERE specType = ? AND specID = ?",
+                    (specType, str(specID)))
+
+    ######################################################################
+    # Commands
+    #
+    def execCmd(self, p4Conn, p4SubCmd, args, p4Config):
+        """ Return p4Conn._execCmd(p4SubCmd, *args, **p4Config), using
+            cached output wherever it's known not to have changed.
+        """
+
+        flatArgs = _flattenArgs(args, dropEmpty=True)
+
+        if not p4Config or p4Config == {'tagged': 1}:
+            if p4SubCmd == "describe":
+                return self._execDescribe(p4Conn, flatArgs)
+
+            if p4SubCmd == "changes" and self._isClosed(p4Conn, flatArgs):
+                return self._execChanges(p4Conn, flatArgs)
+
+        return p4Conn._execCmd(p4SubCmd, *args, **p4Config)
+
+    def _execDescribe(self, p4Conn, flatArgs):
+        options = [arg for arg in flatArgs if str(arg).startswith("-")]
+        changes = [str(arg) for arg in flatArgs
+                   if not str(arg).startswith("-")]
+
+        if "-m" in options or not all(change.isdigit() for change in changes):
+            return p4Conn._execCmd("describe", flatArgs)
+
+        optionKey = " ".join(options)
+        now = time.time()
+
+        records = {}
+        with self._lock:
+            for (change, record) in self._db.execute(
+                    "SELECT change, record FROM describes WHERE options = ?"
+                    " AND change IN (%s) AND (expires IS NULL OR expires > ?)"
+                    % ",".join("?" * len(changes)),
+                    [optionKey] + changes + [now]):
+                records[str(change)] = json.loads(record)
+
+            self.hits += len(records)
+            self.misses += len(changes) - len(records)
+
+        missing = [change for change in changes if change not in records]
+        if missing:
+            p4Out = p4Conn._execCmd("describe", options + missing)
+
+            rows = []
+            for record in p4Out:
+                change = str(record.get('change'))
+                records[change] = record
+                rows.append((optionKey, int(change), self._expires([record]),
+                             json.dumps(record)))
+            self._store("INSERT OR REPLACE INTO describes"
+                        " VALUES (?, ?, ?, ?)", rows, many=True)
+
+        return [records[change] for change in changes if change in records]
+
+    def _execChanges(self, p4Conn, flatArgs):
+        queryKey = json.dumps(["changes"] + flatArgs)
+
+        row = self._fetchOne("SELECT records FROM queries WHERE queryKey = ?"
+                             " AND (expires IS NULL OR expires > ?)",
+                             (queryKey, time.time()))
+        if row is not None:
+            return json.loads(row[0])
+
+        p4Out = p4Conn._execCmd("changes", flatArgs)
+
+        if all(isinstance(record, dict) for record in p4Out):
+            self._store("INSERT OR REPLACE INTO queries VALUES (?, ?, ?)",
+                        (queryKey, self._expires(p4Out), json.dumps(p4Out)))
+
+        return p4Out
+
+    def _isClosed(self, p4Conn, flatArgs):
+        """ A changes query is closed if every file argument ends at a
+            change that already exists.  Anything submitted later gets a
+            higher change number.
+        """
+
+        # File arguments are those not following an option taking a value
+        fileArgs = []
+        skipNext = False
+        for arg in flatArgs:
+            arg = str(arg)
+            if skipNext:
+                skipNext = False
+            elif arg.startswith("-"):
+                skipNext = arg in ("-c", "-e", "-m", "-s", "-u")
+            else:
+                fileArgs.append(arg)
+
+        if not fileArgs:
+            return False
+
+        lastChanges = []
+        for fileArg in fileArgs:
+            match = self._CLOSED_RANGE_RE.search(fileArg)
+            if match is None:
+                return False
+            lastChanges.append(int(match.group(1)))
+
+        return max(lastChanges) <= self._getLastChange(p4Conn,
+                                                       max(lastChanges))
+
+    def _getLastChange(self, p4Conn, wanted):
+        """ Return the server's change counter, re-reading it if it's
+            stale or too low for wanted.
+        """
+
+        if self._lastChange is None or wanted > self._lastChange \
+          or time.time() > self._lastChangeExpires:
+            p4Out = p4Conn._execCmd("counter", "change")
+            self._lastChange = int(p4Out[0]['value'])
+            self._lastChangeExpires = time.time() + self.counterTTL
+
+        return self._lastChange
+
+    ######################################################################
+    # Internal Methods
+    #
+    def _expires(self, records):
+        """ Submitted change data never expires, anything else gets
+            pendingTTL.
+        """
+
+        if all(record.get('status') == "submitted" for record in records):
+            return None
+        return time.time() + self.pendingTTL
+
+    def _fetchOne(self, query, params):
+        with self._lock:
+            row = self._db.execute(query, params).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return row
+
+    def _store(self, statement, params, many=False):
+        with self._lock, self._db:
+            if many:
+                self._db.executemany(statement, params)
+            else:
+                self._db.execute(statement, params)
@@ -16,7 +16,7 @@ from dataclasses import dataclass, field, InitVar
 from P4OO._Base import _P4OOBase
 from P4OO._OrderedSet import OrderedSet
 
-@dataclass(repr=False, eq=False, order=False, init=False)
+@dataclass(repr=False, eq=False, order=False)
 class _P4OOSet(OrderedSet, _P4OOBase):
     """ _P4OOSet provides common behaviors for grouping of all P4OO Spec-based
         objects.
@@ -36,6 +36,18 @@ class _P4OOSet(OrderedSet, _P4OOBase):
 #        _P4OOBase.__init__(self)
         OrderedSet.__init__(self, iterable)
 
+    def _from_iterable(self, iterable):
+        """ Sets produced by set operators and slicing are the same type as
+            self, and share its connection.
+        """
+
+        newSet = self.__class__(iterable=iterable)
+        newSet._p4Conn = self._p4Conn
+        newSet.p4PythonObj = self.p4PythonObj
+        newSet.p4Pool = self.p4Pool
+        newSet.p4SQLDbh = self.p4SQLDbh
+        return newSet
+
 # TODO - document this
     def addObjects(self, objectsToAdd):
 
@@ -64,7 +76,17 @@ class _P4OOSet(OrderedSet, _P4OOBase):
 
         return [item._uniqueID() for item in self]
 
-    def _query(self, setObjType=None, **kwargs):
+    def toFrame(self, attrNames=None, useNumpy=None):
+        """ Return a _P4OOFrame, a columnar view of our objects' ids and
+            query output attributes (or just attrNames) for filtering,
+            sorting and grouping without looping over the objects.
+        """
+        from P4OO._Frame import _P4OOFrame
+
+        return _P4OOFrame.fromObjects(self, attrNames=attrNames,
+                                      useNumpy=useNumpy)
+
+    def _query(self, setObjType=None, stream=False, **kwargs):
         """ _query() is an instance method, but returns another, possibly
             unrelated object.
 
@@ -76,7 +98,39 @@ class _P4OOSet(OrderedSet, _P4OOBase):
 
             Instantiating a _Set object just for this purpose is cheap,
             but is not free.  So sorry.
+
+            With stream=True, a generator of P4OO objects is returned
+            instead of a Set, yielding each object as Perforce delivers it
+            (see _P4OOP4Python.iterCommand).  Memory use stays bounded no
+            matter how large the result, and breaking out of the loop early
+            stops the command.
         """
 
         p4ConnObj = self._getP4Connection()
+
+        if stream:
+            return p4ConnObj.iterCommand(setObjType, **kwargs)
+
         return p4ConnObj.runCommand(setObjType, **kwargs)
+
+    def queryAsync(self, stream=False, **kwargs):
+        """ asyncio form of query(), taking the same arguments.
+
+            Returns an awaitable for the resulting Set or, with
+            stream=True, an async iterator of P4OO objects:
+
+            p4Changes = await P4OOChangeSet(p4Pool=p4Pool).queryAsync(
+                         status="pending")
+
+            async for p4Change in P4OOChangeSet(p4Pool=p4Pool).queryAsync(
+                                   files="//...", stream=True):
+                ...
+        """
+
+        p4ConnObj = self._getP4Connection()
+
+        if stream:
+            # Nothing runs until the stream is first iterated
+            return p4ConnObj.iterAsync(self.query(stream=True, **kwargs))
+
+        return p4ConnObj.callAsync(self.query, **kwargs)
@@ -0,0 +1,223 @@
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._SlowLog.py
+#
+######################################################################
+
+"""
+Slow-command log for a P4OO connection.
+
+With a _P4OOSlowLog on a connection, every command taking longer than
+its threshold is logged as one line: the command, its (truncated)
+arguments, how many records it returned, the P4OO object that ran it
+and a summary of the calling code, even with debug logging off:
+
+    slowLog = _P4OOSlowLog(threshold=2.0, path="/var/log/p4oo-slow.log")
+    p4Conn = _P4OOP4Python(p4PythonObj=p4Handle, slowLog=slowLog)
+
+    P4OOLabel(id="nightly", _p4Conn=p4Conn).getChangesFromLabels(...)
+    # 7.412s changes args=['-l', '//...@nightly,@now'] records=80211
+    #   object=P4OOChange(id='80211') caller=nightly.py:41 report <- ...
+
+Logged commands go to a rotating file at path, to callback(slowCommand)
+or, with neither, to the "P4OO.slowlog" logger at WARNING level.
+Commands under the threshold cost one clock read either side, and
+streamed commands a look at their callers before they start.
+"""
+
+import contextvars
+import logging
+import logging.handlers
+import os.path
+import sys
+import time
+from dataclasses import dataclass, field
+
+from P4OO._Base import _P4OOBase, _flattenArgs
+from P4OO._Connection import _P4OOConnection
+
+
+# Frames from our own underscore modules and these stdlib ones are
+# plumbing, not callers
+_P4OO_DIR = os.path.dirname(os.path.abspath(__file__))
+_PLUMBING_MODULES = ('contextlib.py', 'functools.py', 'threading.py',
+                     'thread.py')
+
+# Callers of a streamed command, noted before it moves to a thread of its
+# own, where they're no longer on the stack
+_streamCallers = contextvars.ContextVar("P4OO slow log stream callers",
+                                        default=None)
+
+
+@dataclass
+class _P4OOSlowCommand:
+    """ One command over the slow log threshold.  error is the exception
+        the command failed with, if any.
+    """
+    cmdName: str
+    seconds: float
+    args: list
+    records: int
+    p4ooObject: str = None
+    callerStack: list = field(default_factory=list)
+    error: str = None
+    startTime: float = None
+
+    def format(self):
+        """ Return this command as a single log line """
+
+        line = "%.3fs %s args=%s records=%d" % (self.seconds, self.cmdName,
+                                               self.args, self.records)
+        if self.p4ooObject is not None:
+            line += " object=" + self.p4ooObject
+        if self.callerStack:
+            line += " caller=" + " <- ".join(self.callerStack)
+        if self.error is not None:
+            line += " error=" + self.error
+        return line
+
+
+class _P4OOSlowLog():
+    """ Logs commands taking longer than threshold seconds, shared by any
+        connections given the same instance
+
+        Args:
+            threshold (float): Seconds a command has to take to be logged
+            path (str): Rotating log file to write to
+            callback (callable): Called with each _P4OOSlowCommand instead
+                of writing to a log
+            maxBytes (int): Size at which the log file is rotated
+            backupCount (int): Rotated log files kept
+            maxArgs (int): Arguments logged per command
+            maxArgLength (int): Characters logged per argument
+            stackDepth (int): Calling frames logged per command
+    """
+
+    def __init__(self, threshold=1.0, path=None, callback=None,
+                 maxBytes=10*1024*1024, backupCount=5, maxArgs=10,
+                 maxArgLength=200, stackDepth=4):
+        self.threshold = threshold
+        self.callback = callback
+        self.maxArgs = maxArgs
+        self.maxArgLength = maxArgLength
+        self.stackDepth = stackDepth
+
+        if path is not None:
+            self._logger = logging.Logger("P4OO.slowlog." + path)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=maxBytes, backupCount=backupCount,
+                encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self._logger.addHandler(handler)
+        else:
+            self._logger = logging.getLogger("P4OO.slowlog")
+
+    def close(self):
+        """ Close our log file, if we have one """
+        for handler in list(self._logger.handlers):
+            if isinstance(handler, logging.handlers.RotatingFileHandler):
+                handler.close()
+                self._logger.removeHandler(handler)
+
+    def runCommand(self, p4Conn, p4SubCmd, args, p4Config, runCmd):
+        """ Return runCmd(), logging it if it takes threshold or longer """
+
+        startTime = time.monotonic()
+        p4Out = None
+        error = None
+        try:
+            p4Out = runCmd()
+            return p4Out
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            seconds = time.monotonic() - startTime
+            if seconds >= self.threshold:
+                # Streamed output went to the handler instead
+                records = (len(p4Out) if p4Out is not None else 0) \
+                    + getattr(p4Config.get('handler'), 'delivered', 0)
+                self.log(self._describe(p4SubCmd, args, seconds, records,
+                                        error, startTime))
+
+    def noteCallers(self, context, frame):
+        """ Note the callers from frame out in context, for commands run
+            in it on another thread to be logged against
+        """
+        context.run(_streamCallers.set, self._inspectCallers(frame))
+
+    def log(self, slowCommand):
+        if self.callback is not None:
+            self.callback(slowCommand)
+        else:
+            self._logger.warning(slowCommand.format())
+
+    def _describe(self, p4SubCmd, args, seconds, records, error, startTime):
+        callers = _streamCallers.get()
+        if callers is None:
+            callers = self._inspectCallers(sys._getframe(2))
+        (p4ooObject, callerStack) = callers
+
+        return _P4OOSlowCommand(
+            cmdName=p4SubCmd, seconds=seconds,
+            args=self._truncateArgs(args), records=records,
+            p4ooObject=p4ooObject, callerStack=callerStack,
+            error=None if error is None
+            else "%s: %s" % (type(error).__name__,
+                             self._truncate(str(error).strip())),
+            startTime=startTime)
+
+    def _truncateArgs(self, args):
+        args = _flattenArgs(args)
+        loggedArgs = [self._truncate(arg if isinstance(arg, str)
+                                     else repr(arg))
+                      for arg in args[:self.maxArgs]]
+        if len(args) > self.maxArgs:
+            loggedArgs.append("...(%d more)" % (len(args) - self.maxArgs))
+        return loggedArgs
+
+    def _truncate(self, text):
+        if len(text) <= self.maxArgLength:
+            return text
+        return text[:self.maxArgLength] + "...(%d chars)" % len(text)
+
+    def _inspectCallers(self, frame):
+        """ Return a description of the innermost P4OO object on the stack
+            from frame out, and the innermost stackDepth frames that
+            aren't P4OO plumbing.
+        """
+
+        p4ooObject = None
+        callerStack = []
+        while frame is not None and (p4ooObject is None
+                                     or len(callerStack) < self.stackDepth):
+            code = frame.f_code
+            if p4ooObject is None:
+                frameSelf = frame.f_locals.get('self')
+                if isinstance(frameSelf, _P4OOBase) \
+                  and not isinstance(frameSelf, _P4OOConnection):
+                    p4ooObject = _describeObject(frameSelf)
+
+            fileName = os.path.basename(code.co_filename)
+            if fileName in _PLUMBING_MODULES:
+                internal = True
+            else:
+                internal = fileName.startswith("_") and os.path.dirname(
+                    os.path.abspath(code.co_filename)) == _P4OO_DIR
+            if not internal and len(callerStack) < self.stackDepth:
+                callerStack.append("%s:%d %s" % (fileName, frame.f_lineno,
+                                                 code.co_name))
+            frame = frame.f_back
+
+        return (p4ooObject, callerStack)
+
+
+def _describeObject(p4ooObject):
+    className = type(p4ooObject).__name__
+    objectID = getattr(p4ooObject, 'id', None)
+    if objectID is not None:
+        return "%s(id=%r)" % (className, objectID)
+    if hasattr(p4ooObject, '__len__'):
+        return "%s(%d objects)" % (className, len(p4ooObject))
+    return className
@@ -0,0 +1,135 @@
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._SpecCache.py
+#
+######################################################################
+
+"""
+Spec read cache shared by all objects using one connection.
+
+Without a cache, every P4OO object reads its own spec, so a report that
+touches the same user through 300 different changes reads that user
+300 times.  With a _P4OOSpecCache on the connection, readSpec serves
+repeat reads of the same (spec type, id) from memory:
+
+    p4Conn = _P4OOP4Python(p4PythonObj=p4Handle,
+                           specCache=_P4OOSpecCache(maxSize=5000, ttl=600))
+    p4UserObj = P4OOUser(id="alice", _p4Conn=p4Conn)
+
+saveSpec, refreshSpec and deleteSpec on that connection invalidate the
+spec they touch, and commands that open, revert, shelve or submit files
+through it invalidate all changes.  Changes made outside of it are only
+noticed once the entry's ttl expires.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# P4Python
+from P4 import Spec
+
+
+class _P4OOSpecCache():
+    """ Thread-safe LRU cache of P4Python specs keyed by (spec type, id)
+
+        Args:
+            maxSize (int): Maximum number of specs kept, least recently
+                used are evicted first
+            ttl (float): Seconds a spec is served from the cache, None for
+                no expiry
+    """
+
+    def __init__(self, maxSize=1000, ttl=300):
+        self.maxSize = maxSize
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._specs = OrderedDict()     # (specType, specID) --> (expires, spec)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, specType, specID):
+        """ Return a copy of the cached spec, or None """
+
+        key = (specType, str(specID))
+        with self._lock:
+            entry = self._specs.get(key)
+            if entry is not None:
+                (expires, p4Spec) = entry
+                if expires is None or expires > time.monotonic():
+                    self._specs.move_to_end(key)
+                    self.hits += 1
+                    return _copySpec(p4Spec)
+
+                del self._specs[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, specType, specID, p4Spec):
+        """ Cache a copy of p4Spec """
+
+        key = (specType, str(specID))
+        expires = None
+        if self.ttl is not None:
+            expires = time.monotonic() + self.ttl
+
+        with self._lock:
+            self._specs[key] = (expires, _copySpec(p4Spec))
+            self._specs.move_to_end(key)
+
+            while len(self._specs) > self.maxSize:
+                self._specs.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, specType, specID):
+        """ Drop any cached spec for (specType, specID) """
+
+        with self._lock:
+            self._specs.pop((specType, str(specID)), None)
+
+    def invalidateType(self, specType):
+        """ Drop all cached specs of specType """
+
+        with self._lock:
+            for key in [key for key in self._specs if key[0] == specType]:
+                del self._specs[key]
+
+    def clear(self):
+        """ Drop all cached specs """
+
+        with self._lock:
+            self._specs.clear()
+
+    def stats(self):
+        """ Return a dict of the cache's size and counters """
+
+        with self._lock:
+            return {'size': len(self._specs),
+                    'maxSize': self.maxSize,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions}
+
+
+def _copySpec(p4Spec):
+    """ Return a copy of p4Spec safe from changes to the original, keeping
+        its P4.Spec field map if it has one.
+    """
+
+    specDict = {key: (list(value) if isinstance(value, list) else value)
+                for (key, value) in p4Spec.items()}
+
+    if isinstance(p4Spec, Spec):
+        specCopy = Spec(p4Spec.permitted_fields())
+        # skip Spec.__setitem__ validation, these fields came from a Spec
+        dict.update(specCopy, specDict)
+        if 'comment' in p4Spec.__dict__:
+            specCopy.comment = p4Spec.comment
+        return specCopy
+
+    return specDict
@@ -16,7 +16,7 @@ objects.
 import json
 import datetime
 from dataclasses import dataclass, field
-from P4OO._Base import _P4OOBase
+from P4OO._Base import _P4OOBase, _SLOTS
 from P4OO.Exceptions import P4OOFatal
 
 
@@ -29,13 +29,22 @@ class DateTimeJSONEncoder(json.JSONEncoder):
 
         return super().default(o)
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, **_SLOTS)
 class _P4OOSpecObj(_P4OOBase):
 
     id: str = field(default=None, compare=True)
     _modifiedSpec: dict = field(default=None, compare=False, repr=False)
     _p4SpecObj: dict = field(default=None, compare=False, repr=False)
 
+    # Attributes provided by query output, readable without a spec read,
+    # and the objects from the same output that can be hydrated with us
+    _hydratedAttrs: set = field(default=None, compare=False, repr=False)
+    _hydrationGroup: object = field(default=None, compare=False, repr=False)
+
+    # Query output we were created from, as (merge, p4OutHash), not yet
+    # translated into _modifiedSpec.  See _materializeOutput.
+    _rawOutput: tuple = field(default=None, compare=False, repr=False)
+
     # Subclasses must define SPECOBJ_TYPE
     _SPECOBJ_TYPE = None
 
@@ -59,13 +68,29 @@ class _P4OOSpecObj(_P4OOBase):
 
     def _getSpecAttr(self, attrName):
 
+        # Allow the caller to use any case for the spec attribute
+        lcAttrName = attrName.lower()
+
+        if self._rawOutput is not None:
+            self._materializeOutput()
+
+        # Attributes we already have from query output don't need the
+        # full spec.  Otherwise try to fetch them for our whole query
+        # output at once before falling back to reading our own spec.
+        if self._p4SpecObj is None and self._hydratedAttrs is not None:
+            if lcAttrName not in self._hydratedAttrs \
+              and self._hydrationGroup is not None:
+                p4ConnObj = self._getP4Connection()
+                p4ConnObj.hydrateSpecs(self._hydrationGroup.values(),
+                                       lcAttrName)
+
+            if lcAttrName in self._hydratedAttrs:
+                return self._modifiedSpec[lcAttrName]
+
         self.__initialize()
 
         modifiedSpec = self._modifiedSpec
 
-        # Allow the caller to use any case for the spec attribute
-        lcAttrName = attrName.lower()
-
         if lcAttrName not in modifiedSpec:
             specType = self._SPECOBJ_TYPE
             raise P4OOFatal("Invalid Spec attribute \"%s\" for type \"%s\"\n"
@@ -75,6 +100,8 @@ class _P4OOSpecObj(_P4OOBase):
 
     def _setSpecAttr(self, attrName, value):
 #        self.__initialize()
+        if self._rawOutput is not None:
+            self._materializeOutput()
 
         # Allow caller to create a new spec this way
         if self._modifiedSpec is None:
@@ -88,6 +115,8 @@ class _P4OOSpecObj(_P4OOBase):
         return value
 
     def _delSpecAttr(self, attrName):
+        if self._rawOutput is not None:
+            self._materializeOutput()
         self.__initialize()
 
         modifiedSpec = self._modifiedSpec
@@ -111,6 +140,8 @@ class _P4OOSpecObj(_P4OOBase):
         return p4ConnObj.deleteSpec(self, force)
 
     def _toJSON(self):
+        if self._rawOutput is not None:
+            self._materializeOutput()
         self.__initialize()
 
         return DateTimeJSONEncoder().encode(self._modifiedSpec)
@@ -118,6 +149,18 @@ class _P4OOSpecObj(_P4OOBase):
     ######################################################################
     # Internal (private) methods
     #
+    def _materializeOutput(self):
+        """ Translate the query output we were created from into
+            _modifiedSpec, on first use rather than for every object a
+            query returns.
+        """
+
+        rawOutput = self._rawOutput
+        if rawOutput is not None:
+            self._rawOutput = None
+            (merge, p4OutHash) = rawOutput
+            merge(self, p4OutHash)
+
     def __initialize(self):
 
         if self._p4SpecObj is None:
@@ -0,0 +1,184 @@
+######################################################################
+#  Copyright (c)2024 David L. Armstrong.
+#
+#  P4OO._Track.py
+#
+######################################################################
+
+"""
+Server-side performance tracking (p4 -Ztrack) for a P4OO connection.
+
+With tracking on, the server reports for each command how long it took,
+how many rows it read and wrote in each db table, and how long it waited
+for and held table locks.  A _P4OOTrackStats on a connection parses that
+for every command and totals it by command and by spec type:
+
+    p4Conn = _P4OOP4Python(trackStats=_P4OOTrackStats())
+    p4UserObj = P4OOUser(id="alice", _p4Conn=p4Conn)
+    p4UserObj.deleteWithVengeance()
+    p4Conn.trackStats.get()             # {'changes': {...}, ...}
+    p4Conn.trackStats.getBySpecType()   # {'change': {...}, ...}
+
+The connection turns tracking on for P4 objects it connects itself.
+Tracking has to be set before connecting, so P4 objects passed in as
+p4PythonObj need track=1 set by the caller, and pools need track=1 in
+their P4 settings.
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+
+
+# Counters summed across tables and commands
+_TRACK_COUNTERS = ('rowsGet', 'rowsPos', 'rowsScan', 'rowsPut', 'rowsDel',
+                   'readLockWaitMs', 'readLockHeldMs', 'writeLockWaitMs',
+                   'writeLockHeldMs')
+
+_LAPSE_RE = re.compile(r'^lapse ([\d.]+)s')
+_TABLE_RE = re.compile(r'^(db\.\w+)$')
+_ROWS_RE = re.compile(r'rows get\+pos\+scan put\+del '
+                      r'(\d+)\+(\d+)\+(\d+) (\d+)\+(\d+)')
+_TOTAL_LOCK_RE = re.compile(r'^total lock wait\+held read/write '
+                            r'(\d+)ms\+(\d+)ms/(\d+)ms\+(\d+)ms')
+
+
+@dataclass
+class _P4OOTrackRecord:
+    """ Parsed tracking output of one command.  tables holds the same
+        counters for each db table the command touched.
+    """
+    cmdName: str = None
+    specType: str = None
+    lapseSeconds: float = 0.0
+    rowsGet: int = 0
+    rowsPos: int = 0
+    rowsScan: int = 0
+    rowsPut: int = 0
+    rowsDel: int = 0
+    readLockWaitMs: int = 0
+    readLockHeldMs: int = 0
+    writeLockWaitMs: int = 0
+    writeLockHeldMs: int = 0
+    tables: dict = field(default_factory=dict)
+
+
+def parseTrackOutput(trackOutput, cmdName=None, specType=None):
+    """ Return a _P4OOTrackRecord from P4Python's track_output lines """
+
+    trackRecord = _P4OOTrackRecord(cmdName=cmdName, specType=specType)
+    table = None
+
+    for line in trackOutput:
+        # Server logs prefix these with '--- ', P4Python may not
+        line = line.strip()
+        if line.startswith("---"):
+            line = line[3:].strip()
+
+        match = _LAPSE_RE.match(line)
+        if match:
+            trackRecord.lapseSeconds = float(match.group(1))
+            continue
+
+        match = _TABLE_RE.match(line)
+        if match:
+            table = trackRecord.tables.setdefault(
+                match.group(1), dict.fromkeys(_TRACK_COUNTERS, 0))
+            continue
+
+        if table is None:
+            continue
+
+        match = _ROWS_RE.search(line)
+        if match:
+            for (counter, value) in zip(_TRACK_COUNTERS[:5], match.groups()):
+                table[counter] += int(value)
+            continue
+
+        match = _TOTAL_LOCK_RE.match(line)
+        if match:
+            for (counter, value) in zip(_TRACK_COUNTERS[5:], match.groups()):
+                table[counter] += int(value)
+
+    for tableCounters in trackRecord.tables.values():
+        for counter in _TRACK_COUNTERS:
+            setattr(trackRecord, counter,
+                    getattr(trackRecord, counter) + tableCounters[counter])
+
+    return trackRecord
+
+
+class _P4OOTrackStats():
+    """ Thread-safe totals of _P4OOTrackRecords by command name and spec
+        type, shared by any connections given the same instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._byCommand = {}
+        self._bySpecType = {}
+        self._last = threading.local()
+
+    def record(self, trackRecord):
+        with self._lock:
+            _addRecord(self._byCommand, trackRecord.cmdName, trackRecord)
+            if trackRecord.specType is not None:
+                _addRecord(self._bySpecType, trackRecord.specType,
+                           trackRecord)
+        self._last.trackRecord = trackRecord
+
+    def lastRecord(self):
+        """ Return the _P4OOTrackRecord of the last command this thread
+            ran, or None
+        """
+        return getattr(self._last, 'trackRecord', None)
+
+    def get(self, cmdName=None):
+        """ Return totals for cmdName, or {cmdName: totals} for all """
+
+        with self._lock:
+            return _snapshot(self._byCommand, cmdName)
+
+    def getBySpecType(self, specType=None):
+        """ Return totals for specType, or {specType: totals} for all """
+
+        with self._lock:
+            return _snapshot(self._bySpecType, specType)
+
+    def reset(self):
+        with self._lock:
+            self._byCommand = {}
+            self._bySpecType = {}
+
+
+def _addRecord(totals, key, trackRecord):
+    keyTotals = totals.get(key)
+    if keyTotals is None:
+        keyTotals = totals[key] = dict.fromkeys(_TRACK_COUNTERS, 0)
+        keyTotals.update(calls=0, lapseSeconds=0.0, tables={})
+
+    keyTotals['calls'] += 1
+    keyTotals['lapseSeconds'] += trackRecord.lapseSeconds
+    for counter in _TRACK_COUNTERS:
+        keyTotals[counter] += getattr(trackRecord, counter)
+
+    for (tableName, tableCounters) in trackRecord.tables.items():
+        tableTotals = keyTotals['tables'].setdefault(
+            tableName, dict.fromkeys(_TRACK_COUNTERS, 0))
+        for counter in _TRACK_COUNTERS:
+            tableTotals[counter] += tableCounters[counter]
+
+
+def _snapshot(totals, key):
+    def copyTotals(keyTotals):
+        keyCopy = dict(keyTotals)
+        keyCopy['tables'] = {tableName: dict(tableCounters)
+                             for (tableName, tableCounters)
+                             in keyTotals['tables'].items()}
+        return keyCopy
+
+    if key is not None:
+        keyTotals = totals.get(key)
+        return None if keyTotals is None else copyTotals(keyTotals)
+
+    return {key: copyTotals(keyTotals) for (key, keyTotals) in totals.items()}
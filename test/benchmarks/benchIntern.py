@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/benchmarks/benchIntern.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+Benchmark the memory held by parsed query output with and without
+_P4OOP4Python's intern table, on synthetic output where every value is
+a fresh string, as P4Python returns them.
+
+`changes` and `clients` output is kept by each spec object until it's
+read.  `opened -a` only keeps each file's (unique) clientFile, so it
+should come out the same either way.
+
+Usage: benchIntern.py [recordCount]   (default 1000000)
+'''
+
+######################################################################
+# Includes
+#
+import gc
+import sys
+import time
+import tracemalloc
+
+from P4OO._P4Python import _P4OOP4Python
+
+
+######################################################################
+# Configuration
+#
+recordCount = 1000000
+
+userCount = 300
+clientCount = 2000
+hostCount = 50
+
+
+def fresh(value):
+    """ A new str object equal to value, as P4Python would hand us """
+    return value.encode().decode()
+
+
+def makeChangesOutput(count):
+    return [{"change": fresh(str(count - i)),
+             "time": fresh(str(1700000000 + i // 10)),
+             "user": fresh("user%d" % (i % userCount)),
+             "client": fresh("ws%d" % (i % clientCount)),
+             "status": fresh("submitted"),
+             "changeType": fresh("public"),
+             "desc": fresh("change %d\n" % (count - i)),
+            } for i in range(count)]
+
+
+def makeClientsOutput(count):
+    return [{"client": fresh("ws%d" % i),
+             "Update": fresh(str(1700000000 + i // 10)),
+             "Access": fresh(str(1700000000 + i // 10)),
+             "Owner": fresh("user%d" % (i % userCount)),
+             "Host": fresh("host%d" % (i % hostCount)),
+             "Root": fresh("/ws/%d" % i),
+             "Options": fresh("noallwrite noclobber nocompress unlocked"),
+             "Description": fresh("Created by user%d.\n" % (i % userCount)),
+            } for i in range(count)]
+
+
+def makeOpenedOutput(count):
+    return [{"depotFile": fresh("//depot/main/src/dir%d/file%d.c"
+                                % (i % 100, i)),
+             "clientFile": fresh("//ws%d/src/dir%d/file%d.c"
+                                 % (i % clientCount, i % 100, i)),
+             "rev": fresh(str(i % 7 + 1)),
+             "haveRev": fresh(str(i % 7 + 1)),
+             "action": fresh("edit" if i % 5 else "add"),
+             "change": fresh("default" if i % 3 else str(1000 + i % 50)),
+             "type": fresh("text" if i % 4 else "binary+F"),
+             "user": fresh("user%d" % (i % userCount)),
+             "client": fresh("ws%d" % (i % clientCount)),
+            } for i in range(count)]
+
+
+def benchParse(cmdName, makeOutput, interned):
+    """ Return (bytes retained, seconds) parsing recordCount records """
+
+    p4Conn = _P4OOP4Python()
+    p4Conn._initialize()
+    if not interned:
+        p4Conn._INTERN_FIELDS = frozenset()
+
+    # Timed untraced, since tracing slows everything down
+    p4Out = makeOutput(recordCount)
+    gc.collect()
+    start = time.perf_counter()
+    setObj = p4Conn._parseOutput(cmdName, p4Out)
+    elapsed = time.perf_counter() - start
+    del p4Out, setObj
+    p4Conn._internTable.clear()
+
+    gc.collect()
+    # Measure everything the parsed set and the connection hold onto,
+    # including the intern table and what's left of the raw output
+    tracemalloc.start()
+    p4Out = makeOutput(recordCount)
+    setObj = p4Conn._parseOutput(cmdName, p4Out)
+    del p4Out
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del setObj
+
+    return (retained, elapsed)
+
+
+######################################################################
+# MAIN
+#
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        recordCount = int(sys.argv[1])
+
+    print("%d records" % recordCount)
+    for (cmdName, makeOutput) in (("changes", makeChangesOutput),
+                                  ("clients", makeClientsOutput),
+                                  ("opened", makeOpenedOutput)):
+        results = {}
+        for interned in (False, True):
+            results[interned] = benchParse(cmdName, makeOutput, interned)
+            (retained, elapsed) = results[interned]
+            print("  %-24s %9.1f MB %9.1f bytes/record %9.3fs parse"
+                  % ("%s%s" % (cmdName, " interned" if interned else ""),
+                     retained / 1e6, retained / recordCount, elapsed))
+        print("  %-24s %9.1f%%" % ("reduction",
+                                   (1 - results[True][0] / results[False][0])
+                                   * 100))
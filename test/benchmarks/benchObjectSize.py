@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/benchmarks/benchObjectSize.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+Measure the memory each P4OO object type costs, as created from query
+output: an ID and a connection shared with the rest of its set.  IDs
+are built before measuring, so only the objects themselves count.
+
+Usage: benchObjectSize.py [objectCount]   (default 1000000)
+'''
+
+######################################################################
+# Includes
+#
+import gc
+import sys
+import tracemalloc
+
+from P4OO._P4Python import _P4OOP4Python
+from P4OO.Change import P4OOChange
+from P4OO.Client import P4OOClient
+from P4OO.Counter import P4OOCounter
+from P4OO.File import P4OOFile
+from P4OO.Label import P4OOLabel
+from P4OO.User import P4OOUser
+
+
+######################################################################
+# Configuration
+#
+objectCount = 1000000
+
+objectTypes = (
+    (P4OOFile, lambda i: "//depot/main/src/file%d.c" % i),
+    (P4OOChange, lambda i: i),
+    (P4OOClient, lambda i: "ws%d" % i),
+    (P4OOUser, lambda i: "user%d" % i),
+    (P4OOLabel, lambda i: "label%d" % i),
+    (P4OOCounter, lambda i: "counter%d" % i),
+)
+
+
+def benchObjectType(objectClass, makeID, p4Conn):
+    objectIDs = [makeID(i) for i in range(objectCount)]
+
+    gc.collect()
+    tracemalloc.start()
+    objects = []
+    for objectID in objectIDs:
+        p4Object = objectClass(id=objectID)
+        p4Object._p4Conn = p4Conn
+        objects.append(p4Object)
+    # The list holding them isn't part of their cost
+    retained = tracemalloc.get_traced_memory()[0] \
+        - sys.getsizeof(objects)
+    tracemalloc.stop()
+
+    print("%-12s %8.1f bytes/object" % (objectClass.__name__,
+                                        retained / objectCount))
+
+
+######################################################################
+# MAIN
+#
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        objectCount = int(sys.argv[1])
+
+    p4Conn = _P4OOP4Python()
+    for (objectClass, makeID) in objectTypes:
+        benchObjectType(objectClass, makeID, p4Conn)
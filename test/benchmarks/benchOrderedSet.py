@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/benchmarks/benchOrderedSet.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+Benchmark the OrderedSet backing store of _P4OOSet on sets of P4OOFile
+objects, comparing the dict-backed OrderedSet with the original linked
+list implementation (reproduced here as LegacyOrderedSet).
+
+Usage: benchOrderedSet.py [memberCount]   (default 1000000)
+'''
+
+######################################################################
+# Includes
+#
+import collections.abc
+import gc
+import sys
+import time
+import tracemalloc
+
+from P4OO._OrderedSet import OrderedSet
+from P4OO.File import P4OOFile
+
+
+######################################################################
+# Configuration
+#
+memberCount = 1000000
+
+# Positional lookups to time; the legacy set walks its list for each one
+indexLookups = 200
+
+KEY, PREV, NEXT = range(3)
+
+
+class LegacyOrderedSet(collections.abc.MutableSet):
+    """ The linked list OrderedSet _P4OOSet used to be built on """
+
+    def __init__(self, iterable=None):
+        self.end = end = []
+        end += [None, end, end]
+        self.map = {}
+        if iterable is not None:
+            self |= iterable
+
+    def __len__(self):
+        return len(self.map)
+
+    def __contains__(self, key):
+        return key in self.map
+
+    def add(self, key):
+        if key not in self.map:
+            end = self.end
+            curr = end[PREV]
+            curr[NEXT] = end[PREV] = self.map[key] = [key, curr, end]
+
+    def discard(self, key):
+        if key in self.map:
+            key, prevItem, nextItem = self.map.pop(key)
+            prevItem[NEXT] = nextItem
+            nextItem[PREV] = prevItem
+
+    def __getitem__(self, key):
+        counter = 0
+        if key >= 0:
+            item = self.end
+            while counter <= key:
+                item = item[NEXT]
+                counter += 1
+            return item[KEY]
+        item = self.end
+        while counter > key:
+            item = item[PREV]
+            counter -= 1
+        return item[KEY]
+
+    def __iter__(self):
+        end = self.end
+        curr = end[NEXT]
+        while curr is not end:
+            yield curr[KEY]
+            curr = curr[NEXT]
+
+    def __del__(self):
+        self.clear()
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print("  %-34s %9.3fs" % (label, time.perf_counter() - start))
+    return result
+
+
+def benchSetType(setClass, files, otherFiles):
+    print(setClass.__name__)
+
+    gc.collect()
+    tracemalloc.start()
+    fileSet = timed("build %d" % len(files), lambda: setClass(files))
+    print("  %-34s %9.1f bytes/member"
+          % ("memory", tracemalloc.get_traced_memory()[0] / len(files)))
+    tracemalloc.stop()
+
+    otherSet = setClass(otherFiles)
+    step = len(files) // indexLookups
+    timed("%d positional lookups" % indexLookups,
+          lambda: [fileSet[i] for i in range(0, len(files), step)])
+    timed("union", lambda: fileSet | otherSet)
+    timed("intersection", lambda: fileSet & otherSet)
+    timed("difference", lambda: fileSet - otherSet)
+    timed("equality", lambda: fileSet == setClass(files))
+    timed("teardown", lambda: fileSet.__del__() if hasattr(fileSet, '__del__')
+          else fileSet.clear())
+
+
+######################################################################
+# MAIN
+#
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        memberCount = int(sys.argv[1])
+
+    files = [P4OOFile(id="//depot/main/src/file%d.c" % i)
+             for i in range(memberCount)]
+
+    # half overlapping with files
+    otherFiles = files[memberCount // 2:] \
+        + [P4OOFile(id="//depot/rel/src/file%d.c" % i)
+           for i in range(memberCount // 2)]
+
+    benchSetType(OrderedSet, files, otherFiles)
+    benchSetType(LegacyOrderedSet, files, otherFiles)
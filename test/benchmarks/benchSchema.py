@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/benchmarks/benchSchema.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+Benchmark the per-command overhead of loading the p4Config.yml schema.
+
+Every _P4OOP4Python entry point (readSpec, runCommand, _parseOutput,
+readCounter, setCounter, deleteSpec) calls _initialize() first.  This
+compares re-parsing the YAML on each call (the old behavior) with the
+process-wide cached schema.  No Perforce server is needed.
+'''
+
+######################################################################
+# Includes
+#
+import os
+import timeit
+
+import P4OO._P4PythonSchema
+from P4OO._P4PythonSchema import _P4OOP4PythonSchema
+from P4OO._P4Python import _P4OOP4Python
+
+
+######################################################################
+# Configuration
+#
+configFile = os.path.dirname(P4OO._P4PythonSchema.__file__) + "/p4Config.yml"
+
+
+def benchUncached(number):
+    return timeit.timeit(lambda: _P4OOP4PythonSchema(configFile=configFile),
+                         number=number) / number
+
+
+def benchCached(number):
+    p4Conn = _P4OOP4Python()
+    return timeit.timeit(p4Conn._initialize, number=number) / number
+
+
+######################################################################
+# MAIN
+#
+if __name__ == '__main__':
+    before = benchUncached(50)
+    after = benchCached(100000)
+
+    print("schema load per command, re-parsed: %10.1f us" % (before * 1e6))
+    print("schema load per command, cached:    %10.3f us" % (after * 1e6))
+    print("speedup:                            %10.0fx" % (before / after))
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/benchmarks/benchSuite.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+Benchmark suite for the P4OO hot paths, on synthetic P4Python-shaped
+output from 1k to 1M records.  No Perforce server is needed.
+
+Each benchmark reports its best wall time and its peak traced memory
+(measured in a separate run, since tracing slows everything down).
+Results can be saved as a baseline and later runs compared against it;
+any benchmark slower or larger than the baseline by more than the
+tolerance is reported and makes the suite exit non-zero.  Timings only
+compare meaningfully on the same machine.
+
+Usage: benchSuite.py [--sizes 1000,10000,100000,1000000] [--only NAME]
+                     [--save BASELINE.json] [--compare BASELINE.json]
+                     [--tolerance 0.25]
+'''
+
+######################################################################
+# Includes
+#
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from P4OO._P4Python import _P4OOP4Python
+from P4OO._P4PythonSchema import _P4OOP4PythonSchema
+from P4OO.File import P4OOFile, P4OOFileSet
+
+
+######################################################################
+# Configuration
+#
+defaultSizes = (1000, 10000, 100000, 1000000)
+
+# Timing runs per benchmark, fewer for the big ones
+maxRepeat = 5
+repeatBudget = 200000
+
+# Tiny measurements are mostly noise, ignore differences smaller than these
+timeSlack = 0.002
+memorySlack = 64 * 1024
+
+# Records per distinct second-resolution timestamp, as in a busy server's
+# changes/clients output
+recordsPerSecond = 10
+
+importModules = ("P4OO.Change", "P4OO.Client", "P4OO.File", "P4OO.Label",
+                 "P4OO.User", "P4OO.Group", "P4OO.Counter")
+
+# What a trigger does before its first command: import what it uses and
+# load the command schema
+startupStatements = ("import P4OO.Change, P4OO._P4Python\n"
+                     "from P4OO._P4PythonSchema import _P4OOP4PythonSchema\n"
+                     "_P4OOP4PythonSchema.getCachedSchema()")
+
+
+######################################################################
+# Synthetic P4Python output
+#
+def makeChangesOutput(count):
+    return [{"change": str(count - i),
+             "time": str(1700000000 + i // recordsPerSecond),
+             "user": "user%d" % (i % 300),
+             "client": "ws%d" % (i % 500),
+             "status": "submitted",
+             "changeType": "public",
+             "desc": "change %d\n" % (count - i),
+            } for i in range(count)]
+
+
+def makeClientsOutput(count):
+    return [{"client": "ws%d" % i,
+             "Update": str(1700000000 + i // recordsPerSecond),
+             "Access": str(1700000000 + i // recordsPerSecond),
+             "Owner": "user%d" % (i % 300),
+             "Host": "host%d" % (i % 50),
+             "Root": "/ws/%d" % i,
+             "Options": "noallwrite noclobber nocompress unlocked",
+             "Description": "Created by user%d.\n" % (i % 300),
+            } for i in range(count)]
+
+
+def makeFilesOutput(count):
+    return [{"depotFile": "//depot/main/src/dir%d/file%d.c" % (i % 100, i),
+             "rev": str(i % 7 + 1),
+             "change": str(i + 1),
+             "action": "edit",
+             "type": "text",
+             "time": str(1700000000 + i // recordsPerSecond),
+            } for i in range(count)]
+
+
+def makeChangeSpecs(count):
+    return [{"Change": str(100000 + i),
+             "Client": "ws%d" % (i % 500),
+             "User": "user%d" % (i % 300),
+             "Status": "submitted",
+             "Description": "change %d\n" % i,
+             "Date": datetime.fromtimestamp(
+                 1700000000 + i // recordsPerSecond
+                 ).strftime('%Y/%m/%d %H:%M:%S'),
+            } for i in range(count)]
+
+
+def makeFiles(count, prefix="//depot/main/src/file"):
+    return [P4OOFile(id="%s%d.c" % (prefix, i)) for i in range(count)]
+
+
+######################################################################
+# Benchmarks
+#
+# Each takes a size and returns (setup, operation): setup() builds the
+# input outside of the measurement, operation(input) is what's measured.
+#
+def benchParseOutput(cmdName, makeOutput):
+    def bench(size):
+        p4Conn = _P4OOP4Python()
+        p4Conn._initialize()
+        return (lambda: makeOutput(size),
+                lambda p4Out: p4Conn._parseOutput(cmdName, p4Out))
+    return bench
+
+
+def benchValidateQuery(size):
+    cmdObj = _P4OOP4PythonSchema.getCachedSchema().getCmd("files")
+    return (lambda: {"files": P4OOFileSet(iterable=makeFiles(size))},
+            cmdObj.validateQuery)
+
+
+def benchTranslateSpec(size):
+    specCmdObj = _P4OOP4PythonSchema.getCachedSchema().getSpecCmd("change")
+    translate = specCmdObj.translateP4SpecToPython
+
+    def operation(specs):
+        for p4Spec in specs:
+            translate(p4Spec)
+
+    return (lambda: makeChangeSpecs(size), operation)
+
+
+def benchSetOperation(operation):
+    def bench(size):
+        def setup():
+            files = makeFiles(size)
+            # half overlapping with files
+            otherFiles = files[size // 2:] \
+                + makeFiles(size - size // 2, prefix="//depot/rel/src/file")
+            return (P4OOFileSet(iterable=files),
+                    P4OOFileSet(iterable=otherFiles))
+        return (setup, lambda sets: operation(*sets))
+    return bench
+
+
+def indexSet(fileSet, otherSet):
+    for i in range(0, len(fileSet), max(1, len(fileSet) // 1000)):
+        fileSet[i]
+
+
+def benchToJSON(size):
+    p4Conn = _P4OOP4Python()
+
+    def setup():
+        p4Changes = list(p4Conn._iterParseOutput("changes",
+                                                 makeChangesOutput(size)))
+        # Already read, so _toJSON has no reason to go to Perforce
+        for p4Change in p4Changes:
+            p4Change._materializeOutput()
+            p4Change._p4SpecObj = p4Change._modifiedSpec
+        return p4Changes
+
+    def operation(p4Changes):
+        for p4Change in p4Changes:
+            p4Change._toJSON()
+
+    return (setup, operation)
+
+
+benchmarks = (
+    ("parseOutput.changes", benchParseOutput("changes", makeChangesOutput)),
+    ("parseOutput.clients", benchParseOutput("clients", makeClientsOutput)),
+    ("parseOutput.files", benchParseOutput("files", makeFilesOutput)),
+    ("validateQuery.fileSet", benchValidateQuery),
+    ("translateP4SpecToPython", benchTranslateSpec),
+    ("set.union", benchSetOperation(lambda a, b: a | b)),
+    ("set.intersection", benchSetOperation(lambda a, b: a & b)),
+    ("set.index", benchSetOperation(indexSet)),
+    ("toJSON", benchToJSON),
+)
+
+
+######################################################################
+# Measurement
+#
+def measure(bench, size):
+    """ Return (best seconds, peak bytes) for one benchmark at size """
+
+    (setup, operation) = bench(size)
+
+    best = None
+    for _ in range(max(1, min(maxRepeat, repeatBudget // size))):
+        benchInput = setup()
+        gc.collect()
+        start = time.perf_counter()
+        operation(benchInput)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del benchInput
+
+    benchInput = setup()
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = operation(benchInput)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    del result, benchInput
+
+    return (best, peak)
+
+
+def measureImport(statements):
+    """ Return (best seconds, peak bytes) running statements (importing
+        P4OO modules) in a fresh interpreter
+    """
+
+    script = ("import sys, time, tracemalloc\n"
+              "if sys.argv[1] == 'trace':\n"
+              "    tracemalloc.start()\n"
+              "start = time.perf_counter()\n"
+              "%s\n"
+              "print(time.perf_counter() - start,"
+              " tracemalloc.get_traced_memory()[1])\n"
+              % statements)
+
+    def runImport(mode):
+        output = subprocess.run([sys.executable, "-c", script, mode],
+                                check=True, capture_output=True,
+                                text=True).stdout
+        (elapsed, peakBytes) = output.split()
+        return (float(elapsed), int(peakBytes))
+
+    best = min(runImport("time")[0] for _ in range(maxRepeat))
+    peak = runImport("trace")[1]
+
+    return (best, peak)
+
+
+def compare(results, baseline, tolerance):
+    """ Return a list of regression messages """
+
+    regressions = []
+    for (key, result) in results.items():
+        previous = baseline.get('results', {}).get(key)
+        if previous is None:
+            continue
+
+        if result['seconds'] > previous['seconds'] * (1 + tolerance) \
+                               + timeSlack:
+            regressions.append("%s: %.4fs, baseline %.4fs"
+                               % (key, result['seconds'],
+                                  previous['seconds']))
+        if result['peakBytes'] > previous['peakBytes'] * (1 + tolerance) \
+                                 + memorySlack:
+            regressions.append("%s: %d bytes peak, baseline %d"
+                               % (key, result['peakBytes'],
+                                  previous['peakBytes']))
+    return regressions
+
+
+def report(key, seconds, peakBytes, size=None):
+    perRecord = ""
+    if size:
+        perRecord = "%10.3f us/record" % (seconds / size * 1e6)
+    print("%-36s %10.4fs %18s %10.1f MB" % (key, seconds, perRecord,
+                                            peakBytes / 1e6))
+
+
+######################################################################
+# MAIN
+#
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=",".join(map(str, defaultSizes)),
+                        help="comma separated record counts")
+    parser.add_argument("--only", action="append",
+                        help="run only benchmarks starting with this name")
+    parser.add_argument("--save", metavar="BASELINE",
+                        help="write results to this baseline file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="compare results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed fractional slowdown or growth")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    def selected(name):
+        return not args.only \
+            or any(name.startswith(only) for only in args.only)
+
+    results = {}
+    for (name, bench) in benchmarks:
+        if not selected(name):
+            continue
+        for size in sizes:
+            key = "%s@%d" % (name, size)
+            (seconds, peakBytes) = measure(bench, size)
+            results[key] = {'seconds': seconds, 'peakBytes': peakBytes}
+            report(key, seconds, peakBytes, size)
+
+    if selected("import"):
+        (seconds, peakBytes) = measureImport(
+            "import " + ", ".join(importModules))
+        results["import"] = {'seconds': seconds, 'peakBytes': peakBytes}
+        report("import", seconds, peakBytes)
+
+    if selected("startup"):
+        (seconds, peakBytes) = measureImport(startupStatements)
+        results["startup"] = {'seconds': seconds, 'peakBytes': peakBytes}
+        report("startup", seconds, peakBytes)
+
+    exitStatus = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baselineFile:
+            regressions = compare(results, json.load(baselineFile),
+                                  args.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            exitStatus = 1
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as baselineFile:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'saved': datetime.now().isoformat(timespec='seconds'),
+                       'results': results}, baselineFile, indent=2,
+                      sort_keys=True)
+
+    sys.exit(exitStatus)
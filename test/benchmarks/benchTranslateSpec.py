@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/benchmarks/benchTranslateSpec.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+Microbenchmark translateP4SpecToPython on synthetic P4Python records.
+
+Compares the compiled per-spec translator (with its memoized date
+parsing) against the original per-record schema walk, reproduced here as
+legacyTranslate().  No Perforce server is needed.
+
+Usage: benchTranslateSpec.py [recordCount]   (default 1000000)
+'''
+
+######################################################################
+# Includes
+#
+import re
+import sys
+import time
+from datetime import datetime
+
+from P4OO._P4PythonSchema import _P4OOP4PythonSchema
+
+
+######################################################################
+# Configuration
+#
+recordCount = 1000000
+
+# Records per distinct second-resolution timestamp, as in a busy server's
+# changes/clients output
+recordsPerSecond = 10
+
+
+def legacyTranslate(commandDict, p4OutputSpec):
+    """ translateP4SpecToPython as it was before compiled translators """
+
+    pythonSpec = {}
+    if 'specAttrs' in commandDict:
+        for specAttr in commandDict['specAttrs']:
+            p4SpecAttr = commandDict['specAttrs'][specAttr]
+            if p4SpecAttr in p4OutputSpec:
+                if p4SpecAttr == "Change":
+                    pythonSpec[specAttr] = int(p4OutputSpec[p4SpecAttr])
+                else:
+                    pythonSpec[specAttr] = p4OutputSpec[p4SpecAttr]
+
+    if 'dateAttrs' in commandDict:
+        for dateAttr in commandDict['dateAttrs']:
+            p4DateAttr = commandDict['dateAttrs'][dateAttr]
+            if p4DateAttr in p4OutputSpec:
+                if re.match(r'^\d+$', p4OutputSpec[p4DateAttr]):
+                    pythonSpec[dateAttr] = datetime.fromtimestamp(
+                        float(p4OutputSpec[p4DateAttr]))
+                else:
+                    pythonSpec[dateAttr] = datetime.strptime(
+                        p4OutputSpec[p4DateAttr], '%Y/%m/%d %H:%M:%S')
+
+    return pythonSpec
+
+
+def makeChangeRecords(count):
+    return [{"Change": str(100000 + i),
+             "Client": "ws%d" % (i % 500),
+             "User": "user%d" % (i % 300),
+             "Status": "submitted",
+             "Description": "change %d\n" % i,
+             "Date": datetime.fromtimestamp(
+                 1700000000 + i // recordsPerSecond
+                 ).strftime('%Y/%m/%d %H:%M:%S'),
+            } for i in range(count)]
+
+
+def makeClientRecords(count):
+    return [{"Client": "ws%d" % i,
+             "Owner": "user%d" % (i % 300),
+             "Host": "host%d" % (i % 50),
+             "Root": "/ws/%d" % i,
+             "Options": "noallwrite noclobber",
+             "Update": str(1700000000 + i // recordsPerSecond),
+             "Access": str(1700000000 + i // recordsPerSecond),
+            } for i in range(count)]
+
+
+def bench(label, translate, records):
+    start = time.perf_counter()
+    for record in records:
+        translate(record)
+    elapsed = time.perf_counter() - start
+    print("%-28s %8.2fs %8.2f us/record"
+          % (label, elapsed, elapsed / len(records) * 1e6))
+    return elapsed
+
+
+######################################################################
+# MAIN
+#
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        recordCount = int(sys.argv[1])
+
+    schema = _P4OOP4PythonSchema.getCachedSchema()
+
+    for (specType, makeRecords) in (("change", makeChangeRecords),
+                                    ("client", makeClientRecords)):
+        specCmdObj = schema.getSpecCmd(specType)
+        records = makeRecords(recordCount)
+
+        before = bench("%s legacy" % specType,
+                       lambda record: legacyTranslate(specCmdObj.commandDict,
+                                                      record),
+                       records)
+        after = bench("%s compiled" % specType,
+                      specCmdObj.translateP4SpecToPython, records)
+        print("%-28s %8.1fx" % ("%s speedup" % specType, before / after))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/benchmarks/benchValidateQuery.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+Benchmark _P4OOP4PythonCommand.validateQuery for the small, frequent
+opened/changes/files style queries that automation issues.  No Perforce
+server is needed.
+'''
+
+######################################################################
+# Includes
+#
+import timeit
+
+from P4OO._P4PythonSchema import _P4OOP4PythonSchema
+from P4OO.Client import P4OOClient
+from P4OO.User import P4OOUser, P4OOUserSet
+
+
+######################################################################
+# Configuration
+#
+number = 100000
+
+
+######################################################################
+# MAIN
+#
+if __name__ == '__main__':
+    schema = _P4OOP4PythonSchema.getCachedSchema()
+    userObj = P4OOUser(id="bob")
+    clientObj = P4OOClient(id="bob-ws")
+    userSet = P4OOUserSet(iterable=[P4OOUser(id="user%d" % i)
+                                    for i in range(1000)])
+
+    queries = (
+        ("changes", {"user": userObj, "client": clientObj,
+                     "maxresults": 10, "status": "submitted",
+                     "files": "//depot/..."}),
+        ("opened", {"user": userObj, "client": clientObj}),
+        ("files", {"maxresults": 100, "files": ["//depot/a/...",
+                                                "//depot/b/..."]}),
+    )
+
+    for (cmdName, query) in queries:
+        cmdObj = schema.getCmd(cmdName)
+        perCall = timeit.timeit(lambda: cmdObj.validateQuery(query),
+                                number=number) / number
+        print("validateQuery %-8s %8.2f us" % (cmdName, perCall * 1e6))
+
+    cmdObj = schema.getCmd("users")
+    query = {"users": userSet}
+    perCall = timeit.timeit(lambda: cmdObj.validateQuery(query),
+                            number=100) / 100
+    print("validateQuery users    %8.2f us (1000 P4OOUser args)"
+          % (perCall * 1e6))
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/buildScaleEgg.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+P4OO.Py test helper script to build a Golden Egg of arbitrary scale, for
+scale and throughput testing of P4OO queries, sets and specs against a
+realistic server.
+
+The depot is split into projects (//depot/projN/...).  Changes are
+submitted round robin across the projects, clients each map one project
+and get a have list of it (with flush, so no files are transferred),
+labels each tag one project at some change, and groups nest in chains
+of configurable depth.  Everything is derived from --seed, so the same
+arguments build the same egg.
+
+Usage: buildScaleEgg.py --changes 100000 --clients 20000 --labels 5000
+                        --tarball data/_P4GoldenEggs/scale.tar.gz
+
+Like buildEggs.py, this needs a working p4d and P4Python.
+'''
+
+######################################################################
+# Includes
+#
+import argparse
+import os
+import os.path
+import random
+import tempfile
+import time
+
+# _P4GoldenEgg is used for our test environment setup and destruction
+import _P4GoldenEgg
+
+import P4
+
+
+######################################################################
+# Configuration
+#
+p4d = "p4d"
+tmpDir = "./tmp"
+eggCreator = "testEggCreator"
+
+
+class scaleEggBuilder(object):
+    """ Populates an empty p4d root to the requested scale """
+
+    def __init__(self, p4PythonObj, args):
+        self.p4 = p4PythonObj
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.users = ["scaleUser%d" % i for i in range(args.users)]
+        self.projects = ["proj%d" % i for i in range(args.projects)]
+        self.lastChange = 0
+
+    def report(self, label, count, startTime):
+        elapsed = time.monotonic() - startTime
+        print("%-10s %8d in %8.1fs (%.0f/s)"
+              % (label, count, elapsed, count / elapsed if elapsed else 0))
+
+    def saveSpec(self, specType, spec, *args):
+        self.p4.input = spec
+        self.p4.run(specType, "-i", *args)
+
+    def createUsers(self):
+        startTime = time.monotonic()
+        for user in self.users:
+            self.saveSpec("user", {"User": user,
+                                   "Email": user + "@example.com",
+                                   "FullName": "Scale User " + user},
+                          "-f")
+        self.report("users", len(self.users), startTime)
+
+    def createGroups(self):
+        """ Chains of groupDepth groups, each a subgroup of the next, with
+            users spread across the innermost groups
+        """
+        startTime = time.monotonic()
+        depth = self.args.groupDepth
+        groupCount = 0
+        for chain in range(self.args.groups // depth):
+            members = self.users[chain::max(1, self.args.groups // depth)]
+            subgroups = []
+            for level in range(depth):
+                group = "scaleGroup%d_%d" % (chain, level)
+                self.saveSpec("group", {"Group": group,
+                                        "Users": members or [eggCreator],
+                                        "Subgroups": subgroups,
+                                        "Owners": [eggCreator],
+                                        "MaxResults": "unset"})
+                (members, subgroups) = ([], [group])
+                groupCount += 1
+        self.report("groups", groupCount, startTime)
+
+    def submitChanges(self):
+        """ Submit changes round robin across the projects, each adding or
+            editing filesPerChange files from a single generator client
+        """
+        startTime = time.monotonic()
+        clientRoot = os.path.abspath(tempfile.mkdtemp(dir=tmpDir))
+        self.saveSpec("client", {"Client": "scaleGenerator",
+                                 "Owner": eggCreator,
+                                 "Root": clientRoot,
+                                 "View": ["//depot/... //scaleGenerator/..."]})
+        self.p4.client = "scaleGenerator"
+
+        filesPerProject = {}
+        for change in range(self.args.changes):
+            project = self.projects[change % len(self.projects)]
+            fileCount = filesPerProject.get(project, 0)
+
+            # Changes belong to users round robin
+            self.p4.user = self.users[change % len(self.users)] \
+                if self.users else eggCreator
+
+            for _ in range(self.args.filesPerChange):
+                # grow each project until it has filesPerProject files,
+                # then keep editing them
+                if fileCount < self.args.filesPerProject:
+                    fileNum = fileCount
+                    fileCount += 1
+                    action = "add"
+                else:
+                    fileNum = self.random.randrange(fileCount)
+                    action = "edit"
+
+                path = os.path.join(clientRoot, project,
+                                    "dir%d" % (fileNum % 100),
+                                    "file%d.c" % fileNum)
+                if action == "edit":
+                    self.p4.run("edit", path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(file=path, mode="a", encoding="utf-8") as stream:
+                    print("change %d" % change, file=stream)
+                if action == "add":
+                    self.p4.run("add", path)
+
+            filesPerProject[project] = fileCount
+            self.p4.run("submit", "-d", "scale change %d" % (change + 1))
+            self.lastChange = change + 1
+
+            if (change + 1) % 10000 == 0:
+                self.report("changes", change + 1, startTime)
+
+        self.p4.user = eggCreator
+        self.p4.client = ""
+        self.report("changes", self.args.changes, startTime)
+
+    def createClients(self):
+        """ One client per project round robin, each with a have list of
+            its project at some change
+        """
+        startTime = time.monotonic()
+        for i in range(self.args.clients):
+            client = "scaleClient%d" % i
+            project = self.projects[i % len(self.projects)]
+            owner = self.users[i % len(self.users)] if self.users \
+                else eggCreator
+            self.saveSpec("client", {
+                "Client": client,
+                "Owner": owner,
+                "Root": "/ws/%s" % client,
+                "View": ["//depot/%s/... //%s/..." % (project, client)]})
+
+            if self.args.haveLists and self.lastChange:
+                self.p4.client = client
+                self.p4.run("flush", "//%s/...@%d"
+                            % (client, self.random.randint(1,
+                                                           self.lastChange)))
+                self.p4.client = ""
+
+            if (i + 1) % 1000 == 0:
+                self.report("clients", i + 1, startTime)
+        self.report("clients", self.args.clients, startTime)
+
+    def createLabels(self):
+        startTime = time.monotonic()
+        for i in range(self.args.labels):
+            label = "scaleLabel%d" % i
+            project = self.projects[i % len(self.projects)]
+            self.saveSpec("label", {
+                "Label": label,
+                "Owner": self.users[i % len(self.users)] if self.users
+                         else eggCreator,
+                "View": ["//depot/%s/..." % project]})
+
+            if self.lastChange:
+                self.p4.run("tag", "-l", label, "//depot/%s/...@%d"
+                            % (project,
+                               self.random.randint(1, self.lastChange)))
+
+            if (i + 1) % 1000 == 0:
+                self.report("labels", i + 1, startTime)
+        self.report("labels", self.args.labels, startTime)
+
+    def createCounters(self):
+        startTime = time.monotonic()
+        for i in range(self.args.counters):
+            self.p4.run("counter", "scaleCounter%d" % i,
+                        str(self.random.randrange(1000000)))
+        self.report("counters", self.args.counters, startTime)
+
+
+######################################################################
+# MAIN
+#
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--tarball", required=True,
+                        help="Golden Egg tarball to create")
+    parser.add_argument("--changes", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--labels", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--groups", type=int, default=50,
+                        help="total groups, in chains of --groupDepth")
+    parser.add_argument("--groupDepth", type=int, default=5)
+    parser.add_argument("--counters", type=int, default=100)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--filesPerProject", type=int, default=1000)
+    parser.add_argument("--filesPerChange", type=int, default=1)
+    parser.add_argument("--noHaveLists", dest="haveLists",
+                        action="store_false",
+                        help="don't populate client have lists")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--p4d", default=p4d)
+    args = parser.parse_args()
+
+    # sanitize P4 environment variables
+    for p4Var in ('P4CONFIG', 'P4PORT', 'P4USER', 'P4CLIENT'):
+        if p4Var in os.environ:
+            del(os.environ[p4Var])
+
+    os.makedirs(tmpDir, exist_ok=True)
+
+    # Set up P4ROOT and configure a new EggDir to use it
+    p4RootDir = os.path.abspath(tempfile.mkdtemp(dir=tmpDir))
+    testEggDir = _P4GoldenEgg.eggDirectory(p4RootDir)
+
+    # Connect to the Perforce Service
+    p4PythonObj = P4.P4()
+    p4PythonObj.port = testEggDir.getP4Port(p4d=args.p4d)
+    p4PythonObj.user = eggCreator
+    p4PythonObj.exception_level = 1
+    p4PythonObj.connect()
+
+    buildStart = time.monotonic()
+    builder = scaleEggBuilder(p4PythonObj, args)
+    builder.createUsers()
+    builder.createGroups()
+    builder.submitChanges()
+    builder.createClients()
+    builder.createLabels()
+    builder.createCounters()
+    p4PythonObj.disconnect()
+    print("built in %.1fs" % (time.monotonic() - buildStart))
+
+    # Wrap it up and clean it up
+    testEggDir.createTarball(args.tarball)
+    testEggDir.destroy()
+    print("wrote " + args.tarball)
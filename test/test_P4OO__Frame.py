@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/test_P4OO__Frame.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+unittest test suite for _Frame
+'''
+
+######################################################################
+# Includes
+#
+from datetime import datetime
+
+import pytest
+
+import P4OO._Frame
+from P4OO._P4Python import _P4OOP4Python
+from P4OO._P4Transport import _P4OOSimulatedP4
+from P4OO.Change import P4OOChangeSet
+
+
+######################################################################
+# Configuration
+#
+useNumpyParams = [False]
+if P4OO._Frame.numpy is not None:
+    useNumpyParams.append(True)
+
+
+def changeRecord(p4SubCmd, args, index):
+    return {'change': str(1000 - index), 'user': "user%d" % (index % 4),
+            'client': "client%d" % (index % 7),
+            'status': "pending" if index % 10 == 0 else "submitted",
+            'time': str(1700000000 + 3600 * (index % 24)),
+            'desc': "change %d\n" % index}
+
+
+@pytest.fixture(params=useNumpyParams, ids=lambda useNumpy:
+                "numpy" if useNumpy else "python")
+def changeFrame(request):
+    simulatedP4 = _P4OOSimulatedP4(outputSize=1000,
+                                   recordFactory=changeRecord)
+    p4Conn = _P4OOP4Python(p4PythonObj=simulatedP4.connect())
+    p4Changes = P4OOChangeSet(_p4Conn=p4Conn).query()
+
+    frame = p4Changes.toFrame(useNumpy=request.param)
+
+    # Nothing was translated into the objects or read from the server
+    assert all(p4Change._modifiedSpec is None for p4Change in p4Changes)
+    assert simulatedP4.commandCounts() == {'changes': 1}
+    return frame
+
+
+def test_columns(changeFrame):
+    assert len(changeFrame) == 1000
+    assert changeFrame.columnNames[:2] == ["id", "change"]
+    assert type(changeFrame.columns['user']).__name__ \
+        == "_P4OOCategoryColumn"
+    assert changeFrame.columns['user'].categories \
+        == ["user0", "user1", "user2", "user3"]
+    assert changeFrame["id"][:3] == [1000, 999, 998]
+    assert changeFrame["user"][:3] == ["user0", "user1", "user2"]
+    assert changeFrame["date"][1] == datetime.fromtimestamp(1700003600)
+
+
+def test_filterSortGroup(changeFrame):
+    assert changeFrame.groupCount("user") \
+        == {'user0': 250, 'user1': 250, 'user2': 250, 'user3': 250}
+    assert changeFrame.groupCount("status") \
+        == {'submitted': 900, 'pending': 100}
+
+    pending = changeFrame.filter(changeFrame.compare("status", "==",
+                                                     "pending"))
+    assert len(pending) == 100
+    assert pending.objects()[0].id == 1000
+    assert set(pending["user"]) == {"user0", "user2"}
+
+    late = changeFrame.filter(changeFrame.compare(
+        "date", ">=", datetime.fromtimestamp(1700000000 + 3600 * 20)))
+    assert len(late) == len([index for index in range(1000)
+                             if index % 24 >= 20])
+
+    someUsers = changeFrame.filter(changeFrame.isIn("user",
+                                                    ["user1", "nobody"]))
+    assert someUsers.groupCount("user") == {'user1': 250}
+    assert len(changeFrame.filter(changeFrame.compare("user", "==",
+                                                      "nobody"))) == 0
+
+    byClient = changeFrame.sortBy("client")
+    assert byClient["client"][0] == "client0"
+    assert byClient["id"][:2] == [1000, 993]
+    assert changeFrame.sortBy("id")["id"][:3] == [1, 2, 3]
+    assert changeFrame.sortBy("id", descending=True)["id"][:3] \
+        == [1000, 999, 998]
+
+    assert changeFrame.topK("id", 3)["id"] == [1000, 999, 998]
+    assert changeFrame.topK("id", 2, largest=False)["id"] == [1, 2]
+    assert len(changeFrame.topK("id", 0)) == 0
+
+    assert changeFrame.groupBy("user", "id", "max") \
+        == {'user0': 1000, 'user1': 999, 'user2': 998, 'user3': 997}
+    assert changeFrame.groupBy("user", "id", "sum")['user0'] \
+        == sum(range(4, 1001, 4))
+
+
+def test_toPandas(changeFrame):
+    pandas = pytest.importorskip("pandas")
+
+    dataFrame = changeFrame.toPandas()
+    assert isinstance(dataFrame, pandas.DataFrame)
+    assert dataFrame["user"].value_counts()["user3"] == 250
+    assert dataFrame["id"].tolist()[:2] == [1000, 999]
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/test_P4OO__Hooks.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+unittest test suite for _Hooks
+'''
+
+######################################################################
+# Includes
+#
+import pytest
+
+from P4OO._Hooks import _P4OOHooks
+from P4OO._P4Python import _P4OOP4Python
+from P4OO._P4Transport import _P4OOSimulatedP4
+from P4OO.Change import P4OOChange, P4OOChangeSet
+
+
+def test_helperSpans():
+    p4Hooks = _P4OOHooks()
+    p4Conn = _P4OOP4Python(p4PythonObj=_P4OOSimulatedP4().connect(),
+                           hooks=p4Hooks)
+
+    with p4Hooks.span("cleanup", ticket="ABC-1") as callerSpan:
+        P4OOChange(id="12", _p4Conn=p4Conn).deleteWithVengeance()
+        P4OOChangeSet(_p4Conn=p4Conn).query(maxresults=2)
+
+    assert list(p4Hooks.roots) == [callerSpan]
+    (helperSpan, changesSpan) = callerSpan.children
+    assert (helperSpan.name, helperSpan.kind) \
+        == ("P4OOChange.deleteWithVengeance", "helper")
+    assert helperSpan.attrs == {'id': "12"}
+    assert [span.name for span in helperSpan.children] \
+        == ["change", "shelve", "change"]
+    assert (changesSpan.name, changesSpan.kind) == ("changes", "command")
+
+    assert callerSpan.summary() == {'change': 2, 'shelve': 1,
+                                    'changes': 1}
+    assert all(span.seconds is not None for span in callerSpan.walk())
+
+    formatted = callerSpan.format().splitlines()
+    assert formatted[0].startswith("cleanup ")
+    assert formatted[0].endswith(" ticket=ABC-1")
+    assert formatted[1].startswith("  P4OOChange.deleteWithVengeance ")
+    assert formatted[2].startswith("    change ")
+
+
+def test_commandHooks():
+    def failingRecords(p4SubCmd, args, index):
+        raise RuntimeError("simulated failure")
+
+    p4Hooks = _P4OOHooks()
+    events = []
+    p4Hooks.register('preCommand',
+                     lambda p4Conn, span: events.append(("pre", span.name)))
+    p4Hooks.register('postCommand',
+                     lambda p4Conn, span, p4Out:
+                     events.append(("post", span.name, len(p4Out))))
+    p4Hooks.register('onError',
+                     lambda p4Conn, span, exc:
+                     events.append(("error", span.name, span.error is exc)))
+
+    simulatedP4 = _P4OOSimulatedP4(outputSize=3, exception_level=0)
+    p4Conn = _P4OOP4Python(p4PythonObj=simulatedP4.connect(), hooks=p4Hooks)
+    P4OOChangeSet(_p4Conn=p4Conn).query()
+    assert events == [("pre", "changes"), ("post", "changes", 3)]
+
+    simulatedP4.recordFactory = failingRecords
+    with pytest.raises(Exception):
+        P4OOChangeSet(_p4Conn=p4Conn).query()
+    assert events[2:] == [("pre", "changes"), ("error", "changes", True)]
+    assert p4Hooks.roots[-1].error is not None
+
+    with pytest.raises(ValueError):
+        p4Hooks.register('noSuchEvent', print)
+
+
+def test_mapParallelSpans():
+    p4Hooks = _P4OOHooks()
+    simulatedP4 = _P4OOSimulatedP4(outputSize=2)
+    p4Conn = _P4OOP4Python(p4PythonObj=simulatedP4.connect(), hooks=p4Hooks)
+
+    with p4Hooks.span("fanOut") as fanOutSpan:
+        p4Conn.mapParallel(
+            lambda p4Conn, item: P4OOChangeSet(_p4Conn=p4Conn).query(
+                maxresults=1),
+            range(4), parallelism=2)
+
+    assert fanOutSpan.summary() == {'changes': 4}
+
+
+def test_noHooks():
+    p4Conn = _P4OOP4Python(p4PythonObj=_P4OOSimulatedP4().connect())
+    assert P4OOChange(id="12", _p4Conn=p4Conn).deleteWithVengeance()
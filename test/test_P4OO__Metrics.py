@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/test_P4OO__Metrics.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+unittest test suite for _Metrics
+'''
+
+######################################################################
+# Includes
+#
+import pytest
+
+from P4OO._Metrics import _P4OOMetrics
+from P4OO._P4Python import _P4OOP4Python
+from P4OO._P4Transport import _P4OOSimulatedP4
+from P4OO.Change import P4OOChangeSet
+from P4OO.User import P4OOUser
+from P4OO.Exceptions import P4Fatal
+
+
+class fakeP4(_P4OOSimulatedP4):
+    """ Simulated server that fails user deletes """
+
+    def _execute(self, p4SubCmd, args, p4Input):
+        if p4SubCmd == "user" and "-d" in args:
+            self._commandCounts.add(p4SubCmd)
+            return ([], ["User can't be deleted."], [])
+        return _P4OOSimulatedP4._execute(self, p4SubCmd, args, p4Input)
+
+
+def test_commandMetrics():
+    simulatedP4 = fakeP4(latency=0.002, outputSize=5, exception_level=0)
+    p4Conn = _P4OOP4Python(p4PythonObj=simulatedP4, metrics=_P4OOMetrics())
+    changeSet = P4OOChangeSet(_p4Conn=p4Conn)
+
+    changeSet.query()
+    changeSet.query(maxresults=2)
+    assert len(list(changeSet.query(stream=True))) == 5
+    p4User = P4OOUser(id="bob", _p4Conn=p4Conn)
+    p4User._getSpecAttr('user')
+    with pytest.raises(P4Fatal):
+        p4User.deleteSpec(force=True)
+
+    changesMetrics = p4Conn.getMetrics("changes")
+    assert changesMetrics['calls'] == 3
+    assert changesMetrics['records'] == 12
+    assert (changesMetrics['errors'], changesMetrics['warnings']) == (0, 0)
+    assert changesMetrics['serverSeconds'] >= 0.006
+    assert changesMetrics['parseSeconds'] > 0
+    assert sum(changesMetrics['latencyHistogram'].values()) == 3
+
+    userMetrics = p4Conn.getMetrics("user")
+    assert (userMetrics['calls'], userMetrics['errors']) == (2, 1)
+    assert userMetrics['parseSeconds'] > 0
+
+    prometheus = p4Conn.metrics.toPrometheus()
+    assert 'p4oo_commands_total{command="changes"} 3\n' in prometheus
+    assert 'p4oo_server_seconds_bucket{command="user",le="+Inf"} 2\n' \
+        in prometheus
+    assert 'p4oo_server_seconds_count{command="changes"} 3\n' in prometheus
+
+    p4Conn.metrics.reset()
+    assert p4Conn.getMetrics() == {}
+    assert _P4OOP4Python(p4PythonObj=simulatedP4).getMetrics() is None
@@ -16,7 +16,10 @@ unittest test suite for _P4Python
 ######################################################################
 # Includes
 #
+import asyncio
+import contextlib
 import os  # used for managing environment variables
+import weakref
 from pathlib import PosixPath
 
 # P4OO._Base brings in our Exception hierarchy
@@ -33,6 +36,13 @@ import P4
 import P4OO._P4Python
 import P4OO._Connection
 import P4OO._P4PythonSchema
+import P4OO._PersistentCache
+import P4OO._SpecCache
+from P4OO.Change import P4OOChange, P4OOChangeSet
+from P4OO.Exceptions import P4OOFatal, P4Fatal
+from P4OO.File import P4OOFile
+from P4OO.User import P4OOUser, P4OOUserSet
+from P4OO._P4Transport import _P4OOSimulatedP4
 
 
 ######################################################################
@@ -44,6 +54,49 @@ p4Port = None
 p4RootDir = None
 
 
+class fakeP4(object):
+    """ Just enough of a P4.P4 stand-in to feed canned output records
+        through _execCmd and P4Python's OutputHandler interface.
+    """
+
+    def __init__(self, records, errors=()):
+        self.records = records
+        self.runs = []
+        self.delivered = 0
+        self.handler = None
+        self.tagged = 1
+        self.input = None
+        self.errors = []
+        self.warnings = []
+        self._errors = list(errors)
+
+    def run(self, p4SubCmd, args):
+        # P4Python flattens nested argument lists
+        args = [arg for argList in args
+                for arg in (argList if isinstance(argList, list) else [argList])]
+        self.runs.append([p4SubCmd] + args)
+        self.errors = list(self._errors)
+
+        records = self.records
+        if isinstance(records, dict):
+            records = records[p4SubCmd](args)
+
+        if self.handler is None:
+            self.delivered = len(records)
+            return list(records)
+
+        for record in records:
+            self.delivered += 1
+            if self.handler.outputStat(record) == P4.OutputHandler.CANCEL:
+                break
+        return []
+
+
+def changeRecords(count):
+    return [{"change": str(i), "user": "user%d" % (i % 3),
+             "status": "submitted"} for i in range(count, 0, -1)]
+
+
 @pytest.fixture()
 def p4PythonObj(tmp_path_factory, shared_datadir):
     # sanitize P4 environment variables
@@ -207,3 +260,337 @@ def test_runCommand(p4PythonObj):
 
 #TODO readSpec and saveSpec are pretty important.  Modularity says test them here somehow
 
+
+
+def test_iterCommand():
+    fakeP4Obj = fakeP4(changeRecords(5000))
+    testObj1 = P4OO._P4Python._P4OOP4Python(p4PythonObj=fakeP4Obj)
+
+    p4Changes = testObj1.iterCommand("changes", files="//...")
+    assert not isinstance(p4Changes, P4OOChangeSet)
+
+    changeIDs = [p4Change.id for p4Change in p4Changes]
+    assert changeIDs == list(range(5000, 0, -1))
+
+    # same objects as the non-streaming form
+    p4ChangeSet = P4OOChangeSet(p4PythonObj=fakeP4Obj).query(files="//...")
+    assert p4ChangeSet.listObjectIDs() == changeIDs
+
+
+def test_iterCommandEarlyExit():
+    fakeP4Obj = fakeP4(changeRecords(100000))
+    p4Changes = P4OOChangeSet(p4PythonObj=fakeP4Obj).query(stream=True)
+
+    for p4Change in p4Changes:
+        assert isinstance(p4Change, P4OOChange)
+        if p4Change.id == 99990:
+            break
+
+    # Consumer stopped, so should the command
+    p4Changes.close()
+    assert fakeP4Obj.delivered < 100000
+
+    # Connection is usable again
+    testObj1 = p4Change._getP4Connection()
+    assert testObj1._streamThread is None
+    assert len(testObj1.runCommand("changes", maxresults=1)) == 100000
+
+
+def test_iterCommandErrors():
+    fakeP4Obj = fakeP4(changeRecords(10), errors=["boom"])
+    testObj1 = P4OO._P4Python._P4OOP4Python(p4PythonObj=fakeP4Obj)
+
+    p4Changes = testObj1.iterCommand("changes")
+    assert next(p4Changes).id == 10
+
+    # No other commands while the stream owns the connection
+    with pytest.raises(P4OOFatal):
+        testObj1._execCmd("info")
+
+    # errors are raised after the output is delivered
+    with pytest.raises(P4Fatal):
+        list(p4Changes)
+
+
+def test_hydratedQueryOutput():
+    def describeRecords(args):
+        return [{"change": change, "user": "user%d" % (int(change) % 3),
+                 "desc": "full description of %s\n" % change,
+                 "time": "1700000000", "status": "submitted"}
+                for change in args if change != "-s"]
+
+    fakeP4Obj = fakeP4({"changes": lambda args: changeRecords(1200),
+                        "describe": describeRecords})
+    p4Changes = P4OOChangeSet(p4PythonObj=fakeP4Obj).query()
+    assert len(fakeP4Obj.runs) == 1
+
+    # Attributes from the query output never go to the server
+    for p4Change in p4Changes:
+        assert p4Change._getSpecAttr('user') == "user%d" % (p4Change.id % 3)
+        assert p4Change._getSpecAttr('Status') == "submitted"
+        assert p4Change._getSpecAttr('change') == p4Change.id
+    assert len(fakeP4Obj.runs) == 1
+
+    # Missing attributes are read in batches for the whole output
+    for p4Change in p4Changes:
+        assert p4Change._getSpecAttr('description') \
+            == "full description of %d\n" % p4Change.id
+    assert [run[0] for run in fakeP4Obj.runs] \
+        == ["changes", "describe", "describe", "describe"]
+    assert fakeP4Obj.runs[1][:3] == ["describe", "-s", "1200"]
+
+
+def test_hydrationSkipsUnreportedAttrs():
+    simulatedP4 = _P4OOSimulatedP4(outputSize=5)
+    p4Users = P4OOUserSet(p4PythonObj=simulatedP4).query()
+
+    # p4 users doesn't report Reviews, so only a spec read can help.
+    # Simulated user specs don't have it either.
+    with pytest.raises(P4OOFatal):
+        p4Users[0]._getSpecAttr('reviews')
+    assert simulatedP4.commandCounts() == {'users': 1, 'user': 1}
+
+
+def test_lazyQueryOutput():
+    fakeP4Obj = fakeP4(changeRecords(1000))
+    p4Changes = P4OOChangeSet(p4PythonObj=fakeP4Obj).query()
+
+    # IDs are all a set-to-query pipeline needs, nothing is translated
+    assert p4Changes.listObjectIDs() == list(range(1000, 0, -1))
+    assert all(p4Change._modifiedSpec is None for p4Change in p4Changes)
+
+    # Each object translates its own record on first use
+    (firstChange, secondChange) = list(p4Changes)[:2]
+    firstChange._setSpecAttr('user', "someoneElse")
+    assert firstChange._getSpecAttr('user') == "someoneElse"
+    assert firstChange._getSpecAttr('status') == "submitted"
+    assert firstChange._rawOutput is None
+    assert secondChange._modifiedSpec is None
+    assert len(fakeP4Obj.runs) == 1
+
+
+def test_internedQueryOutput():
+    p4Changes = P4OOChangeSet(p4PythonObj=fakeP4(changeRecords(1000))).query()
+    (firstChange, fourthChange) = (p4Changes[0], p4Changes[3])
+
+    # Records share one copy of each repeated value, not their own
+    assert firstChange._rawOutput[1]["user"] \
+        is fourthChange._rawOutput[1]["user"]
+    assert firstChange._getSpecAttr('user') \
+        is fourthChange._getSpecAttr('user')
+    assert fourthChange._getSpecAttr('user') == "user1"
+    assert len(p4Changes._p4Conn._internTable) == 4
+
+    # Unless it's full
+    p4Conn = P4OO._P4Python._P4OOP4Python()
+    p4Conn._INTERN_TABLE_SIZE = 1
+    p4Records = [p4Conn._internRecord({"user": "user%d" % (i % 2)})
+                 for i in range(4)]
+    assert p4Records[0]["user"] is p4Records[2]["user"]
+    assert p4Records[1]["user"] is not p4Records[3]["user"]
+
+
+@pytest.mark.skipif(not P4OO._Base._SLOTS,
+                    reason="dataclass slots need Python 3.11")
+def test_compactObjects():
+    p4Changes = P4OOChangeSet(p4PythonObj=fakeP4(changeRecords(10))).query()
+    p4Change = p4Changes[0]
+
+    # No per-object __dict__, but still weak referenceable
+    assert not hasattr(p4Change, '__dict__')
+    assert weakref.ref(p4Change)() is p4Change
+    with pytest.raises(AttributeError):
+        p4Change.notAField = 1
+
+    # Objects are still equal and hashed by ID alone
+    assert p4Change == P4OOChange(id=10)
+    assert P4OOChange(id=10) in p4Changes
+    assert hash(p4Change) == hash(P4OOChange(id=10))
+    assert P4OOFile(id="//depot/a") == P4OOFile(id="//depot/a")
+
+
+def test_asyncAPI():
+    fakeP4Obj = fakeP4(changeRecords(1000))
+    testObj1 = P4OO._P4Python._P4OOP4Python(p4PythonObj=fakeP4Obj)
+
+    async def runQueries():
+        p4Changes = await testObj1.runCommandAsync("changes", files="//...")
+        p4ChangeSet = await P4OOChangeSet(_p4Conn=testObj1).queryAsync(
+            files="//...")
+        lastChange = await p4ChangeSet[0].callAsync("_getSpecAttr", "user")
+
+        streamedIDs = []
+        async for p4Change in P4OOChangeSet(_p4Conn=testObj1).queryAsync(
+                stream=True):
+            streamedIDs.append(p4Change.id)
+
+        return (p4Changes, p4ChangeSet, lastChange, streamedIDs)
+
+    (p4Changes, p4ChangeSet, lastChange, streamedIDs) \
+        = asyncio.run(runQueries())
+    assert p4Changes.listObjectIDs() == list(range(1000, 0, -1))
+    assert p4ChangeSet.listObjectIDs() == list(range(1000, 0, -1))
+    assert lastChange == "user1"
+    assert streamedIDs == list(range(1000, 0, -1))
+
+
+def test_asyncStreamCancel():
+    fakeP4Obj = fakeP4(changeRecords(100000))
+    testObj1 = P4OO._P4Python._P4OOP4Python(p4PythonObj=fakeP4Obj)
+
+    async def consume():
+        async with contextlib.aclosing(
+                testObj1.iterCommandAsync("changes")) as p4Changes:
+            async for p4Change in p4Changes:
+                await asyncio.sleep(0)
+
+    async def cancelStream():
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        consumer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await consumer
+
+        # The command was stopped and the connection released
+        assert testObj1._streamThread is None
+        assert fakeP4Obj.delivered < 100000
+        return await testObj1.runCommandAsync("changes", rawOutput=True)
+
+    assert len(asyncio.run(cancelStream())) == 100000
+    assert len(fakeP4Obj.runs) == 2
+
+
+def test_specCache():
+    def userSpec(args):
+        if args[0] == "-d":
+            return ["User %s deleted." % args[1]]
+        return [{"User": args[1], "Email": "%s@example.com" % args[1],
+                 "FullName": args[1].title()}]
+
+    fakeP4Obj = fakeP4({"user": userSpec})
+    specCache = P4OO._SpecCache._P4OOSpecCache(maxSize=2)
+    testObj1 = P4OO._P4Python._P4OOP4Python(p4PythonObj=fakeP4Obj,
+                                            specCache=specCache)
+
+    # Different objects for the same spec share one read
+    for i in range(3):
+        p4User = P4OOUser(id="alice", _p4Conn=testObj1)
+        assert p4User._getSpecAttr('email') == "alice@example.com"
+    assert len(fakeP4Obj.runs) == 1
+    assert specCache.stats()['hits'] == 2
+
+    # Our own changes invalidate the cache
+    p4User.deleteSpec()
+    P4OOUser(id="alice", _p4Conn=testObj1)._getSpecAttr('email')
+    assert fakeP4Obj.runs[-2:] == [["user", "-d", "alice"],
+                                   ["user", "-o", "alice"]]
+    testObj1.refreshSpec(p4User)
+    assert fakeP4Obj.runs[-1] == ["user", "-o", "alice"]
+
+    # LRU eviction
+    for userName in ("bob", "carol", "alice"):
+        P4OOUser(id=userName, _p4Conn=testObj1)._getSpecAttr('email')
+    assert specCache.stats()['evictions'] == 2
+    assert fakeP4Obj.runs[-1] == ["user", "-o", "alice"]
+
+    # Expiry
+    specCache.ttl = 0
+    specCache.clear()
+    for i in range(2):
+        P4OOUser(id="dave", _p4Conn=testObj1)._getSpecAttr('email')
+    assert fakeP4Obj.runs[-2:] == [["user", "-o", "dave"]] * 2
+
+
+def test_specCacheAfterFileCommands():
+    changeStatus = ["pending"]
+
+    def changeSpec(args):
+        return [{"Change": args[-1], "Client": "ws1",
+                 "Status": changeStatus[0]}]
+
+    def submit(args):
+        changeStatus[0] = "submitted"
+        return [{"submittedChange": "5"}]
+
+    fakeP4Obj = fakeP4({"change": changeSpec, "revert": lambda args: [],
+                        "submit": submit})
+    fakeP4Obj.client = "ws1"
+    testObj1 = P4OO._P4Python._P4OOP4Python(
+        p4PythonObj=fakeP4Obj, specCache=P4OO._SpecCache._P4OOSpecCache())
+
+    p4Change = P4OOChange(id=5, _p4Conn=testObj1)
+    assert p4Change._getSpecAttr('status') == "pending"
+    assert P4OOChange(id=5, _p4Conn=testObj1)._getSpecAttr('status') \
+        == "pending"
+    assert len(fakeP4Obj.runs) == 1
+
+    # Files reverted or submitted through us change our changes
+    p4Change.revertOpenedFiles()
+    assert P4OOChange(id=5, _p4Conn=testObj1)._getSpecAttr('status') \
+        == "pending"
+    testObj1.runCommand("submit", change=p4Change)
+    assert P4OOChange(id=5, _p4Conn=testObj1)._getSpecAttr('status') \
+        == "submitted"
+    assert [run[0] for run in fakeP4Obj.runs] \
+        == ["change", "revert", "change", "submit", "change"]
+
+
+def test_persistentCache(tmp_path):
+    def changesRecords(args):
+        lastChange = int(args[-1].split(",")[-1].lstrip("@"))
+        return [{"change": str(i), "user": "user%d" % (i % 3),
+                 "status": "pending" if i == 10 else "submitted"}
+                for i in range(lastChange, 0, -1)]
+
+    def describeRecords(args):
+        return [{"change": change, "user": "user%d" % (int(change) % 3),
+                 "desc": "full description of %s\n" % change,
+                 "status": "pending" if change == "10" else "submitted",
+                 "time": "1700000000"}
+                for change in args if change != "-s"]
+
+    def changeSpec(args):
+        return [{"Change": args[-1], "Status": "submitted",
+                 "Description": "change %s\n" % args[-1]}]
+
+    fakeP4Obj = fakeP4({"changes": changesRecords,
+                        "describe": describeRecords,
+                        "change": changeSpec,
+                        "counter": lambda args: [{"value": "100"}]})
+
+    def newConnection():
+        persistentCache = P4OO._PersistentCache._P4OOPersistentCache(
+            str(tmp_path / "p4oo.db"), pendingTTL=60)
+        return P4OO._P4Python._P4OOP4Python(p4PythonObj=fakeP4Obj,
+                                            persistentCache=persistentCache)
+
+    testObj1 = newConnection()
+    closedRange = P4OOChangeSet(_p4Conn=testObj1).query(
+        files="//depot/...@1,@20", status="submitted")
+    assert closedRange.listObjectIDs() == list(range(20, 0, -1))
+    P4OOChangeSet(_p4Conn=testObj1).query(files="//depot/...@1,@200")
+    assert [run[0] for run in fakeP4Obj.runs] \
+        == ["counter", "changes", "counter", "changes"]
+
+    for changeObj in closedRange[:3]:
+        assert changeObj._getSpecAttr('description') \
+            == "full description of %d\n" % changeObj.id
+    assert P4OOChange(id=5, _p4Conn=testObj1)._getSpecAttr('status') \
+        == "submitted"
+    runCount = len(fakeP4Obj.runs)
+
+    # A new run (new process) gets the same answers without the server
+    fakeP4Obj.runs = []
+    testObj2 = newConnection()
+    closedRange = P4OOChangeSet(_p4Conn=testObj2).query(
+        files="//depot/...@1,@20", status="submitted")
+    assert closedRange.listObjectIDs() == list(range(20, 0, -1))
+    P4OOChangeSet(_p4Conn=testObj2).query(files="//depot/...@1,@200")
+    assert closedRange[0]._getSpecAttr('description') \
+        == "full description of 20\n"
+    assert P4OOChange(id=5, _p4Conn=testObj2)._getSpecAttr('status') \
+        == "submitted"
+    # The counter is re-read for a range past it, and the range is open
+    assert fakeP4Obj.runs == [["counter", "change"], ["counter", "change"],
+                              ["changes", "//depot/...@1,@200"]]
+    assert runCount > len(fakeP4Obj.runs)
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/test_P4OO__P4PythonPool.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+unittest test suite for _P4PythonPool
+'''
+
+######################################################################
+# Includes
+#
+import asyncio
+import threading
+import time
+
+import pytest
+
+from P4OO._P4Python import _P4OOP4Python
+from P4OO._P4PythonPool import _P4OOP4PythonPool
+from P4OO._P4Transport import _P4OOSimulatedP4
+from P4OO.Change import P4OOChange, P4OOChangeSet
+from P4OO.Label import P4OOLabel
+from P4OO.Exceptions import P4OOFatal
+
+
+def flattenArgs(args):
+    flatArgs = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            flatArgs.extend(flattenArgs(arg))
+        else:
+            flatArgs.append(arg)
+    return flatArgs
+
+
+class fakeP4(object):
+    """ Just enough of a P4.P4 stand-in for the pool: connection state,
+        the isolated settings, and canned 'changes' output.
+    """
+
+    def __init__(self):
+        self.client = "defaultClient"
+        self.user = "defaultUser"
+        self.tagged = 1
+        self.exception_level = 2
+        self.handler = None
+        self.maxresults = 0
+        self.maxscanrows = 0
+        self.maxlocktime = 0
+        self.input = None
+        self.errors = []
+        self.warnings = []
+        self.runs = []
+        self._connected = False
+
+    def connected(self):
+        return self._connected
+
+    def connect(self):
+        self._connected = True
+        return self
+
+    def disconnect(self):
+        self._connected = False
+
+    def run(self, p4SubCmd, *args):
+        # P4Python flattens nested argument lists
+        args = flattenArgs(args)
+        self.runs.append(p4SubCmd)
+        self.warnings = []
+        if p4SubCmd == "diff2":
+            # //depot/dirN/...@label1 --> diff of dirN, later dirs finishing
+            # first.  dir0 has no files.
+            viewPath = args[-2].split("@")[0]
+            dirNum = int(viewPath.split("/")[3][3:])
+            time.sleep(0.01 * (5 - dirNum))
+            if dirNum == 0:
+                self.warnings = ["No files."]
+                return []
+            return ["==== %s ====" % viewPath, "diff of dir%d" % dirNum]
+        if p4SubCmd == "changes" and "-l" in args:
+            viewPath = args[-1].split("@")[0]
+            dirNum = int(viewPath.split("/")[3][3:])
+            time.sleep(0.01 * (5 - dirNum))
+            return [{"change": str(dirNum * 10 + i), "user": self.user,
+                     "status": "submitted"} for i in (2, 1)]
+        if p4SubCmd == "changes":
+            # give other threads a chance to run at the same time
+            time.sleep(0.01)
+            records = [{"change": str(i), "user": self.user,
+                        "status": "submitted"} for i in range(3, 0, -1)]
+            if self.handler is None:
+                return records
+            for record in records:
+                self.handler.outputStat(record)
+        return []
+
+
+def test_checkoutCheckin():
+    testPool = _P4OOP4PythonPool(maxSize=2, p4Factory=fakeP4)
+
+    p4PythonObj1 = testPool.checkout()
+    assert p4PythonObj1.connected()
+    assert p4PythonObj1.exception_level == 0
+    p4PythonObj2 = testPool.checkout()
+    assert p4PythonObj2 is not p4PythonObj1
+    assert testPool.stats() == {'idle': 0, 'checkedOut': 2, 'maxSize': 2}
+
+    # Pool is exhausted
+    with pytest.raises(P4OOFatal):
+        testPool.checkout(timeout=0.05)
+
+    testPool.checkin(p4PythonObj1)
+    with testPool.connection() as p4PythonObj3:
+        assert p4PythonObj3 is p4PythonObj1
+    assert testPool.stats()['idle'] == 1
+
+    testPool.checkin(p4PythonObj2)
+    testPool.close()
+    assert not p4PythonObj1.connected()
+    assert not p4PythonObj2.connected()
+    with pytest.raises(P4OOFatal):
+        testPool.checkout()
+
+
+def test_configIsolation():
+    testPool = _P4OOP4PythonPool(maxSize=1, p4Factory=fakeP4)
+
+    with testPool.connection() as p4PythonObj:
+        p4PythonObj.client = "otherClient"
+        p4PythonObj.tagged = 0
+        p4PythonObj.handler = object()
+
+    with testPool.connection() as p4PythonObj2:
+        assert p4PythonObj2 is p4PythonObj
+        assert p4PythonObj2.client == "defaultClient"
+        assert p4PythonObj2.tagged == 1
+        assert p4PythonObj2.handler is None
+
+
+def test_healthCheck():
+    testPool = _P4OOP4PythonPool(maxSize=1, pingAfter=0, p4Factory=fakeP4)
+
+    with testPool.connection() as p4PythonObj:
+        pass
+
+    # Idle connections get pinged before reuse
+    with testPool.connection() as p4PythonObj2:
+        assert p4PythonObj2 is p4PythonObj
+    assert p4PythonObj.runs == ["info"]
+
+    # Dropped connections get replaced
+    p4PythonObj.disconnect()
+    with testPool.connection() as p4PythonObj3:
+        assert p4PythonObj3 is not p4PythonObj
+        assert p4PythonObj3.connected()
+    assert testPool.stats()['idle'] == 1
+
+
+def test_idleEviction():
+    testPool = _P4OOP4PythonPool(maxSize=2, maxIdle=0.05, p4Factory=fakeP4)
+
+    with testPool.connection() as p4PythonObj:
+        pass
+    time.sleep(0.1)
+
+    with testPool.connection() as p4PythonObj2:
+        assert p4PythonObj2 is not p4PythonObj
+    assert not p4PythonObj.connected()
+    assert testPool.stats()['idle'] == 1
+
+
+class slowConnectP4(fakeP4):
+    """ fakeP4 taking a while to connect, counting live connections """
+
+    lock = threading.Lock()
+    live = 0
+    maxLive = 0
+    failNext = False
+
+    def connect(self):
+        time.sleep(0.2)
+        cls = type(self)
+        with cls.lock:
+            if cls.failNext:
+                cls.failNext = False
+                raise RuntimeError("Connect to server failed")
+            cls.live += 1
+            cls.maxLive = max(cls.maxLive, cls.live)
+        return super().connect()
+
+    def disconnect(self):
+        if self._connected:
+            with type(self).lock:
+                type(self).live -= 1
+        super().disconnect()
+
+
+def test_slowConnect():
+    testPool = _P4OOP4PythonPool(maxSize=2, p4Factory=slowConnectP4)
+    maxCheckedOut = []
+    errors = []
+
+    def useConnection():
+        try:
+            with testPool.connection() as p4PythonObj:
+                maxCheckedOut.append(testPool.stats()['checkedOut'])
+                time.sleep(0.05)
+                # Dead connections are replaced while holding their slot
+                p4PythonObj.disconnect()
+        except Exception as exc:
+            errors.append(exc)
+
+    slowConnectP4.failNext = True
+    threads = [threading.Thread(target=useConnection) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # One connect failed, and only gave up its own slot
+    assert len(errors) == 1
+    assert slowConnectP4.maxLive <= 2
+    assert max(maxCheckedOut) <= 2
+    assert testPool.stats() == {'idle': 2, 'checkedOut': 0, 'maxSize': 2}
+
+    # Replacing the dead connections
+    threads = [threading.Thread(target=useConnection) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors[1:]
+    assert slowConnectP4.maxLive <= 2
+    assert max(maxCheckedOut) <= 2
+
+
+def test_pooledQueries():
+    testPool = _P4OOP4PythonPool(maxSize=3, p4Factory=fakeP4)
+    changeSet = P4OOChangeSet(p4Pool=testPool)
+
+    results = []
+
+    def runQuery():
+        results.append(changeSet.query().listObjectIDs())
+
+    threads = [threading.Thread(target=runQuery) for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[3, 2, 1]] * 12
+    assert testPool.stats() == {'idle': 3, 'checkedOut': 0, 'maxSize': 3}
+
+    # Streaming doesn't tie up a pooled connection object
+    p4Changes = changeSet.query(stream=True)
+    assert next(p4Changes).id == 3
+    assert changeSet.query().listObjectIDs() == [3, 2, 1]
+    assert [p4Change.id for p4Change in p4Changes] == [2, 1]
+
+
+def test_pooledAsyncQueries():
+    testPool = _P4OOP4PythonPool(maxSize=4, p4Factory=fakeP4)
+    changeSet = P4OOChangeSet(p4Pool=testPool)
+
+    async def runQueries():
+        return await asyncio.gather(
+            *[changeSet.queryAsync() for i in range(50)])
+
+    startTime = time.monotonic()
+    results = asyncio.run(runQueries())
+    assert [result.listObjectIDs() for result in results] == [[3, 2, 1]] * 50
+
+    # 4 at a time, not one after the other
+    assert time.monotonic() - startTime < 50 * 0.01
+    assert testPool.stats()['idle'] <= 4
+    testPool.close()
+
+
+def test_asyncStreamHoldingPool():
+    simulatedP4 = _P4OOSimulatedP4(outputSize=5000)
+    testPool = _P4OOP4PythonPool(maxSize=1, p4Factory=simulatedP4.fork)
+    p4Conn = _P4OOP4Python(p4Pool=testPool)
+
+    async def streamChanges():
+        changeCount = 0
+        async for p4Change in p4Conn.iterCommandAsync("changes"):
+            changeCount += 1
+            if changeCount == 1:
+                # The stream has the only connection, so this has to wait
+                # for it without tying up the pool's only worker
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        p4Conn.runCommandAsync("counters"), 0.1)
+        counters = await p4Conn.runCommandAsync("counters")
+        return (changeCount, len(counters))
+
+    assert asyncio.run(asyncio.wait_for(streamChanges(), 30)) \
+        == (5000, 5000)
+    assert testPool.stats() == {'idle': 1, 'checkedOut': 0, 'maxSize': 1}
+    testPool.close()
+
+
+class fakeClient(object):
+    def _getSpecAttr(self, attrName):
+        assert attrName == 'View'
+        return ["//depot/dir%d/... //client/dir%d/..." % (i, i)
+                for i in range(5)]
+
+
+def test_parallelViewLines():
+    testPool = _P4OOP4PythonPool(maxSize=5, p4Factory=fakeP4)
+
+    firstLabel = P4OOLabel(id="label1", p4Pool=testPool)
+    otherLabel = P4OOLabel(id="label2", p4Pool=testPool)
+    serialDiffs = firstLabel.getDiffsFromLabels(otherLabel, fakeClient())
+    parallelDiffs = firstLabel.getDiffsFromLabels(otherLabel, fakeClient(),
+                                                  parallelism=5)
+
+    # View order, with the warning for dir0 ignored either way
+    assert parallelDiffs == serialDiffs
+    assert parallelDiffs[1::2] == ["diff of dir%d" % i for i in range(1, 5)]
+
+    firstChange = P4OOChange(id=1, p4Pool=testPool)
+    otherChange = P4OOChange(id=100, p4Pool=testPool)
+    serialChanges = firstChange.getChangesFromChangeNums(otherChange,
+                                                         fakeClient())
+    parallelChanges = firstChange.getChangesFromChangeNums(
+        otherChange, fakeClient(), parallelism=3)
+    assert parallelChanges.listObjectIDs() == serialChanges.listObjectIDs()
+    assert parallelChanges.listObjectIDs() \
+        == [dirNum * 10 + i for dirNum in range(5) for i in (2, 1)]
+    assert all(changeObj._p4Conn is firstChange._getP4Connection()
+               for changeObj in parallelChanges)
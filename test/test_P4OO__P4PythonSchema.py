@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/test_P4OO__P4PythonSchema.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+unittest test suite for _P4PythonSchema
+'''
+
+######################################################################
+# Includes
+#
+import os
+import shutil
+import sys
+from datetime import datetime
+
+import pytest
+
+import P4OO.Exceptions
+import P4OO._P4PythonSchema
+from P4OO._P4PythonSchema import _P4OOP4PythonSchema
+
+
+######################################################################
+# Configuration
+#
+configFile = os.path.dirname(P4OO._P4PythonSchema.__file__) + "/p4Config.yml"
+
+
+def test_cachedSchemaIsShared():
+    schema1 = _P4OOP4PythonSchema.getCachedSchema(configFile=configFile)
+    schema2 = _P4OOP4PythonSchema.getCachedSchema()
+
+    # Same config file, same compiled schema object
+    assert schema1 is schema2
+    assert schema1.getCmd("changes") is schema2.getCmd("changes")
+
+
+def test_cachedSchemaMtime(tmp_path):
+    tmpConfig = tmp_path / "p4Config.yml"
+    shutil.copy(configFile, tmpConfig)
+
+    schema1 = _P4OOP4PythonSchema.getCachedSchema(configFile=str(tmpConfig))
+    assert schema1 is not _P4OOP4PythonSchema.getCachedSchema(configFile=configFile)
+
+    # Touching the config file forces a re-read
+    stat = os.stat(tmpConfig)
+    os.utime(tmpConfig, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    schema2 = _P4OOP4PythonSchema.getCachedSchema(configFile=str(tmpConfig))
+    assert schema1 is not schema2
+    assert schema2 is _P4OOP4PythonSchema.getCachedSchema(configFile=str(tmpConfig))
+
+
+def test_cachedSchemaReadOnly():
+    schema = _P4OOP4PythonSchema.getCachedSchema()
+    cmdObj = schema.getCmd("changes")
+
+    with pytest.raises(TypeError):
+        cmdObj.commandDict['queryOptions']['user']['option'] = "-x"
+
+    # YAML aliases still resolve to the same definitions
+    assert schema.getCmd("changelists").commandDict is cmdObj.commandDict
+
+
+def test_compiledSchema(tmp_path, monkeypatch):
+    # The shipped artifact has to be recompiled whenever p4Config.yml changes
+    with open(configFile, 'rb') as stream:
+        assert P4OO._P4PythonSchema._loadCompiled(configFile, stream.read()) \
+            is not None
+
+    tmpConfig = tmp_path / "p4Config.yml"
+    shutil.copy(configFile, tmpConfig)
+    artifactFile = P4OO._P4PythonSchema.compileSchema(str(tmpConfig))
+    assert artifactFile == str(tmp_path / "p4Config.marshal")
+
+    # An up to date artifact is loaded without yaml
+    monkeypatch.setitem(sys.modules, "yaml", None)
+    schema = _P4OOP4PythonSchema(configFile=str(tmpConfig))
+    assert schema.getCmd("changelists").commandDict \
+        is schema.getCmd("changes").commandDict
+
+    # A stale one is ignored
+    with open(tmpConfig, 'a', encoding="utf-8") as stream:
+        stream.write("\n")
+    with pytest.raises(ImportError):
+        _P4OOP4PythonSchema(configFile=str(tmpConfig))
+
+
+def test_validateQuery():
+    from P4OO.Change import P4OOChange
+    from P4OO.Client import P4OOClient
+    from P4OO.User import P4OOUser, P4OOUserSet
+
+    schema = _P4OOP4PythonSchema.getCachedSchema()
+
+    # options with multiplicity go to the front, last one first
+    (execArgs, p4Config) = schema.getCmd("changes").validateQuery(
+        {"client": P4OOClient(id="ws"), "user": P4OOUser(id="bob"),
+         "maxresults": 1, "status": None, "files": "//...",
+         "longOutput": True})
+    assert execArgs == ['-l', '-m', 1, '-u', 'bob', '-c', 'ws', '//...']
+    assert p4Config == {}
+
+    # Sets are expanded to their IDs, configOptions are split out
+    userSet = P4OOUserSet(iterable=[P4OOUser(id='a'), P4OOUser(id='b')])
+    assert schema.getCmd("users").validateQuery({"users": userSet}) \
+        == (['a', 'b'], {})
+    assert schema.getCmd("add").validateQuery(
+        {"p4client": P4OOClient(id="ws"), "change": P4OOChange(id=5),
+         "files": ("a", "b")}) == (['-c', 5, 'a', 'b'], {'client': 'ws'})
+
+    # bundled option arguments
+    assert schema.getCmd("describe").validateQuery(
+        {"diffoptions": "u", "changes": ["7", "8"]}) == (['-du', '7', '8'], {})
+
+
+def test_validateQueryErrors():
+    schema = _P4OOP4PythonSchema.getCachedSchema()
+
+    with pytest.raises(P4OO.Exceptions.P4OOFatal, match="Invalid Filter key"):
+        schema.getCmd("changes").validateQuery({"bogus": 1})
+
+    with pytest.raises(P4OO.Exceptions.P4OOFatal, match="only these types"):
+        schema.getCmd("changes").validateQuery({"maxresults": "x"})
+
+    with pytest.raises(P4OO.Exceptions.P4OOFatal, match="accepts 1 arguments"):
+        schema.getCmd("changes").validateQuery({"user": ["a", "b"]})
+
+    with pytest.raises(P4OO.Exceptions.P4OOFatal, match="not supported"):
+        schema.getCmd("counter").validateQuery({})
+
+
+def test_translateP4SpecToPython():
+    schema = _P4OOP4PythonSchema.getCachedSchema()
+
+    changeSpec = schema.getSpecCmd("change").translateP4SpecToPython(
+        {"Change": "12", "User": "bob", "Date": "2024/02/03 10:11:12",
+         "Unknown": "ignored"})
+    assert changeSpec == {"change": 12, "user": "bob",
+                          "date": datetime(2024, 2, 3, 10, 11, 12)}
+
+    # epoch seconds dates, shared timestamps share datetime objects
+    clientCmd = schema.getSpecCmd("client")
+    clientSpec1 = clientCmd.translateP4SpecToPython(
+        {"Client": "ws1", "Update": "1700000000", "Access": "1700000000"})
+    clientSpec2 = clientCmd.translateP4SpecToPython(
+        {"Client": "ws2", "Update": "1700000000"})
+    assert clientSpec1["update"] == datetime.fromtimestamp(1700000000)
+    assert clientSpec1["access"] is clientSpec2["update"]
+
+    with pytest.raises(P4OO.Exceptions.P4OOFatal):
+        schema.getCmd("changes").translateP4SpecToPython({})
+
+
+def test_translatePySpecToP4():
+    schema = _P4OOP4PythonSchema.getCachedSchema()
+
+    p4Spec = schema.getSpecCmd("client").translatePySpecToP4(
+        {"owner": "bob", "host": None, "update": "ignored"},
+        {"Client": "ws", "Host": "myhost"})
+    assert p4Spec == {"Client": "ws", "Owner": "bob"}
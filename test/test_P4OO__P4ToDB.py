@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/test_P4OO__P4ToDB.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+unittest test suite for _P4ToDB
+'''
+
+######################################################################
+# Includes
+#
+import datetime
+import sqlite3
+
+import pytest
+
+from P4OO._P4ToDB import _P4OOP4ToDB
+from P4OO.Change import P4OOChange, P4OOChangeSet
+from P4OO.Client import P4OOClient, P4OOClientSet
+from P4OO.Counter import P4OOCounter, P4OOCounterSet
+from P4OO.Group import P4OOGroup, P4OOGroupSet
+from P4OO.Label import P4OOLabelSet
+from P4OO.User import P4OOUser, P4OOUserSet
+from P4OO.Exceptions import P4OOFatal
+
+
+class fakeP4(object):
+    """ Stand-in P4.P4 for the commands the mirror hands to P4Python """
+
+    def __init__(self):
+        self.runs = []
+        self.input = None
+        self.tagged = 1
+        self.errors = []
+        self.warnings = []
+
+    def run(self, p4SubCmd, args):
+        self.runs.append([p4SubCmd] + list(args))
+        return [{"counter": args[0], "value": args[-1]}]
+
+
+@pytest.fixture()
+def p4SQLDbh():
+    p4SQLDbh = sqlite3.connect(":memory:")
+    _P4OOP4ToDB.createSchema(p4SQLDbh)
+
+    with p4SQLDbh:
+        p4SQLDbh.executemany(
+            "INSERT INTO change VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(change, change, "ws%d" % (change % 2), "user%d" % (change % 3),
+              1700000000 + change, 0 if change == 10 else 1, None,
+              "change %d\nmore detail\n" % change, None)
+             for change in range(1, 11)])
+        p4SQLDbh.executemany(
+            "INSERT INTO domain (name, type, host, root, owner, updateDate,"
+            " accessDate, options, description) VALUES"
+            " (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [("ws0", "c", "host0", "/ws0", "user0", 1700000000, 1700000100,
+              "noallwrite", "ws0\n"),
+             ("ws1", "c", "host1", "/ws1", "user1", 1700000000, 1700000100,
+              "noallwrite", "ws1\n"),
+             ("rel1", "l", None, None, "user1", 1700000000, 1700000100,
+              "unlocked", "rel1\n")])
+        p4SQLDbh.executemany(
+            "INSERT INTO view VALUES (?, ?, ?, ?, ?)",
+            [("ws0", 0, 0, "//ws0/...", "//depot/..."),
+             ("ws0", 1, 1, "//ws0/tmp/...", "//depot/tmp/..."),
+             ("rel1", 0, 0, None, "//depot/rel1/...")])
+        p4SQLDbh.executemany(
+            "INSERT INTO user VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [("user%d" % i, "user%d@example.com" % i, None, 1700000000,
+              1700000100, "User %d" % i, "service" if i == 3 else None)
+             for i in range(4)])
+        p4SQLDbh.executemany(
+            "INSERT INTO \"group\" (user, \"group\", type, maxResults)"
+            " VALUES (?, ?, ?, ?)",
+            [("user0", "devs", 1, "1000"), ("user1", "devs", 1, "1000"),
+             ("user0", "devs", 2, "1000"), ("devs", "all", 0, None)])
+        p4SQLDbh.executemany("INSERT INTO counters VALUES (?, ?)",
+                             [("change", "10"), ("journal", "42")])
+
+    return p4SQLDbh
+
+
+def test_querySpecs(p4SQLDbh):
+    changeSet = P4OOChangeSet(p4SQLDbh=p4SQLDbh)
+
+    assert changeSet.query().listObjectIDs() == list(range(10, 0, -1))
+    assert changeSet.query(user="user1", status="submitted",
+                           maxresults=2).listObjectIDs() == [7, 4]
+    assert changeSet.query(files="//...@3,@5").listObjectIDs() == [5, 4, 3]
+    assert changeSet.query(files="@=3").listObjectIDs() == [3]
+
+    # Changes in any of the ranges, like p4
+    assert changeSet.query(files=["//...@1,@2", "//...@8,@9"]
+                           ).listObjectIDs() == [9, 8, 2, 1]
+    assert changeSet.query(files=["//...@1,@2", "//...@=9", "//...@4"],
+                           user="user1").listObjectIDs() == [4, 1]
+
+    p4Changes = changeSet.query(client="ws0", longoutput=1)
+    assert p4Changes.listObjectIDs() == [10, 8, 6, 4, 2]
+    assert p4Changes[0]._getSpecAttr('status') == "pending"
+    assert p4Changes[0]._getSpecAttr('description') \
+        == "change 10\nmore detail\n"
+    assert p4Changes[0]._getSpecAttr('date') \
+        == datetime.datetime.fromtimestamp(1700000010)
+
+    assert P4OOClientSet(p4SQLDbh=p4SQLDbh).query(
+        user="user1").listObjectIDs() == ["ws1"]
+    assert P4OOClientSet(p4SQLDbh=p4SQLDbh).query(
+        namefilter="ws*").listObjectIDs() == ["ws0", "ws1"]
+    assert P4OOLabelSet(p4SQLDbh=p4SQLDbh).query().listObjectIDs() \
+        == ["rel1"]
+    assert P4OOUserSet(p4SQLDbh=p4SQLDbh).query().listObjectIDs() \
+        == ["user0", "user1", "user2"]
+    assert P4OOUserSet(p4SQLDbh=p4SQLDbh).query(
+        allusers=True).listObjectIDs() == ["user0", "user1", "user2", "user3"]
+    assert P4OOGroupSet(p4SQLDbh=p4SQLDbh).query(
+        member="user1").listObjectIDs() == ["devs"]
+    assert P4OOCounterSet(p4SQLDbh=p4SQLDbh).query().listObjectIDs() \
+        == ["change", "journal"]
+
+
+def test_readSpec(p4SQLDbh):
+    p4Change = P4OOChange(id=4, p4SQLDbh=p4SQLDbh)
+    assert p4Change._getSpecAttr('user') == "user1"
+    assert p4Change._getSpecAttr('client') == "ws0"
+    assert p4Change._getSpecAttr('status') == "submitted"
+
+    p4Client = P4OOClient(id="ws0", p4SQLDbh=p4SQLDbh)
+    assert p4Client._getSpecAttr('view') \
+        == ["//depot/... //ws0/...", "-//depot/tmp/... //ws0/tmp/..."]
+    assert p4Client._getSpecAttr('host') == "host0"
+
+    p4User = P4OOUser(id="user2", p4SQLDbh=p4SQLDbh)
+    assert p4User._getSpecAttr('email') == "user2@example.com"
+
+    p4Group = P4OOGroup(id="devs", p4SQLDbh=p4SQLDbh)
+    assert p4Group._getSpecAttr('users') == ["user0", "user1"]
+    assert p4Group._getSpecAttr('owners') == ["user0"]
+    assert p4Group._getSpecAttr('maxresults') == "1000"
+
+    with pytest.raises(P4OOFatal):
+        P4OOUser(id="nobody", p4SQLDbh=p4SQLDbh)._getSpecAttr('email')
+
+    assert P4OOCounter(id="journal", p4SQLDbh=p4SQLDbh).getValue() == 42
+    assert P4OOCounter(id="unset", p4SQLDbh=p4SQLDbh).getValue() == 0
+
+
+def test_writesGoToP4Python(p4SQLDbh):
+    fakeP4Obj = fakeP4()
+    p4Counter = P4OOCounter(id="journal", p4SQLDbh=p4SQLDbh,
+                            p4PythonObj=fakeP4Obj)
+
+    assert p4Counter.getValue() == 42
+    assert fakeP4Obj.runs == []
+
+    assert p4Counter.setValue(43) == 43
+    assert fakeP4Obj.runs == [["counter", "journal", 43]]
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/test_P4OO__P4ToDBIngest.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+unittest test suite for _P4ToDBIngest
+'''
+
+######################################################################
+# Includes
+#
+import gzip
+import sqlite3
+
+from P4OO._P4ToDBIngest import _P4OOJournalIngester
+from P4OO.Change import P4OOChange, P4OOChangeSet
+from P4OO.Client import P4OOClient
+from P4OO.Counter import P4OOCounter
+from P4OO.Group import P4OOGroup
+from P4OO.Label import P4OOLabelSet
+from P4OO.User import P4OOUserSet
+
+
+CHECKPOINT = """\
+@pv@ 7 @db.counters@ @change@ 3 
+@pv@ 7 @db.counters@ @journal@ 5 
+@pv@ 3 @db.user@ @alice@ @alice@@example.com@ @@ 1700000000 1700000100 @Alice A@ @@ 0 @@ 0 0 
+@pv@ 3 @db.user@ @svc@ @svc@@example.com@ @@ 1700000000 1700000100 @Service@ @@ 0 @@ 0 2 
+@pv@ 8 @db.group@ @alice@ @devs@ 0 1000 0 0 43200 0 0 
+@pv@ 8 @db.group@ @alice@ @devs@ 2 1000 0 0 43200 0 0 
+@pv@ 6 @db.domain@ @ws1@ 99 @host1@ @/ws1@ @@ @@ @alice@ 1700000000 1700000100 1 @ws1 client
+@ 
+@pv@ 6 @db.domain@ @rel1@ 108 @@ @@ @@ @@ @alice@ 1700000000 1700000100 8 @rel1@ 
+@pv@ 4 @db.view@ @ws1@ 0 0 @//ws1/...@ @//depot/...@ 
+@pv@ 4 @db.view@ @ws1@ 1 1 @//ws1/tmp/...@ @//depot/tmp/...@ 
+@pv@ 0 @db.desc@ 1 @first change
+with @@ sign
+@ 
+@pv@ 5 @db.change@ 1 1 @ws1@ @alice@ 1700000001 1 0 @first change@ @@ 
+@pv@ 5 @db.change@ 2 2 @ws1@ @alice@ 1700000002 1 0 @second@ @@ 
+@pv@ 5 @db.change@ 3 3 @ws1@ @alice@ 1700000003 0 1 @pending@ @@ 
+@pv@ 3 @db.label@ @rel1@ @//depot/a.c@ 1 
+@pv@ 3 @db.have@ @//ws1/a.c@ @//depot/a.c@ 1 0 1700000001 
+@ex@ 0 
+"""
+
+JOURNAL = """\
+@pv@ 5 @db.change@ 4 4 @ws1@ @alice@ 1700000004 1 0 @fourth@ @@ 
+@dv@ 5 @db.change@ 3 3 @ws1@ @alice@ 1700000003 0 1 @pending@ @@ 
+@rv@ 7 @db.counters@ @change@ 4 
+@pv@ 9 @db.rev@ @//depot/a.c@ 2 0 0 4 
+@ex@ 0 
+"""
+
+
+def test_checkpointAndJournal(tmp_path):
+    checkpointFile = str(tmp_path / "checkpoint.1.gz")
+    with gzip.open(checkpointFile, "wt") as checkpoint:
+        checkpoint.write(CHECKPOINT)
+    journalFile = str(tmp_path / "journal.1")
+    with open(journalFile, "w") as journal:
+        journal.write(JOURNAL)
+
+    p4SQLDbh = sqlite3.connect(":memory:")
+    ingester = _P4OOJournalIngester(p4SQLDbh, batchSize=3)
+
+    stats = ingester.loadCheckpoint(checkpointFile)
+    assert stats['records'] == 17
+    assert stats['applied'] == 16
+    assert stats['bytes'] > 0 and 'recordsPerSecond' in stats
+
+    p4Change = P4OOChange(id=1, p4SQLDbh=p4SQLDbh)
+    assert p4Change._getSpecAttr('description') \
+        == "first change\nwith @ sign\n"
+    assert p4Change._getSpecAttr('status') == "submitted"
+    assert P4OOChangeSet(p4SQLDbh=p4SQLDbh).query().listObjectIDs() \
+        == [3, 2, 1]
+
+    p4Client = P4OOClient(id="ws1", p4SQLDbh=p4SQLDbh)
+    assert p4Client._getSpecAttr('host') == "host1"
+    assert p4Client._getSpecAttr('options').startswith("allwrite noclobber")
+    assert p4Client._getSpecAttr('view') \
+        == ["//depot/... //ws1/...", "-//depot/tmp/... //ws1/tmp/..."]
+    assert P4OOLabelSet(p4SQLDbh=p4SQLDbh).query().listObjectIDs() \
+        == ["rel1"]
+
+    assert P4OOUserSet(p4SQLDbh=p4SQLDbh).query().listObjectIDs() \
+        == ["alice"]
+    p4Group = P4OOGroup(id="devs", p4SQLDbh=p4SQLDbh)
+    assert p4Group._getSpecAttr('users') == ["alice"]
+    assert p4Group._getSpecAttr('owners') == ["alice"]
+    assert p4Group._getSpecAttr('maxresults') == "1000"
+    assert p4Group._getSpecAttr('maxscanrows') == "unset"
+
+    stats = ingester.applyJournal(journalFile)
+    assert (stats['records'], stats['applied']) == (5, 3)
+    assert ingester.applyJournal(journalFile) is None
+
+    assert P4OOChangeSet(p4SQLDbh=p4SQLDbh).query().listObjectIDs() \
+        == [4, 2, 1]
+    assert P4OOCounter(id="change", p4SQLDbh=p4SQLDbh).getValue() == 4
+    assert [row[:2] for row in ingester.appliedFiles()] \
+        == [("checkpoint.1.gz", "checkpoint"), ("journal.1", "journal")]
+
+    # Reloading a checkpoint starts the mirror over
+    ingester.loadCheckpoint(checkpointFile)
+    assert P4OOChangeSet(p4SQLDbh=p4SQLDbh).query().listObjectIDs() \
+        == [3, 2, 1]
+    assert [row[1] for row in ingester.appliedFiles()] == ["checkpoint"]
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/test_P4OO__P4Transport.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+unittest test suite for _P4Transport
+'''
+
+######################################################################
+# Includes
+#
+import time
+
+import pytest
+
+from P4OO._P4Python import _P4OOP4Python
+from P4OO._P4PythonPool import _P4OOP4PythonPool
+from P4OO._P4Transport import _P4OORecordingP4, _P4OOReplayP4, \
+    _P4OOSimulatedP4
+from P4OO.Change import P4OOChange, P4OOChangeSet
+from P4OO.Counter import P4OOCounter
+from P4OO.User import P4OOUser
+from P4OO.Exceptions import P4OOFatal, P4Warning
+
+
+class fakeP4(_P4OOSimulatedP4):
+    """ Simulated server that also warns about unknown counters """
+
+    def _execute(self, p4SubCmd, args, p4Input):
+        if p4SubCmd == "counter" and args[0] == "missing":
+            return ([], [], ["No such counter 'missing'."])
+        return _P4OOSimulatedP4._execute(self, p4SubCmd, args, p4Input)
+
+
+def test_simulatedServer():
+    simulatedP4 = _P4OOSimulatedP4(outputSize=5,
+                                   commandOutputSize={'users': 2})
+    changeSet = P4OOChangeSet(p4PythonObj=simulatedP4)
+
+    assert changeSet.query().listObjectIDs() == [5, 4, 3, 2, 1]
+    assert changeSet.query(maxresults=2).listObjectIDs() == [5, 4]
+    assert [p4Change.id for p4Change in changeSet.query(stream=True)] \
+        == [5, 4, 3, 2, 1]
+
+    assert P4OOUser(id="bob", p4PythonObj=simulatedP4)._getSpecAttr('user') \
+        == "bob"
+    assert P4OOCounter(id="change", p4PythonObj=simulatedP4).getValue() == 0
+    assert simulatedP4.commandCounts() \
+        == {'changes': 3, 'user': 1, 'counter': 1}
+
+
+def test_simulatedLatency():
+    simulatedP4 = _P4OOSimulatedP4(latency=0.05)
+    p4Pool = _P4OOP4PythonPool(maxSize=4, p4Factory=simulatedP4.fork)
+    counters = ["counter%d" % i for i in range(8)]
+
+    # Pooled, and forked from a single stand-in P4 object
+    for p4Conn in (_P4OOP4Python(p4Pool=p4Pool),
+                   _P4OOP4Python(p4PythonObj=simulatedP4)):
+        startTime = time.monotonic()
+        p4Out = p4Conn.mapParallel(
+            lambda p4Conn, counter: p4Conn.readCounter(counter), counters,
+            parallelism=4)
+        elapsed = time.monotonic() - startTime
+
+        assert p4Out == [0] * 8
+        # 8 commands 4 at a time is 2 rounds of latency, not 8
+        assert 0.1 <= elapsed < 0.3
+
+    assert simulatedP4.commandCounts() == {'counter': 16}
+    p4Pool.close()
+
+
+def test_recordReplay(tmp_path):
+    fixtureFile = str(tmp_path / "fixture.jsonl")
+
+    recordingP4 = _P4OORecordingP4(fakeP4(outputSize=3, exception_level=0).connect(),
+                                   fixtureFile)
+    changeSet = P4OOChangeSet(p4PythonObj=recordingP4)
+    recordedIDs = changeSet.query().listObjectIDs()
+    streamedIDs = [p4Change.id for p4Change in changeSet.query(stream=True)]
+    recordedDesc = P4OOChange(id=2, p4PythonObj=recordingP4) \
+        ._getSpecAttr('description')
+    with pytest.raises(P4Warning):
+        P4OOCounter(id="missing", p4PythonObj=recordingP4).getValue()
+
+    replayP4 = _P4OOReplayP4(fixtureFile, exception_level=0).connect()
+    changeSet = P4OOChangeSet(p4PythonObj=replayP4)
+    assert changeSet.query().listObjectIDs() == recordedIDs == [3, 2, 1]
+    assert [p4Change.id for p4Change in changeSet.query(stream=True)] \
+        == streamedIDs == [3, 2, 1]
+    assert P4OOChange(id=2, p4PythonObj=replayP4) \
+        ._getSpecAttr('description') == recordedDesc == "Simulated change 2\n"
+    with pytest.raises(P4Warning):
+        P4OOCounter(id="missing", p4PythonObj=replayP4).getValue()
+
+    # Anything not recorded can't be replayed
+    with pytest.raises(P4OOFatal):
+        changeSet.query(maxresults=1)
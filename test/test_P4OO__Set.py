@@ -109,3 +109,73 @@ def test_setSetAddDel():
 
 #    def test_Exceptions(self):
 #        pass
+
+
+def test_setIndexing():
+    testObj1 = P4OO._Set._P4OOSet(iterable=range(10))
+
+    assert testObj1[0] == 0
+    assert testObj1[9] == 9
+    assert testObj1[-1] == 9
+    assert testObj1[-10] == 0
+
+    try:
+        testObj1[10]
+        assert False, "index past the end should raise KeyError"
+    except KeyError:
+        pass
+
+    # slices are sets of the same type
+    testObj2 = testObj1[2:5]
+    assert isinstance(testObj2, P4OO._Set._P4OOSet)
+    assert repr(testObj2) == "_P4OOSet([2, 3, 4])"
+    assert repr(testObj1[::-3]) == "_P4OOSet([9, 6, 3, 0])"
+
+    # indexing stays correct as the set changes
+    testObj1.discard(0)
+    assert testObj1[0] == 1
+    testObj1.add(0)
+    assert testObj1[-1] == 0
+    assert list(reversed(testObj1))[:2] == [0, 9]
+
+    assert testObj1.pop() == 0
+    assert testObj1.pop(last=False) == 1
+    assert repr(testObj1) == "_P4OOSet([2, 3, 4, 5, 6, 7, 8, 9])"
+
+
+def test_setBulkOperations():
+    testObj1 = P4OO._Set._P4OOSet(iterable=[5, 1, 4, 2, 3])
+    testObj2 = P4OO._Set._P4OOSet(iterable=[4, 6, 5])
+
+    # results keep the left operand's order
+    assert repr(testObj1 | testObj2) == "_P4OOSet([5, 1, 4, 2, 3, 6])"
+    assert repr(testObj1 & testObj2) == "_P4OOSet([5, 4])"
+    assert repr(testObj1 - testObj2) == "_P4OOSet([1, 2, 3])"
+    assert repr(testObj1 ^ testObj2) == "_P4OOSet([1, 2, 3, 6])"
+    assert repr(testObj1 - [1, 1, 2]) == "_P4OOSet([5, 4, 3])"
+
+    testObj3 = P4OO._Set._P4OOSet(iterable=testObj1)
+    testObj3 &= [3, 5, 7]
+    assert repr(testObj3) == "_P4OOSet([5, 3])"
+    testObj3 -= testObj3
+    assert len(testObj3) == 0
+
+    # equality is order sensitive between ordered sets only
+    assert testObj1 == P4OO._Set._P4OOSet(iterable=[5, 1, 4, 2, 3])
+    assert testObj1 != P4OO._Set._P4OOSet(iterable=[1, 2, 3, 4, 5])
+    assert testObj1 == {1, 2, 3, 4, 5}
+
+
+def test_setOperatorsKeepType():
+    from P4OO.Change import P4OOChange, P4OOChangeSet
+
+    changeSet1 = P4OOChangeSet(iterable=[P4OOChange(id=1), P4OOChange(id=2)])
+    changeSet2 = P4OOChangeSet(iterable=[P4OOChange(id=2), P4OOChange(id=3)])
+    changeSet1._p4Conn = "connection"
+
+    for newSet in (changeSet1 | changeSet2, changeSet1 & changeSet2,
+                   changeSet1 - changeSet2, changeSet1[:1]):
+        assert isinstance(newSet, P4OOChangeSet)
+        assert newSet._p4Conn == "connection"
+
+    assert (changeSet1 | changeSet2).listObjectIDs() == [1, 2, 3]
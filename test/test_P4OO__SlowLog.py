@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/test_P4OO__SlowLog.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+unittest test suite for _SlowLog
+'''
+
+######################################################################
+# Includes
+#
+from P4OO._P4Python import _P4OOP4Python
+from P4OO._P4Transport import _P4OOSimulatedP4
+from P4OO._SlowLog import _P4OOSlowLog
+from P4OO.Change import P4OOChange, P4OOChangeSet
+
+
+def test_slowCommands():
+    slowCommands = []
+    slowLog = _P4OOSlowLog(threshold=0.05, callback=slowCommands.append,
+                           maxArgLength=10, stackDepth=3)
+    simulatedP4 = _P4OOSimulatedP4(outputSize=3,
+                                   commandLatency={'shelve': 0.06,
+                                                   'changes': 0.06})
+    p4Conn = _P4OOP4Python(p4PythonObj=simulatedP4.connect(),
+                           slowLog=slowLog)
+
+    # Only the slow shelve is logged, against the change deleting it
+    P4OOChange(id="12", _p4Conn=p4Conn).deleteWithVengeance()
+    assert [slowCommand.cmdName for slowCommand in slowCommands] \
+        == ["shelve"]
+    slowCommand = slowCommands[0]
+    assert slowCommand.seconds >= 0.05
+    assert slowCommand.p4ooObject == "P4OOChange(id='12')"
+    assert slowCommand.callerStack[0].startswith("Change.py:")
+    assert "test_P4OO__SlowLog.py" in slowCommand.callerStack[2]
+    assert " object=P4OOChange(id='12') caller=Change.py:" \
+        in slowCommand.format()
+
+    P4OOChangeSet(_p4Conn=p4Conn).query(files="//depot/a/long/path/...")
+    slowCommand = slowCommands[1]
+    assert (slowCommand.cmdName, slowCommand.records) == ("changes", 3)
+    assert slowCommand.args == ["//depot/a/...(23 chars)"]
+    assert slowCommand.p4ooObject == "P4OOChangeSet(0 objects)"
+
+
+def test_slowLogFile(tmpdir):
+    logPath = str(tmpdir.join("slow.log"))
+    slowLog = _P4OOSlowLog(threshold=0.0, path=logPath)
+    p4Conn = _P4OOP4Python(p4PythonObj=_P4OOSimulatedP4().connect(),
+                           slowLog=slowLog)
+
+    P4OOChangeSet(_p4Conn=p4Conn).query(maxresults=2)
+    slowLog.close()
+
+    with open(logPath, encoding="utf-8") as logFile:
+        logLines = logFile.readlines()
+    assert len(logLines) == 1
+    assert " changes args=['-m', '2'] records=2 " in logLines[0]
+
+
+def test_slowStreamedCommands():
+    slowCommands = []
+    slowLog = _P4OOSlowLog(threshold=0.05, callback=slowCommands.append)
+    simulatedP4 = _P4OOSimulatedP4(outputSize=3,
+                                   commandLatency={'changes': 0.06})
+    p4Conn = _P4OOP4Python(p4PythonObj=simulatedP4.connect(),
+                           slowLog=slowLog)
+
+    # Logged against whoever started the stream, not the stream's thread
+    changes = list(P4OOChangeSet(_p4Conn=p4Conn).query(stream=True))
+    assert len(changes) == 3
+    slowCommand = slowCommands[0]
+    assert (slowCommand.cmdName, slowCommand.records) == ("changes", 3)
+    assert slowCommand.p4ooObject == "P4OOChangeSet(0 objects)"
+    assert slowCommand.callerStack[0].startswith("Change.py:")
+    assert slowCommand.callerStack[1].startswith("test_P4OO__SlowLog.py:")
+    assert slowCommand.callerStack[1].endswith(" test_slowStreamedCommands")
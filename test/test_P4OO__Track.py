@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+######################################################################
+#  Copyright (c)2024 David L. Armstrong
+#
+#  test/test_P4OO__Track.py
+#
+######################################################################
+
+#NAME / DESCRIPTION
+'''
+unittest test suite for _Track
+'''
+
+######################################################################
+# Includes
+#
+from P4OO._P4Python import _P4OOP4Python
+from P4OO._P4Transport import _P4OOSimulatedP4
+from P4OO._Track import _P4OOTrackStats, parseTrackOutput
+from P4OO.Change import P4OOChangeSet
+from P4OO.User import P4OOUser
+
+
+TRACK_OUTPUT = [
+    "lapse .049s",
+    "usage 2+3us 0+8io 0+0net 5068k 0pf",
+    "rpc msgs/size in+out 2+7/0mb+0mb himarks 318788/318788 snd/rcv .000s/.000s",
+    "db.counters",
+    "  pages in+out+cached 2+0+2",
+    "  locks read/write 1/0 rows get+pos+scan put+del 1+0+0 0+0",
+    "--- db.change",
+    "---   pages in+out+cached 12+3+2",
+    "---   locks read/write 1/1 rows get+pos+scan put+del 0+1+250 2+1",
+    "---   total lock wait+held read/write 5ms+40ms/1ms+12ms",
+    "peek count 1 wait+held total/max 0ms+0ms/0ms+0ms",
+]
+
+
+def test_parseTrackOutput():
+    trackRecord = parseTrackOutput(TRACK_OUTPUT, cmdName="changes",
+                                   specType="change")
+
+    assert trackRecord.lapseSeconds == 0.049
+    assert (trackRecord.rowsGet, trackRecord.rowsPos, trackRecord.rowsScan,
+            trackRecord.rowsPut, trackRecord.rowsDel) == (1, 1, 250, 2, 1)
+    assert (trackRecord.readLockWaitMs, trackRecord.readLockHeldMs,
+            trackRecord.writeLockWaitMs, trackRecord.writeLockHeldMs) \
+        == (5, 40, 1, 12)
+    assert sorted(trackRecord.tables) == ["db.change", "db.counters"]
+    assert trackRecord.tables["db.change"]["rowsScan"] == 250
+
+
+def test_trackStats():
+    simulatedP4 = _P4OOSimulatedP4(outputSize=5, track=1).connect()
+    p4Conn = _P4OOP4Python(p4PythonObj=simulatedP4,
+                           trackStats=_P4OOTrackStats())
+
+    P4OOChangeSet(_p4Conn=p4Conn).query()
+    assert p4Conn.getLastTrack().rowsScan == 5
+    P4OOChangeSet(_p4Conn=p4Conn).query(maxresults=2)
+    P4OOUser(id="bob", _p4Conn=p4Conn)._getSpecAttr('user')
+    assert p4Conn.getLastTrack().cmdName == "user"
+
+    changesTotals = p4Conn.trackStats.get("changes")
+    assert (changesTotals['calls'], changesTotals['rowsScan']) == (2, 7)
+    assert changesTotals['tables']['db.change']['rowsPos'] == 2
+
+    assert sorted(p4Conn.trackStats.getBySpecType()) == ["change", "user"]
+    assert p4Conn.trackStats.getBySpecType("user")['calls'] == 1
+
+    # Untracked connections don't collect anything
+    assert _P4OOP4Python(p4PythonObj=simulatedP4).getLastTrack() is None